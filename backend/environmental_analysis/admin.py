@@ -1,17 +1,35 @@
 from django.contrib import admin
 from django.contrib.gis.admin import GISModelAdmin
-from .models import SiteAnalysis, EnvironmentalFeature, ClimateData
+from .models import SiteAnalysis, EnvironmentalFeature, ClimateData, AnalysisJob, OSMTile, AnalysisSummary, OSMFeature
+from .summaries import rebuild_summaries, remove_features
+from .vector_tiles import invalidate_element_tiles_on_commit, invalidate_tiles_on_commit
+
+class AnalysisSummaryInline(admin.StackedInline):
+    model = AnalysisSummary
+    fields = ['total_features', 'total_area_sqm', 'feature_counts', 'area_by_type_sqm', 'bbox', 'updated_at']
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(SiteAnalysis)
 class SiteAnalysisAdmin(GISModelAdmin):
-    list_display = ['name', 'location', 'analysis_radius', 'created_at']
+    list_display = ['name', 'location', 'analysis_radius', 'feature_total', 'created_at']
     list_filter = ['analysis_radius', 'created_at']
+    list_select_related = ['summary']
     search_fields = ['name']
     readonly_fields = ['created_at', 'updated_at']
+    inlines = [AnalysisSummaryInline]
+    
+    @admin.display(description='Features', ordering='summary__total_features')
+    def feature_total(self, obj):
+        summary = getattr(obj, 'summary', None)
+        return summary.total_features if summary else None
     
     fieldsets = (
         ('Site Information', {
-            'fields': ('name', 'location', 'analysis_radius')
+            'fields': ('name', 'location', 'analysis_radius', 'source_analysis')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -25,13 +43,33 @@ class EnvironmentalFeatureAdmin(GISModelAdmin):
     list_filter = ['feature_type', 'created_at']
     search_fields = ['osm_id', 'site_analysis__name']
     readonly_fields = ['created_at']
+    raw_id_fields = ['osm_feature']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Edits can change type and area, and reassigning moves the feature between analyses
+        analyses = [obj.site_analysis]
+        if change and 'site_analysis' in form.changed_data:
+            analyses.append(SiteAnalysis.objects.get(pk=form.initial['site_analysis']))
+        rebuild_summaries(analyses)
+        invalidate_tiles_on_commit(site_analysis.id for site_analysis in analyses)
+    
+    def delete_model(self, request, obj):
+        remove_features(obj.site_analysis, EnvironmentalFeature.objects.filter(pk=obj.pk))
+        invalidate_tiles_on_commit([obj.site_analysis_id])
+    
+    def delete_queryset(self, request, queryset):
+        analyses = list(SiteAnalysis.objects.filter(features__in=queryset).distinct())
+        for site_analysis in analyses:
+            remove_features(site_analysis, queryset)
+        invalidate_tiles_on_commit(site_analysis.id for site_analysis in analyses)
     
     fieldsets = (
         ('Feature Information', {
-            'fields': ('site_analysis', 'feature_type', 'osm_id')
+            'fields': ('site_analysis', 'feature_type', 'osm_id', 'osm_feature')
         }),
-        ('Geometry & Properties', {
-            'fields': ('geometry', 'properties')
+        ('Geometry', {
+            'fields': ('geometry',)
         }),
         ('Metadata', {
             'fields': ('created_at',),
@@ -58,3 +96,42 @@ class ClimateDataAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'current_stage', 'site_analysis', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['site_name', 'request_key']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+    
+    fieldsets = (
+        ('Request', {
+            'fields': ('latitude', 'longitude', 'radius', 'site_name', 'request_key')
+        }),
+        ('Status', {
+            'fields': ('status', 'current_stage', 'progress', 'site_analysis', 'error')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'started_at', 'finished_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+@admin.register(OSMTile)
+class OSMTileAdmin(admin.ModelAdmin):
+    list_display = ['zoom', 'x', 'y', 'feature_count', 'fetched_at', 'expires_at']
+    list_filter = ['zoom', 'fetched_at']
+    readonly_fields = ['fetched_at']
+
+@admin.register(OSMFeature)
+class OSMFeatureAdmin(GISModelAdmin):
+    list_display = ['element_type', 'element_id', 'version', 'updated_at']
+    list_filter = ['element_type', 'updated_at']
+    search_fields = ['element_id']
+    readonly_fields = ['created_at', 'updated_at']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Tiles show element tags, and every analysis linking the element shares them
+        if change and 'tags' in form.changed_data:
+            invalidate_element_tiles_on_commit([obj.pk])
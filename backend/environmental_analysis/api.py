@@ -2,13 +2,20 @@ from ninja import Router
 from ninja.schema import Schema
 from typing import List, Dict, Any, Optional
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 import json
 import logging
 from datetime import datetime
 
-from .models import SiteAnalysis, EnvironmentalFeature, ClimateData
+from .models import SiteAnalysis, EnvironmentalFeature, ClimateData, AnalysisJob
 from .services import EnvironmentalAnalysisService
+from .jobs import JobQueueFull, get_job_queue
+from .exporters import export_response
+from .feature_queries import features_page, search_features
+from .proximity import analysis_proximity
+from .coverage import get_coverage_engine
+from .vector_tiles import MVT_CONTENT_TYPE, TileOutOfRange, get_tile_renderer
+from .batch import BatchAnalysisService, BatchValidationError, parse_sites_csv, validate_sites
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -19,6 +26,10 @@ class CoordinateSchema(Schema):
     radius: Optional[int] = 500
     name: Optional[str] = None
 
+class BatchAnalysisSchema(Schema):
+    sites: List[CoordinateSchema] = []
+    csv: Optional[str] = None
+
 class EnvironmentalFeatureSchema(Schema):
     id: int
     feature_type: str
@@ -33,17 +44,60 @@ class AnalysisResponseSchema(Schema):
     features_count: int
     summary: Dict[str, Any]
     created_at: str
+    stage_timings: Optional[Dict[str, float]] = None
+    geometry_stats: Optional[Dict[str, Any]] = None
+    source_analysis_id: Optional[int] = None
+
+class AnalysisJobSchema(Schema):
+    job_id: int
+    status: str
+    current_stage: str
+    progress: Dict[str, Any]
+    analysis_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+def serialize_job(job: AnalysisJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "current_stage": job.current_stage,
+        "progress": job.progress,
+        "analysis_id": job.site_analysis_id,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
 
 @router.get("/test")
 def test_endpoint(request):
     """Test endpoint to verify API is working"""
     return {"message": "Environmental Analysis API is working with PostGIS!"}
 
-@router.post("/analyze", response=AnalysisResponseSchema)
-def analyze_site(request, coordinates: CoordinateSchema):
+@router.post("/analyze", response={200: AnalysisResponseSchema, 202: AnalysisJobSchema})
+def analyze_site(request, coordinates: CoordinateSchema, run_async: bool = False):
     """
     Analyze environmental features around given coordinates using OSMnx
+    
+    With run_async=true the analysis is queued and a job is returned
+    immediately; poll /jobs/{job_id} for its progress.
     """
+    if run_async:
+        try:
+            job, created = get_job_queue().submit(
+                latitude=coordinates.latitude,
+                longitude=coordinates.longitude,
+                radius=coordinates.radius,
+                site_name=coordinates.name,
+            )
+        except JobQueueFull as e:
+            return JsonResponse({"error": str(e)}, status=503)
+        
+        return 202, serialize_job(job)
+    
     try:
         # Initialize the analysis service
         service = EnvironmentalAnalysisService()
@@ -70,6 +124,9 @@ def analyze_site(request, coordinates: CoordinateSchema):
             "features_count": site_analysis.features.count(),
             "summary": summary,
             "created_at": site_analysis.created_at.isoformat(),
+            "stage_timings": getattr(site_analysis, 'stage_timings', None),
+            "geometry_stats": getattr(site_analysis, 'geometry_stats', None),
+            "source_analysis_id": site_analysis.source_analysis_id,
         }
         
     except Exception as e:
@@ -79,12 +136,49 @@ def analyze_site(request, coordinates: CoordinateSchema):
             status=500
         )
 
+@router.post("/analyze/batch")
+def analyze_batch(request, batch: BatchAnalysisSchema):
+    """
+    Analyze a portfolio of sites given as a list or as CSV text
+    
+    Streams newline-delimited JSON progress events per site, ending with a
+    'saved' event that maps each site index to its analysis id.
+    """
+    sites = [
+        {
+            "latitude": site.latitude,
+            "longitude": site.longitude,
+            "radius": site.radius,
+            "name": site.name,
+        }
+        for site in batch.sites
+    ]
+    if batch.csv:
+        sites.extend(parse_sites_csv(batch.csv))
+    
+    try:
+        sites = validate_sites(sites)
+    except BatchValidationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    events = BatchAnalysisService().run(sites)
+    return StreamingHttpResponse(
+        (json.dumps(event) + "\n" for event in events),
+        content_type="application/x-ndjson",
+    )
+
+@router.get("/jobs/{job_id}", response=AnalysisJobSchema)
+def get_job(request, job_id: int):
+    """Get status and per-stage progress of a background analysis job"""
+    job = get_object_or_404(AnalysisJob, id=job_id)
+    return serialize_job(job)
+
 @router.get("/analysis/{analysis_id}")
-def get_analysis(request, analysis_id: int):
-    """Get details of a specific analysis"""
+def get_analysis(request, analysis_id: int, clip: bool = False):
+    """Get details of a specific analysis; clip=true adds area clipped to the site circle"""
     site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
     service = EnvironmentalAnalysisService()
-    summary = service.get_analysis_summary(site_analysis)
+    summary = service.get_analysis_summary(site_analysis, clip_to_site=clip)
     
     return {
         "id": site_analysis.id,
@@ -99,58 +193,153 @@ def get_analysis(request, analysis_id: int):
     }
 
 @router.get("/analysis/{analysis_id}/features")
-def get_analysis_features(request, analysis_id: int, feature_type: str = None):
-    """Get environmental features for a specific analysis"""
+def get_analysis_features(request, analysis_id: int, feature_type: str = None,
+                          after: int = None, limit: int = None, fields: str = None,
+                          bbox: str = None, simplify: float = None, precision: int = None,
+                          tags: str = None):
+    """
+    Get environmental features for a specific analysis
+    
+    Features are paged by id: pass the returned next_cursor as after to get
+    the next page. fields selects a subset of id, feature_type, osm_id,
+    properties and geometry; bbox is min_lon,min_lat,max_lon,max_lat;
+    simplify is a tolerance in meters and precision the number of decimals
+    in the GeoJSON coordinates. tags filters on OSM tags with
+    semicolon-separated key, key=value or key=[value,...] clauses, e.g.
+    leisure=park;name.
+    """
     site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
-    features = site_analysis.features.all()
     
-    if feature_type:
-        features = features.filter(feature_type=feature_type)
+    try:
+        page = features_page(
+            site_analysis, after=after, limit=limit, fields=fields, feature_type=feature_type,
+            bbox=bbox, simplify=simplify, precision=precision, tags=tags,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
     
-    features_data = []
-    for feature in features:
-        features_data.append({
-            "id": feature.id,
-            "feature_type": feature.feature_type,
-            "osm_id": feature.osm_id,
-            "properties": feature.properties,
-            "geometry": json.loads(feature.geometry.geojson),
-        })
+    return HttpResponse(page, content_type="application/json")
+
+@router.get("/features/search")
+def search_analysis_features(request, tags: str, analysis_ids: str = None, last: int = None,
+                             feature_type: str = None, after: int = None, limit: int = None,
+                             fields: str = None, bbox: str = None, simplify: float = None,
+                             precision: int = None):
+    """
+    Search features by OSM tags across analyses
     
-    return {
-        "analysis_id": analysis_id,
-        "feature_type": feature_type,
-        "features": features_data,
-        "count": len(features_data),
-    }
+    analysis_ids is a comma-separated list of analyses to search; without
+    it the last most recent analyses are searched. tags and the remaining
+    parameters work as for /analysis/{analysis_id}/features, and every
+    feature carries its analysis_id.
+    """
+    try:
+        ids = [int(value) for value in (analysis_ids or '').split(',') if value.strip()]
+    except ValueError:
+        return {"error": "analysis_ids must be a comma-separated list of integers"}
+    
+    try:
+        page = search_features(
+            tags, analysis_ids=ids, last=last, after=after, limit=limit, fields=fields,
+            feature_type=feature_type, bbox=bbox, simplify=simplify, precision=precision,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    return HttpResponse(page, content_type="application/json")
+
+@router.get("/analysis/{analysis_id}/proximity")
+def get_analysis_proximity(request, analysis_id: int, k: int = None, feature_type: str = None,
+                           tags: str = None, bands: str = None):
+    """
+    Get the nearest features to the site and feature counts per distance band
+    
+    Returns the k nearest features per feature type with their geodesic
+    distance in meters. feature_type takes a comma-separated list of types
+    (all types of the analysis by default), tags narrows every type with a
+    tag filter as for /features and bands takes comma-separated band edges
+    in meters.
+    """
+    site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
+    feature_types = [value.strip() for value in (feature_type or '').split(',') if value.strip()]
+    
+    try:
+        return analysis_proximity(site_analysis, k=k, feature_types=feature_types, tags=tags, bands=bands)
+    except ValueError as e:
+        return {"error": str(e)}
+
+@router.get("/analysis/{analysis_id}/coverage")
+def get_analysis_coverage(request, analysis_id: int, cell_size: float = None):
+    """
+    Get non-overlapping green, water and paved path coverage of the site
+    
+    Features are rasterized onto a grid of cell_size meters, so overlapping
+    polygons are counted once. Also reports the distance from the site to
+    the nearest green space.
+    """
+    site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
+    
+    try:
+        coverage = get_coverage_engine().get_coverage(site_analysis, cell_size)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    return {"analysis_id": site_analysis.id, **coverage.metrics}
+
+@router.get("/analysis/{analysis_id}/coverage.{format}")
+def get_analysis_coverage_layer(request, analysis_id: int, format: str, layer: str = "classes",
+                                cell_size: float = None):
+    """
+    Get a coverage layer as a PNG image or a NumPy .npy array
+    
+    layer is classes (0 none, 1 green, 2 water, 3 paved path) or distance
+    (meters to the nearest green space). Row 0 is the northern edge.
+    """
+    site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
+    if format not in ('png', 'npy'):
+        raise Http404(f"Unknown coverage format: {format}")
+    
+    try:
+        coverage = get_coverage_engine().get_coverage(site_analysis, cell_size)
+        if format == 'png':
+            return HttpResponse(coverage.png(layer), content_type="image/png")
+        return HttpResponse(coverage.npy(layer), content_type="application/octet-stream")
+    except ValueError as e:
+        return {"error": str(e)}
 
 @router.get("/analysis/{analysis_id}/export")
 def export_analysis(request, analysis_id: int, format: str = "geojson"):
-    """Export analysis results in various formats"""
+    """Export analysis results as GeoJSON, gzipped GeoJSON, FlatGeobuf or GeoParquet"""
     site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
-    features = site_analysis.features.all()
     
-    if format.lower() == "geojson":
-        geojson = {
-            "type": "FeatureCollection",
-            "features": []
-        }
-        
-        for feature in features:
-            geojson["features"].append({
-                "type": "Feature",
-                "id": feature.osm_id,
-                "properties": {
-                    **feature.properties,
-                    "feature_type": feature.feature_type,
-                    "analysis_id": analysis_id,
-                },
-                "geometry": json.loads(feature.geometry.geojson),
-            })
-        
-        return geojson
+    try:
+        return export_response(site_analysis, format)
+    except ValueError as e:
+        return {"error": str(e)}
+
+@router.get("/analysis/{analysis_id}/tiles/{z}/{x}/{y}.mvt")
+def get_analysis_tile(request, analysis_id: int, z: int, x: int, y: int, feature_type: str = None):
+    """
+    Get a Mapbox Vector Tile of an analysis' features
+    
+    feature_type takes a comma-separated list of feature types. Tiles carry
+    an ETag, so unchanged tiles revalidate with a 304.
+    """
+    site_analysis = get_object_or_404(SiteAnalysis, id=analysis_id)
+    feature_types = [value.strip() for value in (feature_type or '').split(',') if value.strip()]
     
-    return {"error": f"Format '{format}' not supported. Available: geojson"}
+    try:
+        tile, etag = get_tile_renderer().get_tile(site_analysis.id, z, x, y, feature_types)
+    except TileOutOfRange as e:
+        raise Http404(str(e))
+    
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
 
 @router.get("/features/types")
 def get_feature_types(request):
@@ -208,6 +397,13 @@ def refresh_climate_data(request, analysis_id: int):
         "climate_zone": climate_data.temperature_data.get("monthly_averages", {}).get("zone", "unknown"),
     }
 
+@router.get("/climate/cache/stats")
+def get_climate_cache_stats(request):
+    """Get hit, miss and eviction counters for the climate data cache"""
+    from .climate_cache import get_climate_cache
+    
+    return get_climate_cache().stats()
+
 @router.get("/climate/summary")
 def get_climate_summary(request, latitude: float, longitude: float):
     """Get climate summary for any coordinates without creating an analysis"""
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class EnvironmentalAnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'environmental_analysis'
+
+    def ready(self):
+        from django.core.checks import register
+        from .checks import check_shared_caches
+        register(check_shared_caches)
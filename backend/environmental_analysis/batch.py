@@ -0,0 +1,366 @@
+"""
+Batch Site Analysis
+
+Analyzes a portfolio of sites in one run. Sites covered by a recent
+analysis reuse its features; other nearby sites are grouped so a single
+OSM query covers the whole group, groups and climate fetches run
+on a bounded worker pool, progress is streamed per site, and each group
+is written with one bulk insert per model as soon as it is complete.
+"""
+import csv
+import io
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import osmnx as ox
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import close_old_connections, transaction
+from shapely.geometry import box
+
+from .models import SiteAnalysis, ClimateData
+from .reuse import EARTH_RADIUS_M, AnalysisReuseEngine, bbox_from_point
+from .services import EnvironmentalAnalysisService, ClimateDataService
+from .summaries import rebuild_summaries
+
+logger = logging.getLogger(__name__)
+
+MIN_RADIUS = 100
+MAX_RADIUS = 2000
+
+
+class BatchValidationError(ValueError):
+    """Raised when a batch request contains invalid sites"""
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def parse_sites_csv(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse sites from CSV text
+
+    Expects a header with latitude/lat and longitude/lon/lng columns and
+    optional radius and name columns.
+    """
+    sites = []
+    for row in csv.DictReader(io.StringIO(text.strip())):
+        row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+        sites.append({
+            'latitude': row.get('latitude') or row.get('lat'),
+            'longitude': row.get('longitude') or row.get('lon') or row.get('lng'),
+            'radius': row.get('radius') or 500,
+            'name': row.get('name') or None,
+        })
+    return sites
+
+
+def validate_sites(sites: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Normalize and validate site dictionaries
+
+    Raises:
+        BatchValidationError: If a site is invalid or the batch is too large
+    """
+    max_sites = getattr(settings, 'BATCH_ANALYSIS_MAX_SITES', 1000)
+    if not sites:
+        raise BatchValidationError("No sites provided")
+    if len(sites) > max_sites:
+        raise BatchValidationError(f"Too many sites: {len(sites)} (maximum {max_sites})")
+
+    validated = []
+    for index, site in enumerate(sites):
+        try:
+            latitude = float(site['latitude'])
+            longitude = float(site['longitude'])
+            radius = int(site.get('radius') or 500)
+        except (KeyError, TypeError, ValueError):
+            raise BatchValidationError(f"Site {index}: latitude, longitude and radius must be numbers")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise BatchValidationError(f"Site {index}: coordinates out of range")
+        if not MIN_RADIUS <= radius <= MAX_RADIUS:
+            raise BatchValidationError(f"Site {index}: radius must be between {MIN_RADIUS} and {MAX_RADIUS} meters")
+        validated.append({
+            'latitude': latitude,
+            'longitude': longitude,
+            'radius': radius,
+            'name': site.get('name') or None,
+        })
+    return validated
+
+
+def covering_circle(sites: List[Dict[str, Any]], members: List[int]) -> Tuple[float, float, int]:
+    """
+    Circle around the centroid of members that covers every member's circle
+
+    Returns:
+        Tuple of (latitude, longitude, radius in meters)
+    """
+    latitude = sum(sites[i]['latitude'] for i in members) / len(members)
+    longitude = sum(sites[i]['longitude'] for i in members) / len(members)
+    radius = max(
+        haversine_m(latitude, longitude, sites[i]['latitude'], sites[i]['longitude']) + sites[i]['radius']
+        for i in members
+    )
+    if len(members) > 1:
+        # Small margin keeps member boxes inside the group box despite rounding
+        radius += 5
+    return latitude, longitude, math.ceil(radius)
+
+
+def group_sites(sites: List[Dict[str, Any]], cell_meters: float,
+                max_radius: int = MAX_RADIUS) -> List[Dict[str, Any]]:
+    """
+    Group nearby sites so one OSM query can cover each group
+
+    Sites are bucketed on a metric grid. Within a bucket, sites join the
+    first group whose covering circle stays within max_radius, so no group
+    query is larger than a single site's query may be.
+
+    Returns:
+        List of groups with 'latitude', 'longitude', 'radius' and 'members'
+        (indexes into sites)
+    """
+    buckets = {}
+    for index, site in enumerate(sites):
+        cell_y = math.floor(site['latitude'] * 111_320 / cell_meters)
+        meters_per_degree_lon = 111_320 * max(math.cos(math.radians(site['latitude'])), 0.01)
+        cell_x = math.floor(site['longitude'] * meters_per_degree_lon / cell_meters)
+        buckets.setdefault((cell_x, cell_y), []).append(index)
+
+    groups = []
+    for bucket in buckets.values():
+        bucket_groups = []
+        for index in bucket:
+            for members in bucket_groups:
+                if covering_circle(sites, members + [index])[2] <= max_radius:
+                    members.append(index)
+                    break
+            else:
+                bucket_groups.append([index])
+
+        for members in bucket_groups:
+            latitude, longitude, radius = covering_circle(sites, members)
+            groups.append({
+                'latitude': latitude,
+                'longitude': longitude,
+                'radius': radius,
+                'members': members,
+            })
+    return groups
+
+
+class BatchAnalysisService:
+    """Runs environmental analyses for a list of sites"""
+
+    def __init__(self, max_workers: int = None, group_cell_meters: float = None):
+        self.max_workers = max_workers or getattr(settings, 'BATCH_ANALYSIS_WORKERS', 4)
+        self.group_cell_meters = group_cell_meters or getattr(settings, 'BATCH_GROUP_CELL_METERS', 2000)
+        self.analysis_service = EnvironmentalAnalysisService()
+        self.climate_service = ClimateDataService()
+
+    def run(self, sites: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze all sites, yielding progress events as they complete
+
+        Yields one 'site' event per site once its features (or its failure)
+        are known, one 'climate' event per site, a 'site' event with its
+        analysis id once the site's group is saved, and a final 'saved'
+        event with all created analysis ids. Each group is saved as soon as
+        it is complete, so sites saved before a client disconnects are kept.
+
+        Args:
+            sites: Validated site dictionaries
+
+        Yields:
+            Progress event dictionaries
+        """
+        groups = group_sites(sites, self.group_cell_meters)
+        logger.info(f"Batch of {len(sites)} sites grouped into {len(groups)} OSM queries")
+        yield {'event': 'started', 'sites': len(sites), 'groups': len(groups)}
+
+        group_of_site = {index: number for number, group in enumerate(groups) for index in group['members']}
+        features_by_group = {}
+        climate_by_site = {}
+        errors = {}
+        saved = []
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch-analysis')
+        try:
+            futures = {}
+            for number, group in enumerate(groups):
+                futures[executor.submit(self._process_group, sites, group)] = ('group', number)
+            for index, site in enumerate(sites):
+                futures[executor.submit(self._fetch_climate, site)] = ('climate', index)
+
+            for future in as_completed(futures):
+                kind, item = futures[future]
+                if kind == 'group':
+                    number = item
+                    try:
+                        group_features = future.result()
+                    except Exception as e:
+                        logger.error(f"Error processing site group: {str(e)}")
+                        for index in groups[number]['members']:
+                            errors[index] = str(e)
+                            yield {'event': 'site', 'index': index, 'status': 'failed', 'error': str(e)}
+                        continue
+                    features_by_group[number] = group_features
+                    for index, (features_data, _) in group_features.items():
+                        yield {'event': 'site', 'index': index, 'status': 'processed',
+                               'features_count': len(features_data)}
+                else:
+                    number = group_of_site[item]
+                    climate_by_site[item] = future.result()
+                    yield {'event': 'climate', 'index': item,
+                           'status': 'processed' if climate_by_site[item] else 'failed'}
+
+                # A group is saved once its features and every member's climate are in
+                members = groups[number]['members']
+                if number in features_by_group and all(index in climate_by_site for index in members):
+                    group_features = features_by_group.pop(number)
+                    try:
+                        group_saved = self.save(sites, group_features, climate_by_site)
+                    except Exception as e:
+                        logger.error(f"Error saving site group: {str(e)}")
+                        for index in members:
+                            errors[index] = str(e)
+                            yield {'event': 'site', 'index': index, 'status': 'failed', 'error': str(e)}
+                        continue
+                    saved.extend(group_saved)
+                    for index, analysis in group_saved:
+                        yield {'event': 'site', 'index': index, 'status': 'saved', 'analysis_id': analysis.id}
+        finally:
+            # A client that disconnects keeps the groups saved so far; queued work is dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        saved.sort(key=lambda pair: pair[0])
+        yield {
+            'event': 'saved',
+            'analyses': [{'index': index, 'analysis_id': analysis.id} for index, analysis in saved],
+            'failed': sorted(errors),
+        }
+
+    def _process_group(self, sites: List[Dict[str, Any]],
+                       group: Dict[str, Any]) -> Dict[int, Tuple[List[Dict[str, Any]], Optional[SiteAnalysis]]]:
+        """
+        Get the features of each member site of a group
+
+        Members covered by a recent analysis reuse its features, as a single
+        analysis would. The rest share one OSM query and split its features.
+
+        Returns:
+            Mapping of site index to (features data, reused source analysis or None)
+        """
+        try:
+            results = {}
+            reuse_engine = AnalysisReuseEngine()
+            for index in group['members']:
+                site = sites[index]
+                try:
+                    source_analysis = reuse_engine.find_covering_analysis(
+                        site['latitude'], site['longitude'], site['radius']
+                    )
+                    if source_analysis:
+                        results[index] = (
+                            reuse_engine.derive_features(
+                                source_analysis, site['latitude'], site['longitude'], site['radius']
+                            ),
+                            source_analysis,
+                        )
+                except Exception as e:
+                    logger.warning(f"Error reusing prior analysis, querying OSM instead: {str(e)}")
+
+            remaining = [index for index in group['members'] if index not in results]
+            if not remaining:
+                return results
+            if len(remaining) < len(group['members']):
+                # Query only the circle the uncovered members need
+                latitude, longitude, radius = covering_circle(sites, remaining)
+            else:
+                latitude, longitude, radius = group['latitude'], group['longitude'], group['radius']
+
+            try:
+                gdf = self.analysis_service.feature_source.get_features(
+                    latitude, longitude, radius, self.analysis_service.TAG_FILTERS,
+                )
+            except ox._errors.InsufficientResponseError:
+                results.update((index, ([], None)) for index in remaining)
+                return results
+
+            for index in remaining:
+                site = sites[index]
+                # Same box OSMnx would have queried for this site alone
+                site_box = box(*bbox_from_point(site['latitude'], site['longitude'], site['radius']).extent)
+                positions = gdf.sindex.query(site_box, predicate='intersects') if not gdf.empty else []
+                results[index] = (self.analysis_service.process_osm_features(gdf.iloc[positions]), None)
+            return results
+        finally:
+            close_old_connections()
+
+    def _fetch_climate(self, site: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            return self.climate_service.fetch_climate_fields(site['latitude'], site['longitude'])
+        except Exception as e:
+            logger.error(f"Error fetching climate data: {e}")
+            return None
+        finally:
+            close_old_connections()
+
+    def save(self, sites: List[Dict[str, Any]],
+             features_by_site: Dict[int, Tuple[List[Dict[str, Any]], Optional[SiteAnalysis]]],
+             climate_by_site: Dict[int, Dict[str, Dict[str, Any]]]) -> List[Tuple[int, SiteAnalysis]]:
+        """
+        Write processed sites with one bulk insert per model
+
+        Args:
+            sites: Validated site dictionaries
+            features_by_site: Site index to (features data, reused source analysis or None)
+            climate_by_site: Site index to climate fields, or None when the fetch failed
+
+        Returns:
+            List of (site index, SiteAnalysis) pairs
+        """
+        indexes = sorted(features_by_site)
+        if not indexes:
+            return []
+
+        with transaction.atomic():
+            analyses = SiteAnalysis.objects.bulk_create([
+                SiteAnalysis(
+                    name=sites[index]['name'] or f"Site at {sites[index]['latitude']:.4f}, {sites[index]['longitude']:.4f}",
+                    location=Point(sites[index]['longitude'], sites[index]['latitude'], srid=4326),
+                    analysis_radius=sites[index]['radius'],
+                    source_analysis=features_by_site[index][1],
+                )
+                for index in indexes
+            ])
+
+            analysis_features = []
+            for index, site_analysis in zip(indexes, analyses):
+                site_features, _ = self.analysis_service.process_feature_geometries(
+                    site_analysis, features_by_site[index][0]
+                )
+                analysis_features.append((site_analysis, site_features))
+            # Nearby sites share most OSM elements; each one is stored once
+            self.analysis_service.ingest_features(analysis_features)
+
+            empty_climate = {'temperature_data': {}, 'precipitation_data': {}, 'wind_data': {}, 'solar_data': {}}
+            ClimateData.objects.bulk_create([
+                ClimateData(site_analysis=site_analysis, **(climate_by_site.get(index) or empty_climate))
+                for index, site_analysis in zip(indexes, analyses)
+            ])
+
+            rebuild_summaries(analyses)
+
+        feature_count = sum(len(site_features) for _, site_features in analysis_features)
+        logger.info(f"Saved {len(analyses)} analyses with {feature_count} features in one batch")
+        return list(zip(indexes, analyses))
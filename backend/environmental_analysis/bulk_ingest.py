@@ -0,0 +1,187 @@
+"""
+Bulk Feature Ingest
+
+Streams processed features into PostgreSQL with COPY instead of building
+model instances. Rows are copied into a temporary staging table with the
+geometries as hex WKB and the tags as JSON, then merged into the shared
+OSMFeature table and the per-analysis EnvironmentalFeature links with
+INSERT ... ON CONFLICT. Other databases (SpatiaLite) use the ORM path in
+EnvironmentalAnalysisService.ingest_features.
+"""
+import io
+import json
+import logging
+from typing import Any, Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+from .models import EnvironmentalFeature, OSMFeature
+from .vector_tiles import invalidate_tiles_on_commit
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = 'feature_ingest_staging'
+
+STAGING_COLUMNS = (
+    'site_analysis_id', 'feature_type', 'osm_id', 'element_type', 'element_id',
+    'version', 'tags', 'geometry', 'original_geometry',
+)
+
+# Characters with a meaning in the COPY text format
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_supported(using: str = 'default') -> bool:
+    """Whether features can be ingested with COPY on a database connection"""
+    method = getattr(settings, 'FEATURE_INGEST_METHOD', 'copy')
+    return method == 'copy' and connections[using].vendor == 'postgresql'
+
+
+def copy_value(value: Any) -> str:
+    """Format a value as a COPY text field"""
+    if value is None:
+        return '\\N'
+    return str(value).translate(COPY_ESCAPES)
+
+
+class FeatureCopyIngester:
+    """Ingests processed feature dictionaries through a COPY staging table"""
+
+    def __init__(self, using: str = 'default', chunk_size: int = None):
+        self.using = using
+        self.chunk_size = chunk_size or getattr(settings, 'FEATURE_INGEST_CHUNK_SIZE', 10000)
+
+    def ingest(self, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> int:
+        """
+        Copy features into the database and link them to their analyses
+
+        Must run inside a transaction. Elements already stored are updated
+        with the latest tags and geometry; features an analysis already
+        has are skipped.
+
+        Args:
+            rows: (SiteAnalysis id, processed feature dictionary) pairs, with
+                geometry_wkb and original_geometry_wkb as produced by the
+                geometry pipeline
+
+        Returns:
+            Number of features inserted
+        """
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+                    site_analysis_id bigint,
+                    feature_type text,
+                    osm_id bigint,
+                    element_type text,
+                    element_id bigint,
+                    version integer,
+                    tags jsonb,
+                    geometry geometry,
+                    original_geometry geometry
+                ) ON COMMIT DROP
+            """)
+            cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+
+            copied = 0
+            for data, count in self._chunks(rows):
+                self._copy(cursor, data)
+                copied += count
+            if not copied:
+                return 0
+
+            cursor.execute(f"ANALYZE {STAGING_TABLE}")
+            # Tiles show element tags; analyses linking retagged elements are re-rendered
+            cursor.execute(self._retagged_analyses_sql())
+            invalidate_tiles_on_commit(analysis_id for analysis_id, in cursor.fetchall())
+            cursor.execute(self._merge_elements_sql())
+            cursor.execute(self._insert_links_sql())
+            inserted = cursor.rowcount
+
+        logger.info(f"Copied {copied} features, {inserted} new")
+        return inserted
+
+    def _chunks(self, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> Iterable[Tuple[str, int]]:
+        """Serialize rows to COPY text, chunk_size rows at a time"""
+        buffer = io.StringIO()
+        count = 0
+        for site_analysis_id, feature in rows:
+            values = (
+                site_analysis_id,
+                feature['feature_type'],
+                feature['osm_id'],
+                feature.get('element_type', ''),
+                feature.get('element_id', feature['osm_id']),
+                feature.get('version', 0),
+                json.dumps(feature['properties']),
+                feature.get('geometry_wkb') or feature['geometry_wkt'],
+                feature.get('original_geometry_wkb'),
+            )
+            buffer.write('\t'.join(copy_value(value) for value in values))
+            buffer.write('\n')
+            count += 1
+            if count == self.chunk_size:
+                yield buffer.getvalue(), count
+                buffer = io.StringIO()
+                count = 0
+        if count:
+            yield buffer.getvalue(), count
+
+    def _copy(self, cursor, data: str) -> None:
+        sql = f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN"
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            # psycopg2
+            raw_cursor.copy_expert(sql, io.StringIO(data))
+        else:
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(data)
+
+    def _retagged_analyses_sql(self) -> str:
+        return f"""
+            SELECT DISTINCT f.site_analysis_id
+            FROM {STAGING_TABLE} s
+            JOIN {OSMFeature._meta.db_table} o
+              ON o.element_type = s.element_type
+             AND o.element_id = s.element_id
+            JOIN {EnvironmentalFeature._meta.db_table} f ON f.osm_feature_id = o.id
+            WHERE o.tags IS DISTINCT FROM s.tags
+        """
+
+    def _merge_elements_sql(self) -> str:
+        # ON CONFLICT may touch each row once, so duplicates are dropped first,
+        # keeping the highest version of each element
+        return f"""
+            INSERT INTO {OSMFeature._meta.db_table}
+                (element_type, element_id, version, tags, geometry, created_at, updated_at)
+            SELECT DISTINCT ON (element_type, element_id)
+                element_type, element_id, version, tags,
+                ST_SetSRID(COALESCE(original_geometry, geometry), 4326), now(), now()
+            FROM {STAGING_TABLE}
+            ORDER BY element_type, element_id, version DESC
+            ON CONFLICT (element_type, element_id) DO UPDATE
+            SET version = EXCLUDED.version, tags = EXCLUDED.tags, geometry = EXCLUDED.geometry,
+                updated_at = EXCLUDED.updated_at
+        """
+
+    def _insert_links_sql(self) -> str:
+        return f"""
+            INSERT INTO {EnvironmentalFeature._meta.db_table}
+                (site_analysis_id, osm_feature_id, feature_type, osm_id, geometry, created_at)
+            SELECT s.site_analysis_id, o.id, s.feature_type, s.osm_id,
+                   ST_SetSRID(s.geometry, 4326), now()
+            FROM {STAGING_TABLE} s
+            JOIN {OSMFeature._meta.db_table} o
+              ON o.element_type = s.element_type
+             AND o.element_id = s.element_id
+            ON CONFLICT (site_analysis_id, osm_id) DO NOTHING
+        """
+
+
+def copy_features(rows: Iterable[Tuple[int, Dict[str, Any]]], using: str = 'default') -> int:
+    """Ingest (SiteAnalysis id, feature dictionary) pairs with COPY"""
+    return FeatureCopyIngester(using=using).ingest(rows)
+
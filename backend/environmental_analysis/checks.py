@@ -0,0 +1,29 @@
+"""
+System Checks
+
+Warns about configuration that only works with a single worker process.
+"""
+from django.conf import settings
+from django.core.checks import Warning
+
+# Cache backends whose entries are invisible to other processes
+PROCESS_LOCAL_CACHES = {'django.core.cache.backends.locmem.LocMemCache'}
+
+# Settings naming caches that are invalidated from any worker
+SHARED_CACHE_SETTINGS = ['MVT_TILE_CACHE_ALIAS', 'COVERAGE_CACHE_ALIAS']
+
+
+def check_shared_caches(app_configs, **kwargs):
+    """Tile and coverage caches must be shared for invalidation to reach every worker"""
+    warnings = []
+    for setting_name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, setting_name, 'default')
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_CACHES:
+            warnings.append(Warning(
+                f"{setting_name} uses the process-local cache '{alias}'",
+                hint="Invalidations in one worker are not seen by the others; set REDIS_URL "
+                     "or use the database cache.",
+                id='environmental_analysis.W001',
+            ))
+    return warnings
@@ -0,0 +1,152 @@
+"""
+Climate Data Cache
+
+Caches climate API responses on a snapped coordinate grid so that sites
+a few metres apart share one upstream request. Current weather and the
+year-long NASA POWER series have separate TTLs, and the storage backend
+is pluggable: an in-process LRU or the Django cache framework.
+"""
+import threading
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .local_cache import LocalLRUBackend
+
+# Cached climate sources and the settings holding their TTL in hours
+CURRENT_WEATHER = 'current_weather'
+NASA_POWER = 'nasa_power'
+
+SOURCE_TTL_SETTINGS = {
+    CURRENT_WEATHER: ('CLIMATE_DATA_CACHE_HOURS', 6),
+    NASA_POWER: ('CLIMATE_HISTORICAL_CACHE_HOURS', 24),
+}
+
+
+class DjangoCacheBackend:
+    """Backend storing entries in a configured Django cache"""
+
+    # Bumping the generation invalidates every entry without touching other keys
+    GENERATION_KEY = 'climate:generation'
+
+    def __init__(self, alias: str = 'default'):
+        self.alias = alias
+        # Expiry and eviction happen inside the Django cache and are not observable
+        self.evictions = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _generation(self) -> int:
+        return self.cache.get_or_set(self.GENERATION_KEY, 1, timeout=None)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key, version=self._generation())
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self.cache.set(key, value, timeout=ttl, version=self._generation())
+
+    def clear(self) -> None:
+        try:
+            self.cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            self.cache.set(self.GENERATION_KEY, 2, timeout=None)
+
+    @property
+    def entries(self) -> Optional[int]:
+        return None
+
+
+class ClimateCache:
+    """Coordinate-keyed cache for climate source responses"""
+
+    KEY_PREFIX = 'climate'
+
+    def __init__(self, backend=None, grid_degrees: float = None):
+        self.backend = backend or LocalLRUBackend()
+        self.grid_degrees = grid_degrees or getattr(settings, 'CLIMATE_CACHE_GRID_DEGREES', 0.01)
+        self.hits = {source: 0 for source in SOURCE_TTL_SETTINGS}
+        self.misses = {source: 0 for source in SOURCE_TTL_SETTINGS}
+        self._lock = threading.Lock()
+
+    def snap(self, lat: float, lon: float) -> tuple:
+        """Snap coordinates to the cache grid"""
+        grid = self.grid_degrees
+        return round(round(lat / grid) * grid, 6), round(round(lon / grid) * grid, 6)
+
+    def make_key(self, source: str, lat: float, lon: float) -> str:
+        snapped_lat, snapped_lon = self.snap(lat, lon)
+        return f"{self.KEY_PREFIX}:{source}:{snapped_lat:.6f}:{snapped_lon:.6f}"
+
+    def ttl(self, source: str) -> int:
+        """TTL in seconds for a climate source"""
+        setting_name, default_hours = SOURCE_TTL_SETTINGS[source]
+        return int(getattr(settings, setting_name, default_hours) * 3600)
+
+    def get(self, source: str, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response for a source near the given coordinates
+
+        Returns:
+            Cached response dictionary or None on a miss
+        """
+        if self.ttl(source) <= 0:
+            return None
+
+        value = self.backend.get(self.make_key(source, lat, lon))
+        with self._lock:
+            if value is None:
+                self.misses[source] += 1
+            else:
+                self.hits[source] += 1
+        return value
+
+    def set(self, source: str, lat: float, lon: float, value: Dict[str, Any]) -> None:
+        """Store a successful source response for the coordinate grid cell"""
+        ttl = self.ttl(source)
+        if ttl > 0:
+            self.backend.set(self.make_key(source, lat, lon), value, ttl)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters for the cache"""
+        with self._lock:
+            return {
+                'backend': type(self.backend).__name__,
+                'grid_degrees': self.grid_degrees,
+                'entries': self.backend.entries,
+                'evictions': self.backend.evictions,
+                'sources': {
+                    source: {
+                        'hits': self.hits[source],
+                        'misses': self.misses[source],
+                        'ttl_seconds': self.ttl(source),
+                    }
+                    for source in SOURCE_TTL_SETTINGS
+                },
+            }
+
+
+_climate_cache = None
+_climate_cache_lock = threading.Lock()
+
+
+def get_climate_cache() -> ClimateCache:
+    """Return the process-wide climate cache configured from settings"""
+    global _climate_cache
+    if _climate_cache is None:
+        with _climate_cache_lock:
+            if _climate_cache is None:
+                backend_name = getattr(settings, 'CLIMATE_CACHE_BACKEND', 'local')
+                if backend_name == 'django':
+                    backend = DjangoCacheBackend(getattr(settings, 'CLIMATE_CACHE_ALIAS', 'default'))
+                elif backend_name == 'local':
+                    backend = LocalLRUBackend(getattr(settings, 'CLIMATE_CACHE_MAX_ENTRIES', 1024))
+                else:
+                    raise ValueError(f"Unknown climate cache backend: {backend_name}")
+                _climate_cache = ClimateCache(backend)
+    return _climate_cache
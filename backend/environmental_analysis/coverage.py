@@ -0,0 +1,423 @@
+"""
+Coverage Rasters
+
+Rasterizes the features of an analysis onto a metre grid centered on the
+site and derives non-overlapping land cover metrics from it: the share
+of the site circle that is green, water or paved path, and the distance
+from every cell to the nearest green space. Overlapping polygons (a
+forest inside a park) are counted once, unlike summed feature areas.
+
+Rasters are built from the features projected to the site's local
+metric frame (see measurement), so grid distances from the center are
+geodesic. Polygons are burned with a NumPy scanline fill (edge crossings
+per row, even-odd spans, difference arrays), lines and points are
+buffered to their footprint first. Results are cached per analysis until its features
+change.
+"""
+import io
+import logging
+import math
+import struct
+import zlib
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import shapely
+from django.conf import settings
+from django.core.cache import caches
+
+from .measurement import get_measurement_engine
+from .models import SiteAnalysis
+from .summaries import get_summary
+
+logger = logging.getLogger(__name__)
+
+# Tag values (None for any value) that put a feature in a coverage class
+COVERAGE_CLASSES = {
+    'green': {
+        'leisure': {'park', 'garden', 'nature_reserve', 'playground', 'recreation_ground', 'golf_course', 'pitch'},
+        'landuse': {'forest', 'grass', 'meadow', 'recreation_ground', 'village_green', 'allotments',
+                    'orchard', 'cemetery', 'flowerbed'},
+        'natural': {'wood', 'scrub', 'grassland', 'heath', 'tree', 'tree_row', 'shrubbery'},
+        'amenity': {'park', 'garden'},
+    },
+    'water': {
+        'natural': {'water', 'wetland', 'bay', 'spring'},
+        'landuse': {'reservoir', 'basin'},
+        'waterway': None,
+        'water': None,
+    },
+    'paved': {
+        'highway': {'footway', 'path', 'cycleway', 'pedestrian', 'steps', 'living_street'},
+    },
+}
+
+# Raster codes; a cell in several classes takes the one burned last
+CLASS_CODES = {'green': 1, 'water': 2, 'paved': 3}
+BURN_ORDER = ['green', 'paved', 'water']
+
+# RGBA colors of the class layer; cells outside the site circle are transparent
+CLASS_COLORS = {
+    0: (245, 245, 240, 255),
+    1: (76, 175, 80, 255),
+    2: (33, 150, 243, 255),
+    3: (158, 158, 158, 255),
+}
+
+LAYERS = ('classes', 'distance')
+
+
+def coverage_class(tags: Dict[str, Any]) -> Optional[str]:
+    """Coverage class of a feature's tags, or None when it is not classified"""
+    matched = None
+    for name in BURN_ORDER:
+        for key, values in COVERAGE_CLASSES[name].items():
+            value = tags.get(key)
+            if value is not None and (values is None or value in values):
+                matched = name
+                break
+    return matched
+
+
+class Grid:
+    """Square raster covering a site circle, row 0 at the top"""
+
+    def __init__(self, radius: float, cell_size: float):
+        self.radius = radius
+        self.cell_size = cell_size
+        self.size = int(math.ceil(2 * radius / cell_size))
+        # Half the grid width, which can exceed the radius by up to one cell
+        self.half_width = self.size * cell_size / 2
+
+    def centers(self) -> np.ndarray:
+        """Cell center offsets from the site center along one axis"""
+        return -self.half_width + self.cell_size * (np.arange(self.size) + 0.5)
+
+    def site_mask(self) -> np.ndarray:
+        """Cells whose center lies inside the site circle"""
+        centers = self.centers()
+        return centers[None, :] ** 2 + centers[::-1, None] ** 2 <= self.radius ** 2
+
+
+def burn_polygons(polygons: np.ndarray, grid: Grid) -> np.ndarray:
+    """
+    Rasterize projected (multi)polygons with a vectorized scanline fill
+
+    For every ring edge the rows whose center line it crosses are
+    expanded with np.repeat and the crossing x computed. Crossings are
+    sorted per polygon and row and paired by the even-odd rule, so holes
+    stay empty. Each span adds +1/-1 to a difference array whose row-wise
+    cumulative sum marks the cells with their center inside any polygon.
+
+    Args:
+        polygons: Projected Polygon/MultiPolygon geometries
+        grid: Target grid
+
+    Returns:
+        Boolean coverage mask
+    """
+    size, cell, half_width = grid.size, grid.cell_size, grid.half_width
+    if len(polygons) == 0:
+        return np.zeros((size, size), dtype=bool)
+
+    # Rings of each polygon, then the edges of each ring
+    parts, part_index = shapely.get_parts(polygons, return_index=True)
+    rings, ring_index = shapely.get_rings(parts, return_index=True)
+    coords, coord_index = shapely.get_coordinates(rings, return_index=True)
+    same_ring = coord_index[:-1] == coord_index[1:]
+    x0, y0 = coords[:-1, 0][same_ring], coords[:-1, 1][same_ring]
+    x1, y1 = coords[1:, 0][same_ring], coords[1:, 1][same_ring]
+    owner = part_index[ring_index[coord_index[:-1][same_ring]]]
+
+    # Rows whose center y lies in [min y, max y) of the edge; horizontal edges cross none
+    y_min, y_max = np.minimum(y0, y1), np.maximum(y0, y1)
+    first_row = np.floor((half_width - y_max) / cell - 0.5).astype(np.int64) + 1
+    last_row = np.floor((half_width - y_min) / cell - 0.5).astype(np.int64)
+    first_row = np.clip(first_row, 0, size)
+    last_row = np.clip(last_row, -1, size - 1)
+    counts = np.maximum(last_row - first_row + 1, 0)
+    if counts.sum() == 0:
+        return np.zeros((size, size), dtype=bool)
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    rows = first_row[edge] + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+    row_y = half_width - cell * (rows + 0.5)
+    crossing_x = x0[edge] + (row_y - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+
+    # Pair consecutive crossings of the same polygon and row into filled spans
+    order = np.lexsort((crossing_x, rows, owner[edge]))
+    crossing_x, rows = crossing_x[order], rows[order]
+    span_rows = rows[0::2]
+    start = np.clip(np.ceil((crossing_x[0::2] + half_width) / cell - 0.5), 0, size).astype(np.int64)
+    end = np.clip(np.ceil((crossing_x[1::2] + half_width) / cell - 0.5), 0, size).astype(np.int64)
+    filled = start < end
+
+    width = size + 1
+    length = size * width
+    difference = (
+        np.bincount(span_rows[filled] * width + start[filled], minlength=length)
+        - np.bincount(span_rows[filled] * width + end[filled], minlength=length)
+    ).reshape(size, width)
+    return np.cumsum(difference[:, :-1], axis=1) > 0
+
+
+def distance_transform(mask: np.ndarray) -> np.ndarray:
+    """
+    Exact Euclidean distance in cells from every cell to the nearest True cell
+
+    Separable: nearest True cell along each column from running index
+    maxima, then the row-wise lower envelope min((c - c')^2 + g(c')^2)
+    evaluated with broadcasting in row blocks.
+    """
+    rows, columns = mask.shape
+    if not mask.any():
+        return np.full(mask.shape, np.inf)
+
+    index = np.arange(rows, dtype=float)[:, None]
+    above = np.maximum.accumulate(np.where(mask, index, -np.inf), axis=0)
+    below = np.minimum.accumulate(np.where(mask, index, np.inf)[::-1], axis=0)[::-1]
+    column_distance = np.minimum(index - above, below - index)
+
+    offsets = (np.arange(columns)[:, None] - np.arange(columns)[None, :]).astype(float) ** 2
+    squared = np.empty(mask.shape)
+    block = max(1, 2_000_000 // (columns * columns))
+    for row in range(0, rows, block):
+        g = column_distance[row:row + block] ** 2
+        squared[row:row + block] = np.min(g[:, None, :] + offsets[None, :, :], axis=2)
+    return np.sqrt(squared)
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an RGBA uint8 image as PNG"""
+    height, width, _ = rgba.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    # Filter type 0 before every scanline
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, -1)])
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6))
+        + chunk(b'IEND', b'')
+    )
+
+
+class CoverageResult:
+    """Class raster, distance surface and the metrics derived from them"""
+
+    def __init__(self, classes: np.ndarray, distance: np.ndarray, site_mask: np.ndarray,
+                 distance_site_mask: np.ndarray, metrics: Dict[str, Any]):
+        self.classes = classes
+        self.distance = distance
+        self.site_mask = site_mask
+        self.distance_site_mask = distance_site_mask
+        self.metrics = metrics
+
+    def layer(self, name: str) -> np.ndarray:
+        """Raster of a layer, with cells outside the site set to 0 or NaN"""
+        if name == 'classes':
+            return np.where(self.site_mask, self.classes, 0).astype(np.uint8)
+        if name == 'distance':
+            return np.where(self.distance_site_mask, self.distance, np.nan).astype(np.float32)
+        raise ValueError(f"Unknown layer: {name}. Available: {', '.join(LAYERS)}")
+
+    def png(self, name: str) -> bytes:
+        """Render a layer as an RGBA PNG"""
+        if name == 'classes':
+            palette = np.zeros((256, 4), dtype=np.uint8)
+            for code, color in CLASS_COLORS.items():
+                palette[code] = color
+            rgba = palette[self.classes]
+            rgba[~self.site_mask] = 0
+            return encode_png(rgba)
+
+        distance = self.layer(name)
+        finite = np.isfinite(distance)
+        scale = float(np.nanmax(distance[finite])) if finite.any() else 1.0
+        # Green near green space fading to red far from it
+        t = np.clip(np.nan_to_num(distance / max(scale, 1.0), nan=1.0), 0, 1)
+        rgba = np.stack([
+            (60 + 180 * t), (175 - 120 * t), (80 - 30 * t), np.full(t.shape, 255.0),
+        ], axis=-1).astype(np.uint8)
+        rgba[~self.distance_site_mask] = 0
+        return encode_png(rgba)
+
+    def npy(self, name: str) -> bytes:
+        """Serialize a layer as a NumPy .npy file"""
+        buffer = io.BytesIO()
+        np.save(buffer, self.layer(name))
+        return buffer.getvalue()
+
+
+class CoverageEngine:
+    """Computes and caches coverage rasters of analyses"""
+
+    def __init__(self, cell_size_m: float = None, path_width_m: float = None,
+                 point_radius_m: float = None, distance_max_cells: int = None,
+                 cache_alias: str = None, cache_seconds: int = None):
+        self.cell_size_m = cell_size_m or getattr(settings, 'COVERAGE_CELL_SIZE_M', 5.0)
+        self.path_width_m = path_width_m or getattr(settings, 'COVERAGE_PATH_WIDTH_M', 3.0)
+        self.point_radius_m = point_radius_m or getattr(settings, 'COVERAGE_POINT_RADIUS_M', 3.0)
+        self.distance_max_cells = distance_max_cells or getattr(settings, 'COVERAGE_DISTANCE_MAX_CELLS', 200)
+        self.cache_alias = cache_alias or getattr(settings, 'COVERAGE_CACHE_ALIAS', 'default')
+        if cache_seconds is None:
+            cache_seconds = getattr(settings, 'COVERAGE_CACHE_SECONDS', 24 * 3600)
+        self.cache_seconds = cache_seconds
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_coverage(self, site_analysis: SiteAnalysis, cell_size_m: float = None) -> CoverageResult:
+        """
+        Get the coverage of an analysis, from the cache when possible
+
+        The cache key carries the time the analysis summary was last
+        updated, which changes whenever features are added or removed.
+
+        Args:
+            site_analysis: SiteAnalysis to rasterize
+            cell_size_m: Grid cell size in meters (defaults to COVERAGE_CELL_SIZE_M)
+
+        Returns:
+            CoverageResult
+
+        Raises:
+            ValueError: If the cell size is out of range
+        """
+        cell_size_m = cell_size_m or self.cell_size_m
+        max_cells = getattr(settings, 'COVERAGE_MAX_GRID_CELLS', 2000)
+        if not 0.5 <= cell_size_m <= 100:
+            raise ValueError("cell_size must be between 0.5 and 100 meters")
+        if 2 * site_analysis.analysis_radius / cell_size_m > max_cells:
+            raise ValueError(f"cell_size must be at least {2 * site_analysis.analysis_radius / max_cells:.1f} m for this radius")
+
+        summary = get_summary(site_analysis)
+        key = f"coverage:{site_analysis.id}:{summary.updated_at.timestamp()}:{cell_size_m}"
+        cached = self.cache.get(key) if self.cache_seconds > 0 else None
+        if cached is not None:
+            return cached
+
+        features = get_measurement_engine().get_features(site_analysis, summary.updated_at)
+        result = self.compute(site_analysis.analysis_radius, features.tags, features.geometries, cell_size_m)
+        if self.cache_seconds > 0:
+            self.cache.set(key, result, timeout=self.cache_seconds)
+        return result
+
+    def compute(self, radius: float, tags: Sequence[Dict[str, Any]], geometries: np.ndarray,
+                cell_size_m: float) -> CoverageResult:
+        """
+        Rasterize classified features around a site and derive the metrics
+
+        Args:
+            radius: Site radius in meters
+            tags: OSM tags of each feature
+            geometries: Feature geometries in the site's local metric frame
+            cell_size_m: Grid cell size in meters
+
+        Returns:
+            CoverageResult
+        """
+        grid = Grid(radius, cell_size_m)
+        site_mask = grid.site_mask()
+        classes = np.zeros((grid.size, grid.size), dtype=np.uint8)
+
+        feature_classes = np.array([coverage_class(feature_tags or {}) for feature_tags in tags], dtype=object)
+        classified = np.array([name is not None for name in feature_classes], dtype=bool)
+        projected = np.asarray(geometries, dtype=object)[classified]
+        feature_classes = feature_classes[classified]
+
+        masks = {}
+        for name in BURN_ORDER:
+            footprints = self.footprints(projected[feature_classes == name])
+            masks[name] = burn_polygons(footprints, grid)
+            # Later classes take the cells they share with earlier ones
+            classes[masks[name]] = CLASS_CODES[name]
+
+        distance, distance_site_mask, distance_cell = self.green_distance(masks['green'], site_mask, grid)
+        metrics = self.metrics(classes, site_mask, distance, distance_site_mask, grid, distance_cell)
+        return CoverageResult(classes, distance, site_mask, distance_site_mask, metrics)
+
+    def footprints(self, geometries: np.ndarray) -> np.ndarray:
+        """Polygons covered by features: lines and points are buffered to their width"""
+        if len(geometries) == 0:
+            return geometries
+        dimensions = shapely.get_dimensions(geometries)
+        widths = np.select(
+            [dimensions == 0, dimensions == 1], [self.point_radius_m, self.path_width_m / 2], default=0.0
+        )
+        buffered = np.where(dimensions < 2, shapely.buffer(geometries, widths, quad_segs=4), geometries)
+        return buffered[~shapely.is_empty(buffered)]
+
+    def green_distance(self, green: np.ndarray, site_mask: np.ndarray, grid: Grid):
+        """
+        Distance surface to the nearest green cell, in meters
+
+        Large grids are reduced to at most distance_max_cells per side first;
+        a block counts as green when any of its cells is.
+
+        Returns:
+            (distance raster, its site mask, its cell size in meters)
+        """
+        factor = max(1, math.ceil(grid.size / self.distance_max_cells))
+        if factor > 1:
+            padded = math.ceil(grid.size / factor) * factor
+            pad = padded - grid.size
+            blocks = padded // factor
+            green = np.pad(green, ((0, pad), (0, pad))).reshape(blocks, factor, blocks, factor).any(axis=(1, 3))
+            site_mask = np.pad(site_mask, ((0, pad), (0, pad))).reshape(blocks, factor, blocks, factor).any(axis=(1, 3))
+        distance_cell = grid.cell_size * factor
+        return distance_transform(green) * distance_cell, site_mask, distance_cell
+
+    def metrics(self, classes: np.ndarray, site_mask: np.ndarray,
+                distance: np.ndarray, distance_site_mask: np.ndarray, grid: Grid,
+                distance_cell: float) -> Dict[str, Any]:
+        cell_area = grid.cell_size ** 2
+        site_cells = int(site_mask.sum())
+        site_classes = classes[site_mask]
+
+        coverage = {}
+        for name, code in CLASS_CODES.items():
+            cells = int((site_classes == code).sum())
+            coverage[name] = {
+                'fraction': round(cells / site_cells, 4) if site_cells else 0.0,
+                'area_sqm': round(cells * cell_area, 1),
+            }
+        covered = int((site_classes > 0).sum())
+
+        site_distance = distance[distance_site_mask]
+        finite = site_distance[np.isfinite(site_distance)]
+        access_m = getattr(settings, 'COVERAGE_GREEN_ACCESS_M', 300)
+        distance_metrics = None
+        if finite.size:
+            distance_metrics = {
+                'cell_size_m': distance_cell,
+                'mean_m': round(float(finite.mean()), 1),
+                'median_m': round(float(np.median(finite)), 1),
+                'p90_m': round(float(np.percentile(finite, 90)), 1),
+                'max_m': round(float(finite.max()), 1),
+                f'share_within_{access_m:g}m': round(float((finite <= access_m).mean()), 4),
+            }
+
+        return {
+            'cell_size_m': grid.cell_size,
+            'grid_size': grid.size,
+            'site_area_sqm': round(site_cells * cell_area, 1),
+            'covered_fraction': round(covered / site_cells, 4) if site_cells else 0.0,
+            'classes': coverage,
+            'distance_to_green': distance_metrics,
+        }
+
+
+_coverage_engine = None
+
+
+def get_coverage_engine() -> CoverageEngine:
+    """Return the process-wide coverage engine configured from settings"""
+    global _coverage_engine
+    if _coverage_engine is None:
+        _coverage_engine = CoverageEngine()
+    return _coverage_engine
+
@@ -0,0 +1,175 @@
+"""
+Analysis Exporters
+
+Produces analysis exports straight from the EnvironmentalFeature queryset:
+streamed (optionally gzipped) GeoJSON, FlatGeobuf with a spatial index
+and GeoParquet with OSM tags as columns.
+"""
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from typing import Any, Iterator, Optional
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsGeoJSON, AsWKB
+from django.http import FileResponse, StreamingHttpResponse
+
+from .models import SiteAnalysis
+
+# Export format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'geojson': ('application/geo+json', 'geojson'),
+    'geojson.gz': ('application/gzip', 'geojson.gz'),
+    'fgb': ('application/octet-stream', 'fgb'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+FORMAT_ALIASES = {
+    'flatgeobuf': 'fgb',
+    'geoparquet': 'parquet',
+    'geojson-gz': 'geojson.gz',
+}
+
+
+def stream_geojson(site_analysis: SiteAnalysis, chunk_size: int = None) -> Iterator[str]:
+    """
+    Stream an analysis as a GeoJSON FeatureCollection
+
+    PostGIS serializes each geometry to GeoJSON and rows are read through a
+    server-side cursor, so no geometry is parsed or held in Python.
+
+    Args:
+        site_analysis: SiteAnalysis to export
+        chunk_size: Rows fetched per round trip (defaults to EXPORT_CHUNK_SIZE)
+
+    Yields:
+        Pieces of the GeoJSON document
+    """
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    rows = (
+        site_analysis.features
+        .annotate(geometry_json=AsGeoJSON('geometry'))
+        .values_list('osm_id', 'feature_type', 'osm_feature__tags', 'geometry_json')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    buffer = []
+    for osm_id, feature_type, properties, geometry_json in rows:
+        properties = {
+            **properties,
+            'feature_type': feature_type,
+            'analysis_id': site_analysis.id,
+        }
+        buffer.append(
+            f'{separator}{{"type": "Feature", "id": {osm_id}, '
+            f'"properties": {json.dumps(properties)}, "geometry": {geometry_json}}}'
+        )
+        separator = ', '
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+    yield ']}'
+
+
+def stream_geojson_gzip(site_analysis: SiteAnalysis, chunk_size: int = None) -> Iterator[bytes]:
+    """Stream an analysis as gzip-compressed GeoJSON"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for piece in stream_geojson(site_analysis, chunk_size):
+        data = compressor.compress(piece.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def tag_text(value: Any) -> Optional[str]:
+    """Tag value as text; values that are not strings are written as JSON"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def features_frame(site_analysis: SiteAnalysis) -> gpd.GeoDataFrame:
+    """
+    Load the features of an analysis as a GeoDataFrame with tags as columns
+
+    Geometries are read as WKB and decoded in one vectorized call.
+    """
+    rows = list(
+        site_analysis.features
+        .annotate(geometry_wkb=AsWKB('geometry'))
+        .values_list('osm_id', 'feature_type', 'osm_feature__tags', 'geometry_wkb')
+        .iterator(chunk_size=getattr(settings, 'EXPORT_CHUNK_SIZE', 2000))
+    )
+    osm_ids, feature_types, properties, geometries = zip(*rows) if rows else ((), (), (), ())
+
+    # OSM tags are strings; JSON text for any other value keeps columns typed
+    # for columnar formats without writing Python reprs
+    records = [{key: tag_text(value) for key, value in record.items()} for record in properties]
+    tags = pd.DataFrame.from_records(records, index=range(len(rows))).astype('string')
+    tags = tags.drop(columns=[col for col in ('osm_id', 'feature_type') if col in tags.columns])
+    tags.insert(0, 'osm_id', pd.array(osm_ids, dtype='Int64'))
+    tags.insert(1, 'feature_type', pd.array(feature_types, dtype='string'))
+
+    return gpd.GeoDataFrame(
+        tags,
+        geometry=shapely.from_wkb([bytes(wkb) for wkb in geometries]),
+        crs='EPSG:4326',
+    )
+
+
+def write_flatgeobuf(site_analysis: SiteAnalysis, path: str) -> None:
+    """Write an analysis as FlatGeobuf with a packed Hilbert R-tree index"""
+    features_frame(site_analysis).to_file(path, driver='FlatGeobuf', engine='pyogrio', SPATIAL_INDEX='YES')
+
+
+def write_geoparquet(site_analysis: SiteAnalysis, path: str) -> None:
+    """Write an analysis as GeoParquet with OSM tags as columns"""
+    features_frame(site_analysis).to_parquet(path, compression='zstd')
+
+
+def normalize_format(format: str) -> str:
+    format = format.lower()
+    return FORMAT_ALIASES.get(format, format)
+
+
+def export_response(site_analysis: SiteAnalysis, format: str):
+    """
+    Build the HTTP response exporting an analysis in a supported format
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    format = normalize_format(format)
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Format '{format}' not supported. Available: {', '.join(EXPORT_FORMATS)}")
+
+    content_type, extension = EXPORT_FORMATS[format]
+    filename = f"analysis_{site_analysis.id}.{extension}"
+
+    if format == 'geojson':
+        return StreamingHttpResponse(stream_geojson(site_analysis), content_type=content_type)
+
+    if format == 'geojson.gz':
+        response = StreamingHttpResponse(stream_geojson_gzip(site_analysis), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    # Binary formats are written to a temporary file, unlinked as soon as it is open
+    writer = write_flatgeobuf if format == 'fgb' else write_geoparquet
+    directory = tempfile.mkdtemp(prefix='export-')
+    try:
+        path = os.path.join(directory, filename)
+        writer(site_analysis, path)
+        output = open(path, 'rb')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return FileResponse(output, content_type=content_type, as_attachment=True, filename=filename)
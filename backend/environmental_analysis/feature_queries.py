@@ -0,0 +1,304 @@
+"""
+Feature Queries
+
+Pages through the features of an analysis for the features endpoint, or
+across analyses for tag searches: keyset pagination on id, field
+projection, bbox and JSONB tag filtering and optional simplification,
+with geometries serialized to GeoJSON by PostGIS and spliced into the
+response without being parsed in Python. Also holds the geography
+expressions used to measure features in square meters.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.db.models.functions import AsGeoJSON, GeomOutputGeoFunc
+from django.contrib.gis.geos import Polygon
+from django.db.models import F, FloatField, Func, Q, QuerySet, Value
+from django.db.models.functions import Cos, Radians
+
+from .models import EnvironmentalFeature, SiteAnalysis
+
+FEATURE_FIELDS = ('id', 'feature_type', 'osm_id', 'properties', 'geometry')
+
+# Approximate meters per degree of latitude, used to turn a simplify tolerance into SRID units
+METERS_PER_DEGREE = 111_320
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    function = 'ST_SimplifyPreserveTopology'
+
+
+class Scale(GeomOutputGeoFunc):
+    function = 'ST_Scale'
+
+
+def simplify_meters(geometry: str, tolerance_m: float, latitude: Any) -> Scale:
+    """
+    Expression simplifying a geometry with a tolerance in meters
+
+    A degree of longitude is cos(latitude) times shorter than a degree of
+    latitude, so longitudes are scaled by cos(latitude) before the
+    simplification and back after it, making the tolerance the same in
+    both directions near the given latitude.
+
+    Args:
+        geometry: Name of the geometry field
+        tolerance_m: Simplification tolerance in meters
+        latitude: Expression of the latitude in degrees, e.g. of the site
+    """
+    scale = Cos(Radians(latitude))
+    stretched = Scale(geometry, scale, Value(1.0))
+    simplified = SimplifyPreserveTopology(stretched, Value(tolerance_m / METERS_PER_DEGREE))
+    return Scale(simplified, Value(1.0) / scale, Value(1.0))
+
+
+class Geography(Func):
+    """Cast a geometry to geography for measurements in meters"""
+    template = '(%(expressions)s)::geography'
+    output_field = GeometryField(srid=4326, geography=True)
+
+
+class GeographyArea(Func):
+    """Geodesic area in square meters"""
+    function = 'ST_Area'
+    output_field = FloatField()
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Parse a comma-separated field projection
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return list(FEATURE_FIELDS)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in FEATURE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(FEATURE_FIELDS)}")
+    # The id is the pagination cursor, so it is always returned
+    return ['id'] + [field for field in FEATURE_FIELDS if field in requested and field != 'id']
+
+
+def parse_bbox(bbox: str) -> Polygon:
+    """
+    Parse a 'min_lon,min_lat,max_lon,max_lat' bounding box
+
+    Raises:
+        ValueError: If the bounding box is malformed
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(','))
+    except ValueError:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise ValueError("bbox minimums must be smaller than its maximums")
+    polygon = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+    polygon.srid = 4326
+    return polygon
+
+
+def parse_tag_filter(tags: str, field: str = 'osm_feature__tags') -> Q:
+    """
+    Compile a tag filter to JSONB lookups served by the tags GIN index
+
+    Clauses are separated by semicolons and must all match: 'key' requires
+    the tag, 'key=value' requires that value (JSONB containment) and
+    'key=[a,b]' accepts any of the listed values, e.g.
+    'leisure=park;name' or 'natural=[water,wetland]'.
+
+    Args:
+        tags: Tag filter expression
+        field: Path of the tags JSON field from the filtered model
+
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    condition = Q()
+    required = {}
+    clauses = [clause.strip() for clause in tags.split(';') if clause.strip()]
+    if not clauses:
+        raise ValueError("tags must contain at least one key, key=value or key=[values] clause")
+
+    for clause in clauses:
+        key, separator, value = (part.strip() for part in clause.partition('='))
+        if not key:
+            raise ValueError(f"Tag clause '{clause}' has no key")
+        if not separator:
+            condition &= Q(**{f'{field}__has_key': key})
+        elif value.startswith('[') and value.endswith(']'):
+            values = [item.strip() for item in value[1:-1].split(',') if item.strip()]
+            if not values:
+                raise ValueError(f"Tag clause '{clause}' lists no values")
+            any_value = Q()
+            for item in values:
+                any_value |= Q(**{f'{field}__contains': {key: item}})
+            condition &= any_value
+        elif value:
+            if required.get(key, value) != value:
+                raise ValueError(f"Tag '{key}' cannot equal both '{required[key]}' and '{value}'")
+            required[key] = value
+        else:
+            raise ValueError(f"Tag clause '{clause}' has no value")
+
+    if required:
+        # All key=value clauses become a single containment test
+        condition &= Q(**{f'{field}__contains': required})
+    return condition
+
+
+def filter_features(features: QuerySet, after: Optional[int] = None,
+                    feature_type: Optional[str] = None, bbox: Optional[str] = None,
+                    tags: Optional[str] = None) -> QuerySet:
+    """
+    Apply the cursor and filters shared by the feature listings
+
+    Raises:
+        ValueError: If a filter is invalid
+    """
+    features = features.order_by('id')
+    if after is not None:
+        features = features.filter(id__gt=after)
+    if feature_type:
+        features = features.filter(feature_type=feature_type)
+    if bbox:
+        features = features.filter(geometry__intersects=parse_bbox(bbox))
+    if tags:
+        features = features.filter(parse_tag_filter(tags))
+    return features
+
+
+def features_page(site_analysis: SiteAnalysis, after: Optional[int] = None,
+                  limit: Optional[int] = None, fields: Optional[str] = None,
+                  feature_type: Optional[str] = None, bbox: Optional[str] = None,
+                  simplify: Optional[float] = None, precision: Optional[int] = None,
+                  tags: Optional[str] = None) -> str:
+    """
+    Render one page of an analysis' features as a JSON document
+
+    Args:
+        site_analysis: SiteAnalysis whose features are listed
+        after: Return features with an id greater than this cursor
+        limit: Page size (defaults to FEATURES_PAGE_SIZE, capped at FEATURES_MAX_PAGE_SIZE)
+        fields: Comma-separated fields to return
+        feature_type: Only return features of this type
+        bbox: Only return features intersecting 'min_lon,min_lat,max_lon,max_lat'
+        simplify: Simplification tolerance in meters
+        precision: Decimal places of the GeoJSON coordinates
+        tags: Only return features matching this tag filter (see parse_tag_filter)
+
+    Returns:
+        JSON document with the features and the cursor of the next page
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    features = filter_features(site_analysis.features.all(), after, feature_type, bbox, tags)
+    header = {'analysis_id': site_analysis.id, 'feature_type': feature_type}
+    return render_page(features, header, limit, fields, simplify, precision)
+
+
+def search_features(tags: str, analysis_ids: Optional[List[int]] = None,
+                    last: Optional[int] = None, after: Optional[int] = None,
+                    limit: Optional[int] = None, fields: Optional[str] = None,
+                    feature_type: Optional[str] = None, bbox: Optional[str] = None,
+                    simplify: Optional[float] = None, precision: Optional[int] = None) -> str:
+    """
+    Render one page of the features matching a tag filter across analyses
+
+    Searches the given analyses, or the most recent ones when no ids are
+    given. Each feature carries the id of its analysis.
+
+    Args:
+        tags: Tag filter (see parse_tag_filter)
+        analysis_ids: Analyses to search
+        last: Number of most recent analyses to search when no ids are given
+            (defaults to and is capped at FEATURES_SEARCH_MAX_ANALYSES)
+
+    Other arguments are as for features_page.
+
+    Returns:
+        JSON document with the features and the cursor of the next page
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    max_analyses = getattr(settings, 'FEATURES_SEARCH_MAX_ANALYSES', 100)
+    if not tags:
+        raise ValueError("tags is required")
+    if analysis_ids:
+        if len(analysis_ids) > max_analyses:
+            raise ValueError(f"At most {max_analyses} analyses can be searched at once")
+        analyses = list(analysis_ids)
+    else:
+        last = last or max_analyses
+        if not 1 <= last <= max_analyses:
+            raise ValueError(f"last must be between 1 and {max_analyses}")
+        analyses = list(SiteAnalysis.objects.order_by('-created_at').values_list('id', flat=True)[:last])
+
+    features = filter_features(
+        EnvironmentalFeature.objects.filter(site_analysis_id__in=analyses), after, feature_type, bbox, tags
+    )
+    header = {'tags': tags, 'analysis_ids': analyses, 'feature_type': feature_type}
+    return render_page(features, header, limit, fields, simplify, precision,
+                       analysis_id=F('site_analysis_id'))
+
+
+def render_page(features: QuerySet, header: Dict[str, Any], limit: Optional[int],
+                fields: Optional[str], simplify: Optional[float], precision: Optional[int],
+                **extra_columns) -> str:
+    """
+    Project, serialize and paginate a filtered feature queryset
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    max_limit = getattr(settings, 'FEATURES_MAX_PAGE_SIZE', 5000)
+    limit = limit or getattr(settings, 'FEATURES_PAGE_SIZE', 500)
+    if not 1 <= limit <= max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+    if precision is not None and not 0 <= precision <= 15:
+        raise ValueError("precision must be between 0 and 15")
+    if simplify is not None and simplify < 0:
+        raise ValueError("simplify must not be negative")
+
+    selected = parse_fields(fields)
+    columns = [field for field in selected if field not in ('properties', 'geometry')]
+    expressions = dict(extra_columns)
+    if 'properties' in selected:
+        # Tags live on the shared OSM feature row
+        expressions['properties'] = F('osm_feature__tags')
+    if 'geometry' in selected:
+        geometry = 'geometry'
+        if simplify:
+            # Simplified in meters at the latitude of each feature's site
+            site_latitude = Func('site_analysis__location', function='ST_Y', output_field=FloatField())
+            geometry = simplify_meters('geometry', simplify, site_latitude)
+        features = features.annotate(
+            geometry_json=AsGeoJSON(geometry, precision=8 if precision is None else precision)
+        )
+        columns.append('geometry_json')
+
+    # One extra row tells whether another page follows
+    rows = list(features.values(*columns, **expressions)[:limit + 1])
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    rows = rows[:limit]
+
+    items = [render_feature(row) for row in rows]
+    header_json = ''.join(f'{json.dumps(key)}: {json.dumps(value)}, ' for key, value in header.items())
+    return (
+        f'{{{header_json}"features": [{", ".join(items)}], "count": {len(items)}, '
+        f'"next_cursor": {json.dumps(next_cursor)}}}'
+    )
+
+
+def render_feature(row: Dict[str, Any]) -> str:
+    """Serialize a feature row, splicing in the GeoJSON rendered by PostGIS"""
+    geometry_json = row.pop('geometry_json', False)
+    item = json.dumps(row)
+    if geometry_json is False:
+        return item
+    return f'{item[:-1]}, "geometry": {geometry_json or "null"}}}'
@@ -0,0 +1,100 @@
+"""
+OSM Feature Sources
+
+Pluggable backends that supply tag-filtered OSM features around a point
+as an OSMnx-style GeoDataFrame. EnvironmentalAnalysisService selects one
+through the OSM_FEATURE_SOURCE setting.
+"""
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+import geopandas as gpd
+import osmnx as ox
+from django.conf import settings
+from django.db import connection
+
+from .osm_extract import matches_tags
+from .tile_store import OSMTileStore, rows_to_gdf
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureSource(ABC):
+    """Interface for backends supplying OSM features around a point"""
+
+    @abstractmethod
+    def get_features(self, latitude: float, longitude: float, radius: int,
+                     tags: Dict[str, Any]) -> gpd.GeoDataFrame:
+        """
+        Get the features matching tags within radius of a point
+
+        Args:
+            latitude: Center point latitude
+            longitude: Center point longitude
+            radius: Search radius in meters
+            tags: OSMnx-style tag filters
+
+        Returns:
+            GeoDataFrame indexed by (element, id), with one column per tag
+        """
+
+
+class OverpassFeatureSource(FeatureSource):
+    """Queries the Overpass API through OSMnx for every request"""
+
+    def get_features(self, latitude, longitude, radius, tags):
+        return ox.features_from_point((latitude, longitude), tags=tags, dist=radius)
+
+
+class TileStoreFeatureSource(FeatureSource):
+    """Answers requests from the local tiled feature store"""
+
+    def get_features(self, latitude, longitude, radius, tags):
+        return OSMTileStore(tags=tags).get_features(latitude, longitude, radius)
+
+
+class ExtractFeatureSource(FeatureSource):
+    """
+    Queries features bulk-loaded from a local OSM extract
+
+    The staging table is tag-filtered at load time and requests need no
+    network access. Rows are filtered again by the requested tags, since
+    an extract may have been loaded with broader filters.
+    """
+
+    FEATURES_WITHIN_SQL = """
+        SELECT element_type, element_id, ST_AsBinary(geometry), tags
+        FROM environmental_analysis_osmextractfeature
+        WHERE ST_DWithin(
+            geometry::geography,
+            ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography,
+            %(radius)s
+        )
+    """
+
+    def get_features(self, latitude, longitude, radius, tags):
+        with connection.cursor() as cursor:
+            cursor.execute(self.FEATURES_WITHIN_SQL, {
+                'lat': latitude,
+                'lon': longitude,
+                'radius': radius,
+            })
+            rows = cursor.fetchall()
+        return rows_to_gdf(row for row in rows if matches_tags(row[3], tags))
+
+
+FEATURE_SOURCES = {
+    'overpass': OverpassFeatureSource,
+    'tiles': TileStoreFeatureSource,
+    'extract': ExtractFeatureSource,
+}
+
+
+def get_feature_source(name: str = None) -> FeatureSource:
+    """Instantiate a feature source by name (defaults to OSM_FEATURE_SOURCE)"""
+    name = name or getattr(settings, 'OSM_FEATURE_SOURCE', 'overpass')
+    try:
+        return FEATURE_SOURCES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown OSM feature source: {name}. Available: {', '.join(FEATURE_SOURCES)}")
@@ -0,0 +1,141 @@
+"""
+Geometry Pipeline
+
+Prepares OSM geometries for storage at ingest time: clips them to the
+geodesic analysis circle and simplifies them with a topology-preserving
+tolerance in the site's local metric frame, then snaps coordinates to a
+precision grid, all as vectorized shapely operations. Reports vertex
+and byte reduction, and passes the unclipped geometry on so it can be
+stored once in the shared OSM feature table.
+"""
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import shapely
+from django.conf import settings
+
+from .measurement import local_transformer, project, site_circle
+
+logger = logging.getLogger(__name__)
+
+
+def feature_geometries(features_data: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Decode the unprocessed geometries of feature dictionaries
+
+    Features reused from a prior analysis carry their stored, already
+    clipped and simplified geometry next to the unclipped original; the
+    original is used so the pipeline never runs twice on the same shape.
+    """
+    geometries = []
+    for feature in features_data:
+        wkb = feature.get('original_geometry_wkb') or feature.get('geometry_wkb')
+        geometries.append(shapely.from_wkb(wkb) if wkb else shapely.from_wkt(feature['geometry_wkt']))
+    return np.array(geometries, dtype=object)
+
+
+class GeometryPipeline:
+    """Clip, simplify and snap feature geometries before they are stored"""
+
+    def __init__(self, clip: bool = None, simplify_tolerance_m: float = None,
+                 grid_size_degrees: float = None):
+        self.clip = getattr(settings, 'GEOMETRY_CLIP_TO_SITE', True) if clip is None else clip
+        if simplify_tolerance_m is None:
+            simplify_tolerance_m = getattr(settings, 'GEOMETRY_SIMPLIFY_TOLERANCE_M', 1.0)
+        self.simplify_tolerance_m = simplify_tolerance_m
+        if grid_size_degrees is None:
+            grid_size_degrees = getattr(settings, 'GEOMETRY_GRID_SIZE_DEGREES', 1e-6)
+        self.grid_size_degrees = grid_size_degrees
+
+    def run(self, geometries: np.ndarray, latitude: float, longitude: float,
+            radius: int) -> np.ndarray:
+        """
+        Apply the pipeline to an array of shapely geometries
+
+        Returns:
+            Processed geometries; features outside the circle become empty
+        """
+        # Overlay operations fail on invalid OSM polygons (e.g. self-intersections)
+        valid = shapely.is_valid(geometries)
+        if not valid.all():
+            geometries = np.where(valid, geometries, shapely.make_valid(geometries))
+        if self.clip or self.simplify_tolerance_m > 0:
+            # Clip and simplify in meters, one transform each way
+            transformer = local_transformer(latitude, longitude)
+            geometries = project(geometries, transformer)
+            if self.clip:
+                circle = site_circle(radius)
+                shapely.prepare(circle)
+                # Only features crossing the boundary need the overlay; the rest are kept or dropped as is
+                inside = shapely.contains(circle, geometries)
+                crossing = ~inside & shapely.intersects(circle, geometries)
+                clipped = np.full(len(geometries), shapely.Polygon(), dtype=object)
+                clipped[inside] = geometries[inside]
+                clipped[crossing] = shapely.intersection(geometries[crossing], circle)
+                geometries = clipped
+            if self.simplify_tolerance_m > 0:
+                geometries = shapely.simplify(geometries, self.simplify_tolerance_m, preserve_topology=True)
+            geometries = project(geometries, transformer, inverse=True)
+        if self.grid_size_degrees > 0:
+            geometries = shapely.set_precision(geometries, self.grid_size_degrees)
+        return geometries
+
+    def process_features(self, features_data: List[Dict[str, Any]], latitude: float,
+                         longitude: float, radius: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run the pipeline over feature dictionaries
+
+        Args:
+            features_data: Feature dictionaries as returned by extract_osm_features
+            latitude: Site latitude
+            longitude: Site longitude
+            radius: Analysis radius in meters
+
+        Returns:
+            (processed feature dictionaries, reduction stats); each dictionary
+            keeps its unclipped geometry as original_geometry_wkb
+        """
+        if not features_data:
+            return [], self.stats(np.array([], dtype=object), np.array([], dtype=object))
+
+        originals = feature_geometries(features_data)
+        processed = self.run(originals, latitude, longitude, radius)
+        processed_wkb = shapely.to_wkb(processed, hex=True)
+
+        features = []
+        for feature, original, geometry, wkb in zip(features_data, originals, processed, processed_wkb):
+            if shapely.is_empty(geometry):
+                continue
+            processed_feature = {
+                **feature,
+                'geometry_wkb': wkb,
+                'original_geometry_wkb': feature.get('original_geometry_wkb') or shapely.to_wkb(original, hex=True),
+            }
+            processed_feature.pop('geometry_wkt', None)
+            features.append(processed_feature)
+
+        stats = self.stats(originals, processed)
+        logger.info(
+            f"Geometry pipeline: {stats['vertices_before']} -> {stats['vertices_after']} vertices, "
+            f"{stats['bytes_before']} -> {stats['bytes_after']} bytes, "
+            f"{stats['features_dropped']} features outside the site dropped"
+        )
+        return features, stats
+
+    def stats(self, before: np.ndarray, after: np.ndarray) -> Dict[str, Any]:
+        """Vertex and WKB byte counts before and after the pipeline"""
+        kept = after[~shapely.is_empty(after)]
+        vertices_before = int(shapely.get_num_coordinates(before).sum())
+        vertices_after = int(shapely.get_num_coordinates(kept).sum())
+        bytes_before = sum(len(wkb) for wkb in shapely.to_wkb(before))
+        bytes_after = sum(len(wkb) for wkb in shapely.to_wkb(kept))
+        return {
+            'vertices_before': vertices_before,
+            'vertices_after': vertices_after,
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'vertex_reduction': round(1 - vertices_after / vertices_before, 4) if vertices_before else 0.0,
+            'byte_reduction': round(1 - bytes_after / bytes_before, 4) if bytes_before else 0.0,
+            'features_dropped': len(after) - len(kept),
+        }
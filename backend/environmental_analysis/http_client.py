@@ -0,0 +1,114 @@
+"""
+Shared Async HTTP Client
+
+Runs a dedicated event loop thread that owns one pooled aiohttp session,
+so synchronous Django code can issue concurrent upstream requests and
+reuse connections across requests without creating a loop per call.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHTTPClient:
+    """Background event loop with a shared, pooled aiohttp session"""
+
+    def __init__(self, pool_size: int = 20, pool_size_per_host: int = 10):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='async-http-client',
+                    daemon=True,
+                )
+                self._thread.start()
+            return self._loop
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared session, creating it on first use
+
+        Must be awaited from coroutines running on the client loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the client loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the client loop and block for its result
+
+        The coroutine is cancelled if it does not finish within timeout.
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(self, coro: Awaitable[Any]) -> Any:
+        """Await a coroutine on the client loop from another event loop"""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self) -> None:
+        """Close the shared session and stop the loop thread"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def _close_session():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_session(), loop).result(5)
+        except Exception as e:
+            logger.warning(f"Error closing HTTP session: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(5)
+        loop.close()
+        self._session = None
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> AsyncHTTPClient:
+    """Return the process-wide async HTTP client configured from settings"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = AsyncHTTPClient(
+                    pool_size=getattr(settings, 'HTTP_CLIENT_POOL_SIZE', 20),
+                    pool_size_per_host=getattr(settings, 'HTTP_CLIENT_POOL_SIZE_PER_HOST', 10),
+                )
+    return _http_client
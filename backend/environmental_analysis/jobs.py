@@ -0,0 +1,233 @@
+"""
+Analysis Job Queue
+
+Runs site analyses in the background on a bounded in-process worker pool.
+Jobs are stored in the database, so any web worker can report their status,
+and identical in-flight requests are deduplicated onto a single job.
+"""
+import hashlib
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AnalysisJob
+from .services import EnvironmentalAnalysisService
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds the maximum number of jobs"""
+
+
+def make_request_key(latitude: float, longitude: float, radius: int,
+                     site_name: Optional[str] = None) -> str:
+    """Hash analysis parameters into a deduplication key"""
+    raw = f"{latitude:.6f}:{longitude:.6f}:{radius}:{site_name or ''}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class QueueSlot:
+    """
+    Queue capacity reserved for a job until its row commits
+
+    The slot is handed to the worker pool from an on_commit callback that
+    is its only reference. When the transaction rolls back Django discards
+    the callback, and the slot is released as it is garbage collected.
+    """
+
+    def __init__(self, queue: 'AnalysisJobQueue'):
+        self._release = weakref.finalize(self, queue._release)
+
+    def release(self) -> None:
+        self._release()
+
+    def claim(self) -> None:
+        """Keep the slot for a started job, which releases it when it finishes"""
+        self._release.detach()
+
+
+class AnalysisJobQueue:
+    """Bounded in-process worker pool for background site analyses"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 50,
+                 stale_after: timedelta = timedelta(minutes=30)):
+        self.max_pending = max_pending
+        self.stale_after = stale_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._outstanding = 0
+        self._lock = threading.Lock()
+        self._progress_lock = threading.Lock()
+
+    def submit(self, latitude: float, longitude: float, radius: int = 500,
+               site_name: Optional[str] = None) -> Tuple[AnalysisJob, bool]:
+        """
+        Queue a site analysis, reusing an identical in-flight job if there is one
+
+        Args:
+            latitude: Site latitude
+            longitude: Site longitude
+            radius: Analysis radius in meters
+            site_name: Optional name for the site
+
+        Returns:
+            Tuple of (job, created)
+
+        Raises:
+            JobQueueFull: If this process already has max_pending outstanding jobs
+        """
+        self.expire_stale_jobs()
+        request_key = make_request_key(latitude, longitude, radius, site_name)
+
+        existing = self._active_job(request_key)
+        if existing:
+            return existing, False
+
+        # Checked and taken together, so concurrent submits cannot overfill the queue
+        with self._lock:
+            if self._outstanding >= self.max_pending:
+                raise JobQueueFull(f"Analysis queue is full ({self.max_pending} jobs)")
+            self._outstanding += 1
+        slot = QueueSlot(self)
+
+        try:
+            with transaction.atomic():
+                job = AnalysisJob.objects.create(
+                    request_key=request_key,
+                    latitude=latitude,
+                    longitude=longitude,
+                    radius=radius,
+                    site_name=site_name,
+                    progress={
+                        stage: {'status': 'pending'}
+                        for stage in EnvironmentalAnalysisService.ANALYSIS_STAGES
+                    },
+                )
+        except IntegrityError:
+            slot.release()
+            # Another request created the same job concurrently
+            existing = self._active_job(request_key)
+            if existing:
+                return existing, False
+            raise
+        except Exception:
+            slot.release()
+            raise
+
+        # Jobs start once their row is committed; a job created inside an
+        # outer transaction that rolls back gives its slot back instead
+        transaction.on_commit(lambda: self._start(job.pk, slot))
+        logger.info(f"Queued analysis job {job.id}")
+        return job, True
+
+    def expire_stale_jobs(self) -> int:
+        """Fail active jobs older than stale_after, e.g. left by a dead worker"""
+        cutoff = timezone.now() - self.stale_after
+        return AnalysisJob.objects.filter(
+            status__in=AnalysisJob.ACTIVE_STATUSES,
+            created_at__lt=cutoff,
+        ).update(
+            status=AnalysisJob.STATUS_FAILED,
+            error="Job expired before completion",
+            finished_at=timezone.now(),
+        )
+
+    def _active_job(self, request_key: str) -> Optional[AnalysisJob]:
+        return AnalysisJob.objects.filter(
+            request_key=request_key,
+            status__in=AnalysisJob.ACTIVE_STATUSES,
+        ).first()
+
+    def _start(self, job_id: int, slot: QueueSlot) -> None:
+        """Hand a committed job to the worker pool"""
+        try:
+            self.executor.submit(self._run, job_id)
+        except Exception:
+            slot.release()
+            raise
+        slot.claim()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._outstanding -= 1
+
+    def _run(self, job_id: int) -> None:
+        """Execute a queued job on a worker thread"""
+        try:
+            job = AnalysisJob.objects.get(pk=job_id)
+            job.status = AnalysisJob.STATUS_RUNNING
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'started_at'])
+
+            progress = dict(job.progress)
+
+            def record_progress(stage, status, duration):
+                self._record_progress(job_id, progress, stage, status, duration)
+
+            service = EnvironmentalAnalysisService()
+            site_analysis = service.analyze_site(
+                latitude=job.latitude,
+                longitude=job.longitude,
+                radius=job.radius,
+                site_name=job.site_name,
+                progress_callback=record_progress,
+            )
+
+            AnalysisJob.objects.filter(pk=job_id).update(
+                status=AnalysisJob.STATUS_COMPLETED,
+                site_analysis=site_analysis,
+                current_stage='',
+                finished_at=timezone.now(),
+            )
+            logger.info(f"Analysis job {job_id} completed with site analysis {site_analysis.id}")
+
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {str(e)}")
+            AnalysisJob.objects.filter(pk=job_id).update(
+                status=AnalysisJob.STATUS_FAILED,
+                error=str(e),
+                finished_at=timezone.now(),
+            )
+        finally:
+            self._release()
+            close_old_connections()
+
+    def _record_progress(self, job_id: int, progress: dict, stage: str,
+                         status: str, duration: Optional[float]) -> None:
+        """Persist a stage transition; stages report from several threads"""
+        try:
+            with self._progress_lock:
+                progress[stage] = {'status': status}
+                if duration is not None:
+                    progress[stage]['duration'] = duration
+                AnalysisJob.objects.filter(pk=job_id).update(
+                    progress=dict(progress),
+                    current_stage=stage,
+                )
+        except Exception as e:
+            logger.warning(f"Error recording progress for job {job_id}: {str(e)}")
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> AnalysisJobQueue:
+    """Return the process-wide analysis job queue configured from settings"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = AnalysisJobQueue(
+                    max_workers=getattr(settings, 'ANALYSIS_JOB_WORKERS', 2),
+                    max_pending=getattr(settings, 'ANALYSIS_JOB_MAX_PENDING', 50),
+                    stale_after=timedelta(minutes=getattr(settings, 'ANALYSIS_JOB_STALE_MINUTES', 30)),
+                )
+    return _job_queue
@@ -0,0 +1,35 @@
+"""
+Analyze a portfolio of sites from a CSV or JSON file
+
+Runs the same batch pipeline as POST /analyze/batch and prints one JSON
+progress event per line.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from environmental_analysis.batch import BatchAnalysisService, parse_sites_csv, validate_sites
+
+
+class Command(BaseCommand):
+    help = "Analyze sites listed in a CSV (latitude, longitude, radius, name) or JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .json file of sites")
+        parser.add_argument('--workers', type=int, default=None, help="Worker pool size")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path) as f:
+                if path.endswith('.json'):
+                    sites = json.load(f)
+                else:
+                    sites = parse_sites_csv(f.read())
+            sites = validate_sites(sites)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        service = BatchAnalysisService(max_workers=options['workers'])
+        for event in service.run(sites):
+            self.stdout.write(json.dumps(event))
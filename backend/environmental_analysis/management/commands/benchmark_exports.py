@@ -0,0 +1,97 @@
+"""
+Benchmark analysis exports
+
+Times and sizes each export format for a stored analysis, alongside the
+original export that built the whole GeoJSON document as Python dicts.
+"""
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from environmental_analysis import exporters
+from environmental_analysis.models import SiteAnalysis
+
+
+class Command(BaseCommand):
+    help = "Benchmark export size and time for each export format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'analysis_id', nargs='?', type=int,
+            help="Analysis to export (defaults to the one with the most features)"
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Runs per format; the best time is reported"
+        )
+
+    def handle(self, *args, **options):
+        site_analysis = self.get_analysis(options['analysis_id'])
+        feature_count = site_analysis.features.count()
+        self.stdout.write(f"Analysis {site_analysis.id}: {feature_count} features")
+
+        runs = [
+            ('geojson (dicts)', lambda path: self.write_text(path, self.legacy_geojson(site_analysis))),
+            ('geojson', lambda path: self.write_text(path, ''.join(exporters.stream_geojson(site_analysis)))),
+            ('geojson.gz', lambda path: self.write_bytes(path, b''.join(exporters.stream_geojson_gzip(site_analysis)))),
+            ('fgb', lambda path: exporters.write_flatgeobuf(site_analysis, path)),
+            ('parquet', lambda path: exporters.write_geoparquet(site_analysis, path)),
+        ]
+
+        self.stdout.write(f"{'format':<16} {'time (s)':>10} {'size (KiB)':>12}")
+        with tempfile.TemporaryDirectory(prefix='export-benchmark-') as directory:
+            for index, (name, export) in enumerate(runs):
+                path = os.path.join(directory, f"{index}.out")
+                best = float('inf')
+                for _ in range(options['repeat']):
+                    if os.path.exists(path):
+                        os.remove(path)
+                    start = time.perf_counter()
+                    export(path)
+                    best = min(best, time.perf_counter() - start)
+                size = os.path.getsize(path) / 1024
+                self.stdout.write(f"{name:<16} {best:>10.3f} {size:>12.1f}")
+
+    def get_analysis(self, analysis_id: int) -> SiteAnalysis:
+        if analysis_id is not None:
+            try:
+                return SiteAnalysis.objects.get(id=analysis_id)
+            except SiteAnalysis.DoesNotExist:
+                raise CommandError(f"Analysis {analysis_id} does not exist")
+
+        site_analysis = (
+            SiteAnalysis.objects.annotate(feature_count=Count('features'))
+            .order_by('-feature_count')
+            .first()
+        )
+        if site_analysis is None:
+            raise CommandError("No analyses to export")
+        return site_analysis
+
+    def legacy_geojson(self, site_analysis: SiteAnalysis) -> str:
+        """The original export: parse every geometry and build the document in memory"""
+        features = []
+        for feature in site_analysis.features.select_related('osm_feature'):
+            features.append({
+                "type": "Feature",
+                "id": feature.osm_id,
+                "properties": {
+                    **feature.osm_feature.tags,
+                    "feature_type": feature.feature_type,
+                    "analysis_id": site_analysis.id,
+                },
+                "geometry": json.loads(feature.geometry.geojson),
+            })
+        return json.dumps({"type": "FeatureCollection", "features": features})
+
+    def write_text(self, path: str, text: str) -> None:
+        with open(path, 'w') as output:
+            output.write(text)
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        with open(path, 'wb') as output:
+            output.write(data)
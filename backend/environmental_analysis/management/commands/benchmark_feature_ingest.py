@@ -0,0 +1,107 @@
+"""
+Benchmark feature ingest
+
+Times storing the same synthetic analyses through the COPY staging path
+and the ORM bulk_create path, each in a transaction that is rolled back,
+and reports rows per second.
+"""
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from environmental_analysis.models import SiteAnalysis
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class Command(BaseCommand):
+    help = "Benchmark COPY vs ORM feature ingest throughput"
+
+    CENTER = (12.97, 77.59)
+    TAG_VALUES = {
+        'landuse': ['forest', 'grass', 'cemetery'],
+        'natural': ['water', 'tree', 'scrub'],
+        'leisure': ['park', 'playground'],
+        'highway': ['footway', 'path', 'cycleway'],
+        'name': ['North Park', 'River Walk', 'Old Wood'],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1000, 10000, 50000],
+            help="Features per analysis to benchmark"
+        )
+        parser.add_argument('--analyses', type=int, default=1, help="Analyses ingested together per run")
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Runs per size and method; the best time is reported"
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("The COPY path needs PostgreSQL")
+
+        service = EnvironmentalAnalysisService(feature_source=None)
+        rng = np.random.default_rng(options['seed'])
+
+        self.stdout.write(f"{'features':>10} {'orm (rows/s)':>14} {'copy (rows/s)':>14} {'speedup':>9}")
+        for size in options['sizes']:
+            features_data = service.process_osm_features(self.build_gdf(size, rng))
+            rates = {}
+            for method in ('orm', 'copy'):
+                best = min(
+                    self.time_ingest(service, features_data, options['analyses'], method)
+                    for _ in range(options['repeat'])
+                )
+                rates[method] = len(features_data) * options['analyses'] / best
+            self.stdout.write(
+                f"{size:>10} {rates['orm']:>14.0f} {rates['copy']:>14.0f} "
+                f"{rates['copy'] / rates['orm']:>8.1f}x"
+            )
+
+    def time_ingest(self, service: EnvironmentalAnalysisService, features_data, analyses: int,
+                    method: str) -> float:
+        """Ingest the features into fresh analyses and return the elapsed time"""
+        with transaction.atomic(), override_settings(FEATURE_INGEST_METHOD=method):
+            analysis_features = []
+            for number in range(analyses):
+                site_analysis = SiteAnalysis.objects.create(
+                    name=f"Ingest benchmark {number}",
+                    location=Point(self.CENTER[1], self.CENTER[0], srid=4326),
+                    analysis_radius=2000,
+                )
+                processed, _ = service.process_feature_geometries(site_analysis, features_data)
+                analysis_features.append((site_analysis, processed))
+
+            start = time.perf_counter()
+            service.ingest_features(analysis_features)
+            elapsed = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+        return elapsed
+
+    def build_gdf(self, size: int, rng: np.random.Generator) -> gpd.GeoDataFrame:
+        """Build a GeoDataFrame shaped like OSMnx features_from_point output"""
+        data = {}
+        for tag, values in self.TAG_VALUES.items():
+            present = rng.random(size) < 0.3
+            data[tag] = np.where(present, rng.choice(values, size), None)
+
+        x = self.CENTER[1] + rng.uniform(-0.01, 0.01, size)
+        y = self.CENTER[0] + rng.uniform(-0.01, 0.01, size)
+        boxes = shapely.box(x, y, x + 0.0002, y + 0.0002)
+        points = shapely.points(x, y)
+        geometry = np.where(rng.random(size) < 0.7, boxes, points)
+
+        index = pd.MultiIndex.from_arrays(
+            [rng.choice(['node', 'way', 'relation'], size), np.arange(1, size + 1)],
+            names=['element', 'id'],
+        )
+        return gpd.GeoDataFrame(data, geometry=geometry, index=index, crs='EPSG:4326')
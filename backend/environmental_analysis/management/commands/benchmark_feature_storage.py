@@ -0,0 +1,146 @@
+"""
+Benchmark shared OSM feature storage
+
+Ingests many analyses of overlapping urban sites drawn from one synthetic
+city through the regular save path, then reports ingest throughput and
+the storage taken by the shared OSMFeature rows and the per-analysis
+links, next to what storing tags and unclipped geometry on every link
+would take. Runs in a transaction that is rolled back unless --keep.
+"""
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from environmental_analysis.models import SiteAnalysis
+from environmental_analysis.reuse import bbox_from_point
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class Command(BaseCommand):
+    help = "Benchmark ingest throughput and storage of the shared OSM feature table"
+
+    CENTER = (12.97, 77.59)
+    TAGS = [
+        {'leisure': 'park', 'name': 'Park'},
+        {'landuse': 'grass'},
+        {'natural': 'tree'},
+        {'natural': 'water', 'name': 'Lake'},
+        {'highway': 'footway', 'surface': 'paved'},
+        {'landuse': 'forest', 'name': 'Wood'},
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyses', type=int, default=10000, help="Number of analyses to ingest")
+        parser.add_argument('--city-features', type=int, default=50000, help="OSM elements in the synthetic city")
+        parser.add_argument('--city-km', type=float, default=10.0, help="Width of the city in kilometers")
+        parser.add_argument('--radius', type=int, default=500, help="Analysis radius in meters")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help="Commit the benchmark data instead of rolling back")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        city = self.build_city(options['city_features'], options['city_km'], rng)
+        service = EnvironmentalAnalysisService(feature_source=None)
+        half_extent = options['city_km'] * 1000 / 2 / 111_320
+
+        with transaction.atomic():
+            before = self.table_sizes()
+            links = 0
+            start = time.perf_counter()
+            for number in range(options['analyses']):
+                latitude = self.CENTER[0] + rng.uniform(-half_extent, half_extent)
+                longitude = self.CENTER[1] + rng.uniform(-half_extent, half_extent)
+                features_data = self.features_around(service, city, latitude, longitude, options['radius'])
+
+                site_analysis = SiteAnalysis.objects.create(
+                    name=f"Benchmark site {number}",
+                    location=Point(longitude, latitude, srid=4326),
+                    analysis_radius=options['radius'],
+                )
+                service.save_features_to_db(site_analysis, features_data)
+                links += len(features_data)
+
+                if (number + 1) % 1000 == 0:
+                    self.stdout.write(f"{number + 1} analyses ingested")
+            elapsed = time.perf_counter() - start
+
+            after = self.table_sizes()
+            self.report(options['analyses'], links, elapsed, before, after)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def build_city(self, size: int, city_km: float, rng: np.random.Generator) -> gpd.GeoDataFrame:
+        """Synthetic OSMnx-shaped city of parks, trees, paths and water bodies"""
+        half_extent = city_km * 1000 / 2 / 111_320
+        x = self.CENTER[1] + rng.uniform(-half_extent, half_extent, size)
+        y = self.CENTER[0] + rng.uniform(-half_extent, half_extent, size)
+        kinds = rng.choice(len(self.TAGS), size)
+
+        # Points for trees, lines for paths, polygons of varied size for areas
+        extents = rng.uniform(0.0002, 0.004, size)
+        geometry = np.where(
+            kinds == 2, shapely.points(x, y),
+            np.where(
+                kinds == 4,
+                shapely.linestrings(np.stack([np.stack([x, y], 1), np.stack([x + extents, y + extents], 1)], 1)),
+                shapely.box(x, y, x + extents, y + extents),
+            ),
+        )
+
+        data = {}
+        for kind, tags in enumerate(self.TAGS):
+            for key, value in tags.items():
+                column = data.setdefault(key, np.full(size, None, dtype=object))
+                column[kinds == kind] = value
+
+        element_types = np.where(kinds == 2, 'node', np.where(kinds == 3, 'relation', 'way'))
+        index = pd.MultiIndex.from_arrays([element_types, np.arange(1, size + 1)], names=['element', 'id'])
+        return gpd.GeoDataFrame(data, geometry=geometry, index=index, crs='EPSG:4326')
+
+    def features_around(self, service: EnvironmentalAnalysisService, city: gpd.GeoDataFrame,
+                        latitude: float, longitude: float, radius: int):
+        """Features a download around the site would return"""
+        site_box = shapely.box(*bbox_from_point(latitude, longitude, radius).extent)
+        positions = city.sindex.query(site_box, predicate='intersects')
+        return service.process_osm_features(city.iloc[positions])
+
+    def table_sizes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT pg_total_relation_size('environmental_analysis_environmentalfeature'),
+                       pg_total_relation_size('environmental_analysis_osmfeature')
+            """)
+            return cursor.fetchone()
+
+    def report(self, analyses: int, links: int, elapsed: float, before, after) -> None:
+        link_bytes = after[0] - before[0]
+        shared_bytes = after[1] - before[1]
+        with connection.cursor() as cursor:
+            # Tags and unclipped geometry once per element vs once per link
+            cursor.execute("""
+                SELECT COUNT(DISTINCT o.id),
+                       SUM(pg_column_size(o.tags) + pg_column_size(o.geometry))
+                FROM environmental_analysis_environmentalfeature f
+                JOIN environmental_analysis_osmfeature o ON o.id = f.osm_feature_id
+                WHERE f.site_analysis_id IN (
+                    SELECT id FROM environmental_analysis_siteanalysis WHERE name LIKE %s
+                )
+            """, ['Benchmark site %'])
+            elements, denormalized_bytes = cursor.fetchone()
+
+        mib = 1024 * 1024
+        self.stdout.write(f"Analyses ingested:        {analyses}")
+        self.stdout.write(f"Feature links:            {links}")
+        self.stdout.write(f"Shared OSM elements:      {elements}")
+        self.stdout.write(f"Ingest time:              {elapsed:.1f} s")
+        self.stdout.write(f"Throughput:               {analyses / elapsed:.1f} analyses/s, {links / elapsed:.0f} links/s")
+        self.stdout.write(f"Link table growth:        {link_bytes / mib:.1f} MiB")
+        self.stdout.write(f"Shared table growth:      {shared_bytes / mib:.1f} MiB")
+        self.stdout.write(f"Tags + geometry per link: {(denormalized_bytes or 0) / mib:.1f} MiB if stored on every link")
@@ -0,0 +1,114 @@
+"""
+Benchmark OSM feature processing
+
+Compares the per-row iterrows loop against the columnar
+process_osm_features path on synthetic OSMnx-shaped GeoDataFrames.
+"""
+import time
+from typing import Any, Dict, List
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from django.core.management.base import BaseCommand
+
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class Command(BaseCommand):
+    help = "Benchmark row-wise vs columnar OSM feature processing"
+
+    TAG_VALUES = {
+        'landuse': ['forest', 'grass', 'cemetery'],
+        'natural': ['water', 'tree', 'scrub'],
+        'leisure': ['park', 'playground'],
+        'amenity': ['park', 'playground', 'garden'],
+        'highway': ['footway', 'path', 'cycleway'],
+        'name': ['North Park', 'River Walk', 'Old Wood'],
+        'surface': ['asphalt', 'gravel', 'grass'],
+        'access': ['yes', 'permissive', 'private'],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1000, 10000, 50000],
+            help="Numbers of synthetic features to benchmark"
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Runs per size; the best time is reported"
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        service = EnvironmentalAnalysisService()
+        rng = np.random.default_rng(options['seed'])
+
+        self.stdout.write(f"{'features':>10} {'iterrows (s)':>14} {'columnar (s)':>14} {'speedup':>9}")
+        for size in options['sizes']:
+            gdf = self.build_gdf(size, rng)
+
+            loop_time, loop_features = self.time_best(
+                lambda: self.process_row_wise(service, gdf), options['repeat']
+            )
+            columnar_time, columnar_features = self.time_best(
+                lambda: service.process_osm_features(gdf), options['repeat']
+            )
+
+            self.check_equivalent(loop_features, columnar_features)
+            self.stdout.write(
+                f"{size:>10} {loop_time:>14.3f} {columnar_time:>14.3f} "
+                f"{loop_time / columnar_time:>8.1f}x"
+            )
+
+    def build_gdf(self, size: int, rng: np.random.Generator) -> gpd.GeoDataFrame:
+        """Build a GeoDataFrame shaped like OSMnx features_from_point output"""
+        # Sparse tag columns, as in real OSM extracts
+        data = {}
+        for tag, values in self.TAG_VALUES.items():
+            present = rng.random(size) < 0.3
+            data[tag] = np.where(present, rng.choice(values, size), None)
+
+        # Mix of small polygons and points around a site centre
+        x = 77.59 + rng.uniform(-0.01, 0.01, size)
+        y = 12.97 + rng.uniform(-0.01, 0.01, size)
+        boxes = shapely.box(x, y, x + 0.0002, y + 0.0002)
+        points = shapely.points(x, y)
+        geometry = np.where(rng.random(size) < 0.7, boxes, points)
+
+        index = pd.MultiIndex.from_arrays(
+            [rng.choice(['node', 'way', 'relation'], size), np.arange(1, size + 1)],
+            names=['element', 'id'],
+        )
+        return gpd.GeoDataFrame(data, geometry=geometry, index=index, crs='EPSG:4326')
+
+    def process_row_wise(self, service: EnvironmentalAnalysisService,
+                         gdf: gpd.GeoDataFrame) -> List[Dict[str, Any]]:
+        """The original per-row processing loop"""
+        features = []
+        for idx, row in gdf.iterrows():
+            feature_data = service.process_osm_feature(row, idx)
+            if feature_data:
+                features.append(feature_data)
+        return features
+
+    def time_best(self, func, repeat: int):
+        best, result = float('inf'), None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    def check_equivalent(self, loop_features: List[Dict[str, Any]],
+                         columnar_features: List[Dict[str, Any]]) -> None:
+        """Verify both paths produce the same feature records"""
+        assert len(loop_features) == len(columnar_features), "Feature counts differ"
+        for expected, actual in zip(loop_features, columnar_features):
+            assert expected['osm_id'] == actual['osm_id']
+            assert expected['feature_type'] == actual['feature_type']
+            assert expected['properties'] == actual['properties']
+            assert shapely.from_wkt(expected['geometry_wkt']).equals_exact(
+                shapely.from_wkb(actual['geometry_wkb']), 0
+            )
@@ -0,0 +1,182 @@
+"""
+Benchmark analysis queries against the index plan
+
+Seeds synthetic analyses, then runs the hot read queries (feature pages
+filtered by type, per-type summaries, export scans, covering-analysis
+lookups, nearest features and tag filters) with the query indexes in
+place and again with them dropped, printing the EXPLAIN plan and best
+time of each. Everything runs in a transaction that is rolled back.
+"""
+import time
+from datetime import timedelta
+from typing import Any, List, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from environmental_analysis.models import EnvironmentalFeature, OSMFeature, SiteAnalysis
+from environmental_analysis.reuse import AnalysisReuseEngine
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+# Indexes added for these queries, dropped for the baseline run
+QUERY_INDEXES = [
+    'feature_analysis_type_idx',
+    'osm_feature_tags_gin_idx',
+    'site_location_geography_idx',
+    'feature_analysis_knn_idx',
+]
+
+
+class Command(BaseCommand):
+    help = "Report EXPLAIN plans and timings of hot queries with and without the query indexes"
+
+    CENTER = (12.97, 77.59)
+    TAG_VALUES = {
+        'landuse': ['forest', 'grass', 'cemetery'],
+        'natural': ['water', 'tree', 'scrub'],
+        'leisure': ['park', 'playground'],
+        'highway': ['footway', 'path', 'cycleway'],
+        'name': ['North Park', 'River Walk', 'Old Wood'],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyses', type=int, default=200, help="Synthetic analyses to seed")
+        parser.add_argument('--features', type=int, default=2000, help="Features per analysis")
+        parser.add_argument('--spread-km', type=float, default=50.0, help="Width of the area analyses are spread over")
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Runs per query; the best time is reported"
+        )
+        parser.add_argument('--plans', action='store_true', help="Print full EXPLAIN ANALYZE plans, not just scans")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("The query benchmark needs PostgreSQL")
+
+        rng = np.random.default_rng(options['seed'])
+        with transaction.atomic():
+            target = self.seed(options['analyses'], options['features'], options['spread_km'], rng)
+            self.stdout.write(f"Seeded {options['analyses']} analyses x {options['features']} features")
+
+            queries = self.queries(target)
+            with_indexes = self.measure(queries, options['repeat'], options['plans'], "with query indexes")
+
+            with connection.cursor() as cursor:
+                for name in QUERY_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+                cursor.execute("ANALYZE")
+            without_indexes = self.measure(queries, options['repeat'], options['plans'], "without query indexes")
+
+            self.stdout.write(f"\n{'query':<24} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>9}")
+            for name, _, _ in queries:
+                before, after = without_indexes[name], with_indexes[name]
+                self.stdout.write(f"{name:<24} {before:>12.2f} {after:>12.2f} {before / after:>8.1f}x")
+
+            transaction.set_rollback(True)
+
+    def seed(self, analyses: int, features: int, spread_km: float,
+             rng: np.random.Generator) -> SiteAnalysis:
+        """Store synthetic analyses and return one to query"""
+        service = EnvironmentalAnalysisService(feature_source=None)
+        half_extent = spread_km * 1000 / 2 / 111_320
+
+        analysis_features = []
+        for number in range(analyses):
+            latitude = self.CENTER[0] + rng.uniform(-half_extent, half_extent)
+            longitude = self.CENTER[1] + rng.uniform(-half_extent, half_extent)
+            site_analysis = SiteAnalysis.objects.create(
+                name=f"Query benchmark {number}",
+                location=Point(longitude, latitude, srid=4326),
+                analysis_radius=int(rng.choice([500, 1000, 2000])),
+            )
+            features_data = service.process_osm_features(
+                self.build_gdf(features, latitude, longitude, number * features, rng)
+            )
+            processed, _ = service.process_feature_geometries(site_analysis, features_data)
+            analysis_features.append((site_analysis, processed))
+        service.ingest_features(analysis_features)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return analysis_features[len(analysis_features) // 2][0]
+
+    def build_gdf(self, size: int, latitude: float, longitude: float, first_id: int,
+                  rng: np.random.Generator) -> gpd.GeoDataFrame:
+        """OSMnx-shaped features scattered over a site"""
+        data = {}
+        for tag, values in self.TAG_VALUES.items():
+            present = rng.random(size) < 0.3
+            data[tag] = np.where(present, rng.choice(values, size), None)
+
+        x = longitude + rng.uniform(-0.01, 0.01, size)
+        y = latitude + rng.uniform(-0.01, 0.01, size)
+        geometry = np.where(
+            rng.random(size) < 0.7, shapely.box(x, y, x + 0.0002, y + 0.0002), shapely.points(x, y)
+        )
+        index = pd.MultiIndex.from_arrays(
+            [np.full(size, 'way'), np.arange(first_id + 1, first_id + size + 1)],
+            names=['element', 'id'],
+        )
+        return gpd.GeoDataFrame(data, geometry=geometry, index=index, crs='EPSG:4326')
+
+    def queries(self, target: SiteAnalysis) -> List[Tuple[str, str, Any]]:
+        """(name, SQL, params) of the queries the API runs"""
+        features = target.features
+        querysets = [
+            ('features page by type', features.filter(feature_type='natural').order_by('id')[:500]),
+            ('summary by type', features.order_by().values('feature_type').annotate(count=Count('id'))),
+            ('export scan', features.order_by('id').values_list('osm_id', 'feature_type', 'osm_feature__tags')),
+            ('tag containment', OSMFeature.objects.filter(tags__contains={'leisure': 'park'}).values('id')),
+            ('nearest by type', features.filter(feature_type='natural').order_by(
+                GeometryDistance('geometry', target.location)
+            ).values('id')[:5]),
+            ('tag key across analyses', EnvironmentalFeature.objects.filter(
+                osm_feature__tags__has_key='name', site_analysis__analysis_radius__gte=1000
+            ).values('id')),
+        ]
+        queries = [(name, *queryset.query.sql_with_params()) for name, queryset in querysets]
+
+        # The covering lookup of analysis reuse, with its own SQL
+        queries.append((
+            'covering analysis',
+            AnalysisReuseEngine.COVERING_ANALYSIS_SQL,
+            {
+                'fresh_after': timezone.now() - timedelta(days=1),
+                'radius': 200,
+                'lat': target.location.y,
+                'lon': target.location.x,
+            },
+        ))
+        return queries
+
+    def measure(self, queries: List[Tuple[str, str, Any]], repeat: int, plans: bool, label: str):
+        """Print each query plan and return the best time per query in milliseconds"""
+        self.stdout.write(f"\n== {label} ==")
+        timings = {}
+        with connection.cursor() as cursor:
+            for name, sql, params in queries:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                plan = [row[0] for row in cursor.fetchall()]
+                self.stdout.write(f"-- {name}")
+                if not plans:
+                    # Scan nodes show which index, if any, the planner picked
+                    plan = [line for line in plan if 'Scan' in line or 'Execution Time' in line]
+                self.stdout.write('\n'.join(plan))
+
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    best = min(best, time.perf_counter() - start)
+                timings[name] = best * 1000
+        return timings
@@ -0,0 +1,38 @@
+"""
+Load a local OSM extract into the staging table
+
+Used with OSM_FEATURE_SOURCE='extract' so that per-site analyses of a
+region query PostGIS instead of Overpass.
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from environmental_analysis.osm_extract import OSMExtractLoader
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a .osm.pbf or .osm extract into the OSM extract staging table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .osm.pbf or .osm extract")
+        parser.add_argument('--name', default=None, help="Extract name (defaults to the file name)")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert")
+        parser.add_argument(
+            '--append', action='store_true',
+            help="Keep rows previously loaded under the same name"
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"Extract not found: {path}")
+
+        loader = OSMExtractLoader(
+            EnvironmentalAnalysisService.TAG_FILTERS,
+            batch_size=options['batch_size'],
+        )
+        count = loader.load(path, extract_name=options['name'], replace=not options['append'])
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {count} features from {path}"))
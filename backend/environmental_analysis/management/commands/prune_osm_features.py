@@ -0,0 +1,30 @@
+"""
+Delete stored OSM elements that no analysis references
+
+Shared OSM elements outlive the analyses that linked them; run this
+periodically to reclaim their rows.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class Command(BaseCommand):
+    help = "Delete OSM elements no longer linked to any analysis"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help="Only delete elements not updated for this many hours"
+        )
+
+    def handle(self, *args, **options):
+        if options['min_age_hours'] < 0:
+            raise CommandError("--min-age-hours must not be negative")
+
+        service = EnvironmentalAnalysisService()
+        deleted = service.delete_unreferenced_osm_features(timedelta(hours=options['min_age_hours']))
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unreferenced OSM elements"))
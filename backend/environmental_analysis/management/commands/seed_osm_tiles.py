@@ -0,0 +1,46 @@
+"""
+Seed the OSM tile store from a local extract
+
+Lets the tile store (and analyses using it) run offline, e.g. in tests
+or for a region prepared in advance.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from environmental_analysis.osm_extract import read_osm_extract
+from environmental_analysis.services import EnvironmentalAnalysisService
+from environmental_analysis.tile_store import OSMTileStore, rows_to_gdf
+
+
+class Command(BaseCommand):
+    help = "Seed OSM tiles from a local .osm.pbf or .osm extract"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .osm.pbf or .osm extract")
+        parser.add_argument('--zoom', type=int, default=None, help="Tile zoom (defaults to OSM_TILE_ZOOM)")
+        parser.add_argument(
+            '--ttl-hours', type=float, default=0,
+            help="Hours until seeded tiles expire; 0 keeps them indefinitely"
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not path.endswith(('.osm', '.pbf')):
+            raise CommandError("Only .osm.pbf and .osm extracts are supported")
+
+        tags = EnvironmentalAnalysisService.TAG_FILTERS
+        rows = []
+        read_osm_extract(path, tags, rows.extend)
+        gdf = rows_to_gdf(rows)
+        if gdf.empty:
+            self.stdout.write(self.style.WARNING("No matching features in extract"))
+            return
+
+        store = OSMTileStore(tags=tags, zoom=options['zoom'])
+        ttl = timedelta(hours=options['ttl_hours']) if options['ttl_hours'] else None
+        tile_count = store.seed_from_gdf(gdf, ttl=ttl)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {tile_count} tiles at zoom {store.zoom} with {len(gdf)} features"
+        ))
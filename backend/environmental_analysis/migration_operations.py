@@ -0,0 +1,61 @@
+"""
+Migration Operations
+
+Indexes, extensions and data conversions written for PostgreSQL (PostGIS)
+are wrapped in PostgreSQLOnly, so the same migrations also build a
+SpatiaLite database for development and testing. Other databases are
+migrated from empty, so skipping the data conversions loses no rows.
+"""
+from django.db.migrations.operations.base import Operation
+
+
+class PostgreSQLOnly(Operation):
+    """
+    Apply the database changes of an operation on PostgreSQL only
+
+    The project state is updated on every database, so later migrations
+    and the models see the same schema history everywhere.
+    """
+
+    def __init__(self, operation: Operation):
+        self.operation = operation
+
+    @property
+    def reversible(self) -> bool:
+        return self.operation.reversible
+
+    @property
+    def reduces_to_sql(self) -> bool:
+        return self.operation.reduces_to_sql
+
+    @property
+    def atomic(self) -> bool:
+        return self.operation.atomic
+
+    @property
+    def category(self):
+        return self.operation.category
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def references_model(self, name, app_label):
+        return self.operation.references_model(name, app_label)
+
+    def references_field(self, model_name, name, app_label):
+        return self.operation.references_field(model_name, name, app_label)
+
+    def describe(self) -> str:
+        return f"{self.operation.describe()} (PostgreSQL only)"
+
+    @property
+    def migration_name_fragment(self):
+        return self.operation.migration_name_fragment
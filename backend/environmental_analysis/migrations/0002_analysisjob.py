@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-17 20:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_key', models.CharField(help_text='Hash of the analysis parameters', max_length=64)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('radius', models.IntegerField(default=500, help_text='Analysis radius in meters')),
+                ('site_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('current_stage', models.CharField(blank=True, default='', max_length=20)),
+                ('progress', models.JSONField(default=dict, help_text='Per-stage status and timings')),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('site_analysis', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='environmental_analysis.siteanalysis')),
+            ],
+            options={
+                'verbose_name': 'Analysis Job',
+                'verbose_name_plural': 'Analysis Jobs',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='environment_status_3a8881_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('request_key',), name='unique_active_analysis_job')],
+            },
+        ),
+    ]
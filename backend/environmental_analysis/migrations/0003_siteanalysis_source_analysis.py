@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 20:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0002_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteanalysis',
+            name='source_analysis',
+            field=models.ForeignKey(blank=True, help_text='Covering analysis whose features were reused instead of querying OSM', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='derived_analyses', to='environmental_analysis.siteanalysis'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-17 20:30
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0003_siteanalysis_source_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OSMTile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('fetched_at', models.DateTimeField(help_text='When the tile features were downloaded or seeded')),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Tile is refetched after this time; empty means never', null=True)),
+                ('feature_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'OSM Tile',
+                'verbose_name_plural': 'OSM Tiles',
+                'unique_together': {('zoom', 'x', 'y')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OSMTileFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('element_type', models.CharField(help_text='OSM element type (node, way, relation)', max_length=10)),
+                ('element_id', models.BigIntegerField(help_text='OSM element ID')),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(help_text='Feature geometry', srid=4326)),
+                ('tags', models.JSONField(default=dict, help_text='OSM tags')),
+                ('tile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='features', to='environmental_analysis.osmtile')),
+            ],
+            options={
+                'unique_together': {('tile', 'element_type', 'element_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 20:32
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0004_osm_tile_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OSMExtractFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('extract_name', models.CharField(db_index=True, help_text='Extract file the feature was loaded from', max_length=200)),
+                ('element_type', models.CharField(help_text='OSM element type (node, way, relation)', max_length=10)),
+                ('element_id', models.BigIntegerField(help_text='OSM element ID')),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(help_text='Feature geometry', srid=4326)),
+                ('tags', models.JSONField(default=dict, help_text='OSM tags')),
+                ('loaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'OSM Extract Feature',
+                'verbose_name_plural': 'OSM Extract Features',
+                'unique_together': {('element_type', 'element_id')},
+            },
+        ),
+        # ST_DWithin on geography casts needs a matching expression index
+        PostgreSQLOnly(migrations.RunSQL(
+            sql="CREATE INDEX osmextractfeature_geog_idx ON environmental_analysis_osmextractfeature USING GIST ((geometry::geography));",
+            reverse_sql="DROP INDEX IF EXISTS osmextractfeature_geog_idx;",
+        )),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-17 20:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0005_osmextractfeature'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_features', models.IntegerField(default=0)),
+                ('total_area_sqm', models.FloatField(default=0, help_text='Geodesic area of all features')),
+                ('feature_counts', models.JSONField(default=dict, help_text='Feature count per feature type')),
+                ('area_by_type_sqm', models.JSONField(default=dict, help_text='Geodesic area per feature type')),
+                ('bbox', models.JSONField(blank=True, help_text='Feature bounding box as [min_lon, min_lat, max_lon, max_lat]', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('site_analysis', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='environmental_analysis.siteanalysis')),
+            ],
+            options={
+                'verbose_name': 'Analysis Summary',
+                'verbose_name_plural': 'Analysis Summaries',
+            },
+        ),
+    ]
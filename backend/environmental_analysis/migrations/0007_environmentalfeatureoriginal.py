@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 20:40
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0006_analysissummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnvironmentalFeatureOriginal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('osm_id', models.BigIntegerField(help_text='OpenStreetMap ID')),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(help_text='Geometry before clipping and simplification', srid=4326)),
+                ('site_analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='original_geometries', to='environmental_analysis.siteanalysis')),
+            ],
+            options={
+                'unique_together': {('site_analysis', 'osm_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+ORIGINAL_TABLE = 'environmental_analysis_environmentalfeatureoriginal'
+FEATURE_TABLE = 'environmental_analysis_environmentalfeature'
+
+# Link features to their per-analysis originals, then collapse identical originals into one row
+SHARE_ORIGINALS_SQL = f"""
+    -- Check foreign keys per statement so the ALTER TABLEs below see no pending trigger events
+    SET CONSTRAINTS ALL IMMEDIATE;
+
+    UPDATE {ORIGINAL_TABLE}
+    SET geometry_hash = encode(sha256(ST_AsBinary(geometry)), 'hex');
+
+    UPDATE {FEATURE_TABLE} f
+    SET original_id = o.id
+    FROM {ORIGINAL_TABLE} o
+    WHERE f.site_analysis_id = o.site_analysis_id AND f.osm_id = o.osm_id;
+
+    CREATE TEMPORARY TABLE original_duplicates ON COMMIT DROP AS
+    SELECT id, keep_id FROM (
+        SELECT id, MIN(id) OVER (PARTITION BY osm_id, geometry_hash) AS keep_id
+        FROM {ORIGINAL_TABLE}
+    ) ranked
+    WHERE id <> keep_id;
+
+    UPDATE {FEATURE_TABLE} f
+    SET original_id = d.keep_id
+    FROM original_duplicates d
+    WHERE f.original_id = d.id;
+
+    DELETE FROM {ORIGINAL_TABLE} WHERE id IN (SELECT id FROM original_duplicates);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0007_environmentalfeatureoriginal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='environmentalfeatureoriginal',
+            name='geometry_hash',
+            field=models.CharField(default='', help_text='SHA-256 of the geometry WKB', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='environmentalfeature',
+            name='original',
+            field=models.ForeignKey(blank=True, help_text='Unclipped geometry, when the stored geometry was clipped or simplified', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='features', to='environmental_analysis.environmentalfeatureoriginal'),
+        ),
+        PostgreSQLOnly(migrations.RunSQL(SHARE_ORIGINALS_SQL, migrations.RunSQL.noop)),
+        migrations.AlterUniqueTogether(
+            name='environmentalfeatureoriginal',
+            unique_together={('osm_id', 'geometry_hash')},
+        ),
+        migrations.RemoveField(
+            model_name='environmentalfeatureoriginal',
+            name='site_analysis',
+        ),
+    ]
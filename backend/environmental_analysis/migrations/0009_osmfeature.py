@@ -0,0 +1,82 @@
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+FEATURE_TABLE = 'environmental_analysis_environmentalfeature'
+ORIGINAL_TABLE = 'environmental_analysis_environmentalfeatureoriginal'
+OSM_FEATURE_TABLE = 'environmental_analysis_osmfeature'
+
+# Element types were not recorded before, so existing rows are keyed by osm_id
+# alone; the latest tags win and an unclipped original is preferred as geometry
+SHARE_FEATURES_SQL = f"""
+    -- Check foreign keys per statement so the ALTER TABLEs below see no pending trigger events
+    SET CONSTRAINTS ALL IMMEDIATE;
+
+    INSERT INTO {OSM_FEATURE_TABLE} (element_type, element_id, version, tags, geometry, created_at, updated_at)
+    SELECT DISTINCT ON (f.osm_id)
+        '', f.osm_id, 0, f.properties, COALESCE(o.geometry, f.geometry), now(), now()
+    FROM {FEATURE_TABLE} f
+    LEFT JOIN {ORIGINAL_TABLE} o ON o.id = f.original_id
+    ORDER BY f.osm_id, o.id IS NULL, f.created_at DESC;
+
+    UPDATE {FEATURE_TABLE} f
+    SET osm_feature_id = s.id
+    FROM {OSM_FEATURE_TABLE} s
+    WHERE s.element_type = '' AND s.element_id = f.osm_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0008_shared_feature_originals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OSMFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('element_type', models.CharField(blank=True, choices=[('node', 'Node'), ('way', 'Way'), ('relation', 'Relation')], help_text='Blank for features stored before element types were recorded', max_length=10)),
+                ('element_id', models.BigIntegerField(help_text='OpenStreetMap element ID')),
+                ('version', models.IntegerField(default=0, help_text='OSM element version (0 when unknown)')),
+                ('tags', models.JSONField(default=dict, help_text='OSM tags and properties')),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(help_text='Unclipped feature geometry', srid=4326)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'OSM Feature',
+                'verbose_name_plural': 'OSM Features',
+                'constraints': [models.UniqueConstraint(fields=('element_type', 'element_id', 'version'), name='unique_osm_feature_version')],
+            },
+        ),
+        migrations.AddField(
+            model_name='environmentalfeature',
+            name='osm_feature',
+            field=models.ForeignKey(help_text='Shared OSM element holding the tags and unclipped geometry', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='analysis_features', to='environmental_analysis.osmfeature'),
+        ),
+        PostgreSQLOnly(migrations.RunSQL(SHARE_FEATURES_SQL, migrations.RunSQL.noop)),
+        migrations.AlterField(
+            model_name='environmentalfeature',
+            name='osm_feature',
+            field=models.ForeignKey(help_text='Shared OSM element holding the tags and unclipped geometry', on_delete=django.db.models.deletion.PROTECT, related_name='analysis_features', to='environmental_analysis.osmfeature'),
+        ),
+        migrations.AlterField(
+            model_name='environmentalfeature',
+            name='geometry',
+            field=django.contrib.gis.db.models.fields.GeometryField(help_text='Feature geometry clipped to the analysis circle', srid=4326),
+        ),
+        migrations.RemoveField(
+            model_name='environmentalfeature',
+            name='original',
+        ),
+        migrations.RemoveField(
+            model_name='environmentalfeature',
+            name='properties',
+        ),
+        migrations.DeleteModel(
+            name='EnvironmentalFeatureOriginal',
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+FEATURE_TABLE = 'environmental_analysis_environmentalfeature'
+OSM_FEATURE_TABLE = 'environmental_analysis_osmfeature'
+
+# Re-encode osm_id from the element type and id of the linked OSM element,
+# matching OSMFeature.encode_id. Elements stored before types were recorded
+# keep their osm_id, which is the only identity they have
+ENCODE_OSM_IDS_SQL = f"""
+    UPDATE {FEATURE_TABLE} f
+    SET osm_id = (
+        CASE o.element_type WHEN 'node' THEN 1 WHEN 'way' THEN 2 WHEN 'relation' THEN 3 END::bigint << 60
+    ) | o.element_id
+    FROM {OSM_FEATURE_TABLE} o
+    WHERE o.id = f.osm_feature_id
+      AND o.element_type IN ('node', 'way', 'relation');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0009_osmfeature'),
+    ]
+
+    operations = [
+        PostgreSQLOnly(migrations.RunSQL(ENCODE_OSM_IDS_SQL, migrations.RunSQL.noop)),
+        migrations.AlterField(
+            model_name='environmentalfeature',
+            name='osm_id',
+            field=models.BigIntegerField(help_text='OSM element type and ID, packed by OSMFeature.encode_id'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so ingest keeps writing to the feature tables
+    atomic = False
+
+    dependencies = [
+        ('environmental_analysis', '0010_encoded_osm_ids'),
+    ]
+
+    operations = [
+        PostgreSQLOnly(AddIndexConcurrently(
+            model_name='environmentalfeature',
+            index=models.Index(fields=['site_analysis', 'feature_type', 'id'], name='feature_analysis_type_idx'),
+        )),
+        PostgreSQLOnly(AddIndexConcurrently(
+            model_name='osmfeature',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='osm_feature_tags_gin_idx'),
+        )),
+        PostgreSQLOnly(AddIndexConcurrently(
+            model_name='siteanalysis',
+            index=django.contrib.postgres.indexes.GistIndex(models.Func('location', output_field=django.contrib.gis.db.models.fields.PointField(geography=True, srid=4326), template='(%(expressions)s)::geography'), name='site_location_geography_idx'),
+        )),
+    ]
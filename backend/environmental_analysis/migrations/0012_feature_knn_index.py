@@ -0,0 +1,22 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, BtreeGistExtension
+from django.db import migrations
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so ingest keeps writing to the feature table
+    atomic = False
+
+    dependencies = [
+        ('environmental_analysis', '0011_query_indexes'),
+    ]
+
+    operations = [
+        # GiST support for the scalar site_analysis and feature_type columns
+        PostgreSQLOnly(BtreeGistExtension()),
+        PostgreSQLOnly(AddIndexConcurrently(
+            model_name='environmentalfeature',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['site_analysis', 'feature_type', 'geometry'], name='feature_analysis_knn_idx'),
+        )),
+    ]
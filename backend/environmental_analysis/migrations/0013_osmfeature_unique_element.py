@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_element_versions(apps, schema_editor):
+    """Keep the latest stored version of each element and relink its features"""
+    OSMFeature = apps.get_model('environmental_analysis', 'OSMFeature')
+    EnvironmentalFeature = apps.get_model('environmental_analysis', 'EnvironmentalFeature')
+
+    duplicates = (
+        OSMFeature.objects.values('element_type', 'element_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for key in duplicates.iterator():
+        ids = list(
+            OSMFeature.objects.filter(element_type=key['element_type'], element_id=key['element_id'])
+            .order_by('-version', '-updated_at', '-id')
+            .values_list('id', flat=True)
+        )
+        EnvironmentalFeature.objects.filter(osm_feature_id__in=ids[1:]).update(osm_feature_id=ids[0])
+        OSMFeature.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0012_feature_knn_index'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='osmfeature',
+            name='unique_osm_feature_version',
+        ),
+        migrations.RunPython(merge_element_versions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='osmfeature',
+            constraint=models.UniqueConstraint(fields=('element_type', 'element_id'), name='unique_osm_feature'),
+        ),
+        migrations.AlterField(
+            model_name='osmfeature',
+            name='version',
+            field=models.IntegerField(default=0, help_text='Latest OSM element version stored (0 when unknown)'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_legacy_elements(apps, schema_editor):
+    """
+    Replace the osm_id copied into untyped elements with a negative sentinel
+
+    Features stored before element types were recorded had a salted hash
+    as osm_id, which 0009 copied into element_id. It identifies no OSM
+    element, so each untyped element gets minus its row id instead, which
+    no real element id can take, and its features the matching osm_id.
+    """
+    OSMFeature = apps.get_model('environmental_analysis', 'OSMFeature')
+    EnvironmentalFeature = apps.get_model('environmental_analysis', 'EnvironmentalFeature')
+
+    OSMFeature.objects.filter(element_type='').update(element_id=-F('id'))
+    EnvironmentalFeature.objects.filter(osm_feature__element_type='').update(osm_id=-F('osm_feature_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0013_osmfeature_unique_element'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_legacy_elements, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='osmfeature',
+            name='element_id',
+            field=models.BigIntegerField(help_text='OpenStreetMap element ID; minus the row id for untyped legacy elements'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environmental_analysis', '0014_legacy_element_sentinels'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='environmentalfeature',
+            name='feature_type',
+            field=models.CharField(choices=[('landuse', 'Land Use'), ('natural', 'Natural Feature'), ('leisure', 'Leisure Area'), ('highway', 'Transportation'), ('building', 'Building'), ('amenity', 'Amenity'), ('other', 'Other')], max_length=20),
+        ),
+    ]
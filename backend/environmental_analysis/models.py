@@ -1,4 +1,8 @@
+from typing import Tuple
+
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.db.models import Func
 from django.contrib.gis.geos import Point
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -11,6 +15,14 @@ class SiteAnalysis(models.Model):
         validators=[MinValueValidator(100), MaxValueValidator(2000)],
         help_text="Analysis radius in meters"
     )
+    source_analysis = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='derived_analyses',
+        help_text="Covering analysis whose features were reused instead of querying OSM"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -20,6 +32,14 @@ class SiteAnalysis(models.Model):
     class Meta:
         verbose_name = "Site Analysis"
         verbose_name_plural = "Site Analyses"
+        indexes = [
+            # Distance searches in meters cast location to geography (ST_DWithin)
+            GistIndex(
+                Func('location', template='(%(expressions)s)::geography',
+                     output_field=models.PointField(geography=True)),
+                name='site_location_geography_idx',
+            ),
+        ]
 
 class EnvironmentalFeature(models.Model):
     """Model for storing environmental features from OSM"""
@@ -30,6 +50,8 @@ class EnvironmentalFeature(models.Model):
         ('highway', 'Transportation'),
         ('building', 'Building'),
         ('amenity', 'Amenity'),
+        # Matched a tag filter without any of the typed tags
+        ('other', 'Other'),
     ]
     
     site_analysis = models.ForeignKey(
@@ -37,10 +59,15 @@ class EnvironmentalFeature(models.Model):
         on_delete=models.CASCADE, 
         related_name='features'
     )
+    osm_feature = models.ForeignKey(
+        'OSMFeature',
+        on_delete=models.PROTECT,
+        related_name='analysis_features',
+        help_text="Shared OSM element holding the tags and unclipped geometry"
+    )
     feature_type = models.CharField(max_length=20, choices=FEATURE_TYPES)
-    osm_id = models.BigIntegerField(help_text="OpenStreetMap ID")
-    geometry = models.GeometryField(srid=4326, help_text="Feature geometry")
-    properties = models.JSONField(default=dict, help_text="OSM tags and properties")
+    osm_id = models.BigIntegerField(help_text="OSM element type and ID, packed by OSMFeature.encode_id")
+    geometry = models.GeometryField(srid=4326, help_text="Feature geometry clipped to the analysis circle")
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -52,8 +79,110 @@ class EnvironmentalFeature(models.Model):
         indexes = [
             models.Index(fields=['feature_type']),
             models.Index(fields=['osm_id']),
+            # Per-analysis type filters, grouping and keyset pages ordered by id
+            models.Index(fields=['site_analysis', 'feature_type', 'id'], name='feature_analysis_type_idx'),
+            # Nearest-feature (<->) scans within one analysis and feature type
+            GistIndex(fields=['site_analysis', 'feature_type', 'geometry'], name='feature_analysis_knn_idx'),
+        ]
+
+class OSMFeature(models.Model):
+    """
+    OSM element stored once and shared by every analysis that includes it
+    
+    Holds the tags and the unclipped geometry; analyses link to it through
+    EnvironmentalFeature rows carrying their clipped geometry.
+    """
+    ELEMENT_TYPES = [
+        ('node', 'Node'),
+        ('way', 'Way'),
+        ('relation', 'Relation'),
+    ]
+    
+    # Encoded ids carry the element type above the element id bits; OSM ids
+    # are far below 2**60, and untyped ids encode to themselves
+    ELEMENT_TYPE_CODES = {'node': 1, 'way': 2, 'relation': 3}
+    ELEMENT_ID_BITS = 60
+    
+    element_type = models.CharField(
+        max_length=10,
+        choices=ELEMENT_TYPES,
+        blank=True,
+        help_text="Blank for features stored before element types were recorded"
+    )
+    element_id = models.BigIntegerField(
+        help_text="OpenStreetMap element ID; minus the row id for untyped legacy elements"
+    )
+    version = models.IntegerField(default=0, help_text="Latest OSM element version stored (0 when unknown)")
+    tags = models.JSONField(default=dict, help_text="OSM tags and properties")
+    geometry = models.GeometryField(srid=4326, help_text="Unclipped feature geometry")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.element_type or 'element'} {self.element_id} v{self.version}"
+    
+    @classmethod
+    def encode_id(cls, element_type: str, element_id: int) -> int:
+        """Pack an element type and id into the integer stored as osm_id"""
+        code = cls.ELEMENT_TYPE_CODES.get(element_type, 0)
+        if code and not 0 <= element_id < 1 << cls.ELEMENT_ID_BITS:
+            raise ValueError(f"OSM element id {element_id} is out of range")
+        return (code << cls.ELEMENT_ID_BITS) | element_id
+    
+    @classmethod
+    def decode_id(cls, osm_id: int) -> Tuple[str, int]:
+        """Split an encoded osm_id into (element type, element id)"""
+        code = osm_id >> cls.ELEMENT_ID_BITS if osm_id >= 0 else 0
+        element_types = {value: key for key, value in cls.ELEMENT_TYPE_CODES.items()}
+        if code not in element_types:
+            return '', osm_id
+        return element_types[code], osm_id & ((1 << cls.ELEMENT_ID_BITS) - 1)
+    
+    @property
+    def osm_id(self) -> int:
+        return self.encode_id(self.element_type, self.element_id)
+    
+    class Meta:
+        verbose_name = "OSM Feature"
+        verbose_name_plural = "OSM Features"
+        constraints = [
+            # One row per element; a newer download replaces the stored version
+            models.UniqueConstraint(
+                fields=['element_type', 'element_id'],
+                name='unique_osm_feature',
+            ),
+        ]
+        indexes = [
+            # Tag containment (@>) and key existence (?) filters
+            GinIndex(fields=['tags'], name='osm_feature_tags_gin_idx'),
         ]
 
+class AnalysisSummary(models.Model):
+    """Persisted feature totals of an analysis, maintained as its features change"""
+    site_analysis = models.OneToOneField(
+        SiteAnalysis,
+        on_delete=models.CASCADE,
+        related_name='summary'
+    )
+    total_features = models.IntegerField(default=0)
+    total_area_sqm = models.FloatField(default=0, help_text="Geodesic area of all features")
+    feature_counts = models.JSONField(default=dict, help_text="Feature count per feature type")
+    area_by_type_sqm = models.JSONField(default=dict, help_text="Geodesic area per feature type")
+    bbox = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Feature bounding box as [min_lon, min_lat, max_lon, max_lat]"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Summary of {self.site_analysis} - {self.total_features} features"
+    
+    class Meta:
+        verbose_name = "Analysis Summary"
+        verbose_name_plural = "Analysis Summaries"
+
 class ClimateData(models.Model):
     """Model for storing EPW climate data"""
     site_analysis = models.OneToOneField(
@@ -76,3 +205,111 @@ class ClimateData(models.Model):
     class Meta:
         verbose_name = "Climate Data"
         verbose_name_plural = "Climate Data"
+
+class AnalysisJob(models.Model):
+    """Model for tracking site analyses running in the background"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+    
+    request_key = models.CharField(max_length=64, help_text="Hash of the analysis parameters")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    radius = models.IntegerField(default=500, help_text="Analysis radius in meters")
+    site_name = models.CharField(max_length=200, blank=True, null=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    current_stage = models.CharField(max_length=20, blank=True, default='')
+    progress = models.JSONField(default=dict, help_text="Per-stage status and timings")
+    site_analysis = models.ForeignKey(
+        SiteAnalysis,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    error = models.TextField(blank=True, default='')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Analysis job {self.id} - {self.status}"
+    
+    class Meta:
+        verbose_name = "Analysis Job"
+        verbose_name_plural = "Analysis Jobs"
+        constraints = [
+            # At most one in-flight job per set of analysis parameters
+            models.UniqueConstraint(
+                fields=['request_key'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_analysis_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+class OSMTile(models.Model):
+    """Slippy-map tile of the local OSM feature store"""
+    zoom = models.PositiveSmallIntegerField()
+    x = models.IntegerField()
+    y = models.IntegerField()
+    fetched_at = models.DateTimeField(help_text="When the tile features were downloaded or seeded")
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Tile is refetched after this time; empty means never")
+    feature_count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"Tile {self.zoom}/{self.x}/{self.y}"
+    
+    class Meta:
+        verbose_name = "OSM Tile"
+        verbose_name_plural = "OSM Tiles"
+        unique_together = ['zoom', 'x', 'y']
+
+class OSMTileFeature(models.Model):
+    """Tag-filtered OSM feature stored for a tile"""
+    tile = models.ForeignKey(
+        OSMTile,
+        on_delete=models.CASCADE,
+        related_name='features'
+    )
+    element_type = models.CharField(max_length=10, help_text="OSM element type (node, way, relation)")
+    element_id = models.BigIntegerField(help_text="OSM element ID")
+    geometry = models.GeometryField(srid=4326, help_text="Feature geometry")
+    tags = models.JSONField(default=dict, help_text="OSM tags")
+    
+    def __str__(self):
+        return f"{self.element_type}/{self.element_id} in {self.tile}"
+    
+    class Meta:
+        unique_together = ['tile', 'element_type', 'element_id']
+
+class OSMExtractFeature(models.Model):
+    """Staging table of OSM features bulk-loaded from a local extract file"""
+    extract_name = models.CharField(max_length=200, db_index=True, help_text="Extract file the feature was loaded from")
+    element_type = models.CharField(max_length=10, help_text="OSM element type (node, way, relation)")
+    element_id = models.BigIntegerField(help_text="OSM element ID")
+    geometry = models.GeometryField(srid=4326, help_text="Feature geometry")
+    tags = models.JSONField(default=dict, help_text="OSM tags")
+    
+    loaded_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.element_type}/{self.element_id} from {self.extract_name}"
+    
+    class Meta:
+        verbose_name = "OSM Extract Feature"
+        verbose_name_plural = "OSM Extract Features"
+        unique_together = ['element_type', 'element_id']
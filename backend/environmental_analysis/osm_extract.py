@@ -0,0 +1,178 @@
+"""
+Offline OSM Extract Ingestion
+
+Streams a local .osm.pbf / .osm extract (e.g. from Geofabrik) with
+pyosmium, applies the analysis tag filters, builds points, lines and
+(multi)polygons from nodes, ways and relations, and bulk-loads them into
+the OSMExtractFeature staging table.
+"""
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import shapely
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import transaction
+
+from .models import OSMExtractFeature
+
+logger = logging.getLogger(__name__)
+
+# (element_type, element_id, geometry WKB, tags)
+ExtractRow = Tuple[str, int, bytes, Dict[str, str]]
+
+# Closed ways with these tags are lines rather than areas, as in OSMnx
+LINEAR_NATURAL_VALUES = {'coastline', 'cliff', 'ridge', 'arete', 'tree_row'}
+
+
+def matches_tags(tags: Dict[str, str], tag_filters: Dict[str, Any]) -> bool:
+    """Check whether OSM tags match any OSMnx-style tag filter"""
+    for key, wanted in tag_filters.items():
+        value = tags.get(key)
+        if value is None:
+            continue
+        if wanted is True or value == wanted or (isinstance(wanted, list) and value in wanted):
+            return True
+    return False
+
+
+def is_area(tags: Dict[str, str]) -> bool:
+    """Whether a closed way with these tags should be a polygon"""
+    if tags.get('area') == 'no':
+        return False
+    if tags.get('area') == 'yes':
+        return True
+    if 'highway' in tags:
+        return False
+    return tags.get('natural') not in LINEAR_NATURAL_VALUES
+
+
+def read_osm_extract(path: str, tag_filters: Dict[str, Any],
+                     on_batch: Callable[[List[ExtractRow]], None],
+                     batch_size: int = 5000) -> int:
+    """
+    Stream the matching features of an OSM extract in batches
+
+    Args:
+        path: Path to an .osm.pbf or .osm file
+        tag_filters: OSMnx-style tag filters
+        on_batch: Called with each batch of rows as it fills up
+        batch_size: Rows per batch
+
+    Returns:
+        Number of features read
+    """
+    try:
+        import osmium
+    except ImportError:
+        raise ImportError("Reading OSM extracts requires pyosmium (pip install osmium)")
+
+    class ExtractHandler(osmium.SimpleHandler):
+        def __init__(self):
+            super().__init__()
+            self.factory = osmium.geom.WKBFactory()
+            self.batch = []
+            self.count = 0
+
+        def emit(self, element_type, element_id, wkb_hex, tags):
+            geometry = shapely.from_wkb(wkb_hex)
+            # Areas are assembled as multipolygons; keep simple ones as polygons
+            if geometry.geom_type == 'MultiPolygon' and len(geometry.geoms) == 1:
+                geometry = geometry.geoms[0]
+            self.batch.append((element_type, element_id, shapely.to_wkb(geometry), tags))
+            self.count += 1
+            if len(self.batch) >= batch_size:
+                self.flush()
+
+        def flush(self):
+            if self.batch:
+                on_batch(self.batch)
+                self.batch = []
+
+        def node(self, node):
+            tags = dict(node.tags)
+            if matches_tags(tags, tag_filters):
+                self.emit('node', node.id, self.factory.create_point(node), tags)
+
+        def way(self, way):
+            tags = dict(way.tags)
+            if not matches_tags(tags, tag_filters):
+                return
+            # Closed area ways arrive through area() instead
+            if way.is_closed() and is_area(tags):
+                return
+            try:
+                self.emit('way', way.id, self.factory.create_linestring(way), tags)
+            except (RuntimeError, osmium.InvalidLocationError) as e:
+                logger.warning(f"Skipping way {way.id}: {e}")
+
+        def area(self, area):
+            tags = dict(area.tags)
+            if not matches_tags(tags, tag_filters):
+                return
+            if area.from_way() and not is_area(tags):
+                return
+            element_type = 'way' if area.from_way() else 'relation'
+            try:
+                self.emit(element_type, area.orig_id(), self.factory.create_multipolygon(area), tags)
+            except RuntimeError as e:
+                logger.warning(f"Skipping {element_type} {area.orig_id()}: {e}")
+
+    handler = ExtractHandler()
+    handler.apply_file(path, locations=True, idx='flex_mem')
+    handler.flush()
+    return handler.count
+
+
+class OSMExtractLoader:
+    """Bulk-loads an OSM extract into the OSMExtractFeature staging table"""
+
+    def __init__(self, tag_filters: Dict[str, Any], batch_size: int = 5000):
+        self.tag_filters = tag_filters
+        self.batch_size = batch_size
+
+    def load(self, path: str, extract_name: Optional[str] = None, replace: bool = True) -> int:
+        """
+        Load an extract file into the staging table
+
+        Args:
+            path: Path to an .osm.pbf or .osm file
+            extract_name: Name recorded with the rows (defaults to the file name)
+            replace: Replace rows previously loaded under the same name; the
+                replacement is atomic
+
+        Returns:
+            Number of features read from the extract
+        """
+        extract_name = extract_name or os.path.basename(path)
+
+        def insert(batch: List[ExtractRow]) -> None:
+            # An element appears once per statement; the last one read wins
+            rows = {(element_type, element_id): (wkb, tags) for element_type, element_id, wkb, tags in batch}
+            OSMExtractFeature.objects.bulk_create(
+                [
+                    OSMExtractFeature(
+                        extract_name=extract_name,
+                        element_type=element_type,
+                        element_id=element_id,
+                        geometry=GEOSGeometry(memoryview(wkb), srid=4326),
+                        tags=tags,
+                    )
+                    for (element_type, element_id), (wkb, tags) in rows.items()
+                ],
+                # Elements shared with other extracts take the newest geometry and tags
+                update_conflicts=True,
+                unique_fields=['element_type', 'element_id'],
+                update_fields=['extract_name', 'geometry', 'tags', 'loaded_at'],
+            )
+
+        # A failed load leaves the previous rows of the extract in place
+        with transaction.atomic():
+            if replace:
+                deleted, _ = OSMExtractFeature.objects.filter(extract_name=extract_name).delete()
+                if deleted:
+                    logger.info(f"Removed {deleted} features previously loaded from {extract_name}")
+            count = read_osm_extract(path, self.tag_filters, insert, self.batch_size)
+
+        logger.info(f"Loaded {count} features from {extract_name}")
+        return count
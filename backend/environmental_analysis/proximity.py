@@ -0,0 +1,203 @@
+"""
+Proximity Queries
+
+Finds the features nearest to an analysis site and counts features per
+distance band. Nearest features are fetched with index-assisted KNN
+ordering (<-> on the per-analysis GiST index) and re-ranked by geodesic
+distance, so the result is exact in meters without measuring every
+feature of the analysis.
+"""
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.gis.geos import Point
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import Count, F, FloatField, Func, IntegerField, QuerySet, Value
+
+from .feature_queries import Geography, parse_tag_filter
+from .models import EnvironmentalFeature, SiteAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Shortest length of a degree of latitude, at the equator
+MIN_METERS_PER_DEGREE = 110_574
+
+
+class GeographyDistance(Func):
+    """Geodesic distance in meters"""
+    function = 'ST_Distance'
+    output_field = FloatField()
+
+
+class WidthBucket(Func):
+    """Index of the band a value falls in, given ascending band edges"""
+    function = 'width_bucket'
+    output_field = IntegerField()
+
+
+def parse_bands(bands: Optional[str]) -> List[float]:
+    """
+    Parse comma-separated distance band edges in meters
+
+    Raises:
+        ValueError: If the edges are not positive and ascending
+    """
+    if not bands:
+        return list(getattr(settings, 'PROXIMITY_DISTANCE_BANDS', [100, 250, 500, 1000, 2000]))
+    try:
+        edges = [float(value) for value in bands.split(',') if value.strip()]
+    except ValueError:
+        raise ValueError("bands must be a comma-separated list of distances in meters")
+    if not edges or edges[0] <= 0 or any(low >= high for low, high in zip(edges, edges[1:])):
+        raise ValueError("bands must be positive and ascending")
+    return edges
+
+
+def site_distance(site: Point) -> GeographyDistance:
+    """Expression for the geodesic distance from a feature to the site"""
+    return GeographyDistance(Geography('geometry'), Geography(Value(site, output_field=GeometryField(srid=4326))))
+
+
+def degree_radius(site: Point, meters: float) -> float:
+    """
+    Planar radius in degrees that contains every point within a geodesic distance
+
+    Longitude degrees shrink towards the poles, so the bound uses the
+    highest latitude the distance can reach.
+    """
+    latitude = min(abs(site.y) + meters / MIN_METERS_PER_DEGREE, 89.0)
+    return meters / (MIN_METERS_PER_DEGREE * math.cos(math.radians(latitude)))
+
+
+def nearest_features(site: Point, features: QuerySet, k: int) -> List[Dict[str, Any]]:
+    """
+    The k features nearest to the site by geodesic distance
+
+    The k nearest in planar degrees come straight from the KNN index
+    scan. The farthest of them bounds the geodesic search radius, and a
+    second index-assisted pass within that radius yields the exact k
+    nearest in meters.
+
+    Args:
+        site: Site location (EPSG:4326)
+        features: EnvironmentalFeature queryset to search
+        k: Number of features to return
+
+    Returns:
+        Features ordered by distance, each with its distance_m
+    """
+    columns = ('id', 'osm_id', 'feature_type', 'name', 'distance_m')
+    features = features.annotate(distance_m=site_distance(site), name=F('osm_feature__tags__name'))
+
+    candidates = list(features.order_by(GeometryDistance('geometry', site)).values(*columns)[:k])
+    if len(candidates) == k:
+        radius = max(candidate['distance_m'] for candidate in candidates)
+        candidates = list(
+            features.filter(geometry__dwithin=(site, degree_radius(site, radius)))
+            .order_by('distance_m', 'id')
+            .values(*columns)[:k]
+        )
+
+    return sorted(candidates, key=lambda candidate: (candidate['distance_m'], candidate['id']))
+
+
+def distance_histogram(site: Point, features: QuerySet, bands: List[float]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Count features per distance band and feature type in one query
+
+    Args:
+        site: Site location (EPSG:4326)
+        features: EnvironmentalFeature queryset to count
+        bands: Ascending band edges in meters; the first band starts at 0
+            and features beyond the last edge are counted in an open band
+
+    Returns:
+        Mapping of feature type to a list of {min_m, max_m, count} bands
+    """
+    edges = [0.0] + [float(edge) for edge in bands]
+    rows = (
+        features.order_by()
+        .annotate(band=WidthBucket(site_distance(site), Value(edges, output_field=ArrayField(FloatField()))))
+        .values('feature_type', 'band')
+        .annotate(count=Count('id'))
+    )
+
+    histograms = {}
+    for row in rows:
+        counts = histograms.setdefault(row['feature_type'], [0] * len(edges))
+        # width_bucket numbers bands from 1; past the last edge is len(edges)
+        counts[row['band'] - 1] += row['count']
+
+    return {
+        feature_type: [
+            {'min_m': low, 'max_m': high, 'count': count}
+            for low, high, count in zip(edges, edges[1:] + [None], counts)
+        ]
+        for feature_type, counts in histograms.items()
+    }
+
+
+def analysis_proximity(site_analysis: SiteAnalysis, k: Optional[int] = None,
+                       feature_types: Optional[List[str]] = None, tags: Optional[str] = None,
+                       bands: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Nearest features and distance bands around an analysis site
+
+    Results are grouped per feature type (every type of the analysis
+    unless given); a tag filter narrows every group.
+
+    Args:
+        site_analysis: SiteAnalysis to measure from
+        k: Nearest features per group (defaults to PROXIMITY_DEFAULT_K,
+            capped at PROXIMITY_MAX_K)
+        feature_types: Feature types to group by
+        tags: Tag filter (see feature_queries.parse_tag_filter)
+        bands: Comma-separated band edges in meters
+
+    Returns:
+        Proximity dictionary
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    max_k = getattr(settings, 'PROXIMITY_MAX_K', 100)
+    k = k or getattr(settings, 'PROXIMITY_DEFAULT_K', 5)
+    if not 1 <= k <= max_k:
+        raise ValueError(f"k must be between 1 and {max_k}")
+
+    valid_types = {choice[0] for choice in EnvironmentalFeature.FEATURE_TYPES}
+    unknown = [feature_type for feature_type in feature_types or [] if feature_type not in valid_types]
+    if unknown:
+        raise ValueError(f"Unknown feature types: {', '.join(unknown)}")
+
+    edges = parse_bands(bands)
+    site = site_analysis.location
+    features = site_analysis.features.all()
+    if tags:
+        features = features.filter(parse_tag_filter(tags))
+    if feature_types:
+        features = features.filter(feature_type__in=feature_types)
+
+    histograms = distance_histogram(site, features, edges)
+    groups = []
+    for feature_type in feature_types or sorted(histograms):
+        groups.append({
+            'feature_type': feature_type,
+            'nearest': nearest_features(site, features.filter(feature_type=feature_type), k),
+            'distance_bands': histograms.get(feature_type) or [
+                {'min_m': low, 'max_m': high, 'count': 0}
+                for low, high in zip([0.0] + edges, edges + [None])
+            ],
+        })
+
+    return {
+        'analysis_id': site_analysis.id,
+        'center': {'latitude': site.y, 'longitude': site.x},
+        'k': k,
+        'tags': tags,
+        'groups': groups,
+    }
@@ -0,0 +1,140 @@
+"""
+Analysis Reuse
+
+Answers a new analysis from an earlier one whose buffer fully covers the
+requested buffer, instead of downloading the same OSM data again.
+"""
+import logging
+import math
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.utils import timezone
+
+from .models import SiteAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Mean earth radius used by OSMnx to build its query bounding box
+EARTH_RADIUS_M = 6_371_009
+
+
+def bbox_from_point(latitude: float, longitude: float, radius: int) -> Polygon:
+    """
+    Build the bounding box OSMnx queries for a point and distance
+
+    Args:
+        latitude: Center point latitude
+        longitude: Center point longitude
+        radius: Distance from the center in meters
+
+    Returns:
+        Bounding box polygon in EPSG:4326
+    """
+    delta_lat = math.degrees(radius / EARTH_RADIUS_M)
+    delta_lon = delta_lat / math.cos(math.radians(latitude))
+    bbox = Polygon.from_bbox((
+        longitude - delta_lon, latitude - delta_lat,
+        longitude + delta_lon, latitude + delta_lat,
+    ))
+    bbox.srid = 4326
+    return bbox
+
+
+class AnalysisReuseEngine:
+    """Finds covering analyses and derives feature sets from them"""
+
+    # Covering circles via geography buffers; ST_DWithin narrows candidates first
+    COVERING_ANALYSIS_SQL = """
+        SELECT id FROM environmental_analysis_siteanalysis
+        WHERE created_at >= %(fresh_after)s
+          AND analysis_radius >= %(radius)s
+          AND ST_DWithin(
+              location::geography,
+              ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography,
+              analysis_radius - %(radius)s
+          )
+          AND ST_Covers(
+              ST_Buffer(location::geography, analysis_radius),
+              ST_Buffer(ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography, %(radius)s)
+          )
+        ORDER BY analysis_radius ASC, created_at DESC
+        LIMIT 1
+    """
+
+    def __init__(self, max_age_hours: Optional[float] = None):
+        if max_age_hours is None:
+            max_age_hours = getattr(settings, 'ANALYSIS_REUSE_MAX_AGE_HOURS', 24)
+        self.max_age = timedelta(hours=max_age_hours)
+
+    @property
+    def enabled(self) -> bool:
+        # The covering query relies on PostGIS geography functions
+        return self.max_age > timedelta(0) and getattr(connection.ops, 'postgis', False)
+
+    def find_covering_analysis(self, latitude: float, longitude: float,
+                               radius: int) -> Optional[SiteAnalysis]:
+        """
+        Find the smallest fresh analysis whose buffer covers the requested one
+
+        Args:
+            latitude: Requested center latitude
+            longitude: Requested center longitude
+            radius: Requested radius in meters
+
+        Returns:
+            Covering SiteAnalysis or None
+        """
+        if not self.enabled:
+            return None
+
+        params = {
+            'fresh_after': timezone.now() - self.max_age,
+            'radius': radius,
+            'lat': latitude,
+            'lon': longitude,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(self.COVERING_ANALYSIS_SQL, params)
+            row = cursor.fetchone()
+
+        return SiteAnalysis.objects.get(pk=row[0]) if row else None
+
+    def derive_features(self, source: SiteAnalysis, latitude: float,
+                        longitude: float, radius: int) -> List[Dict[str, Any]]:
+        """
+        Derive the feature set of a covered request from a source analysis
+
+        Keeps the stored features that intersect the bounding box OSMnx
+        would have queried, which lies inside the source analysis' box.
+
+        Args:
+            source: Covering SiteAnalysis
+            latitude: Requested center latitude
+            longitude: Requested center longitude
+            radius: Requested radius in meters
+
+        Returns:
+            List of feature dictionaries, as returned by extract_osm_features
+        """
+        bbox = bbox_from_point(latitude, longitude, radius)
+        features = source.features.filter(geometry__intersects=bbox).select_related('osm_feature').only(
+            'osm_id', 'feature_type', 'geometry', 'osm_feature'
+        )
+
+        return [
+            {
+                'osm_id': feature.osm_id,
+                'element_type': feature.osm_feature.element_type,
+                'element_id': feature.osm_feature.element_id,
+                'version': feature.osm_feature.version,
+                'feature_type': feature.feature_type,
+                'geometry_wkb': feature.geometry.hex.decode(),
+                'original_geometry_wkb': feature.osm_feature.geometry.hex.decode(),
+                'properties': feature.osm_feature.tags,
+            }
+            for feature in features
+        ]
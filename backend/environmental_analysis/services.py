@@ -6,25 +6,57 @@ environmental data from OpenStreetMap using OSMnx and climate data from various
 """
 import osmnx as ox
 import geopandas as gpd
+import numpy as np
 from django.contrib.gis.geos import Point, GEOSGeometry
 from django.contrib.gis.geos import fromstr
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Callable, Dict, List, Tuple, Any, Optional
 import json
 import logging
-import requests
 import asyncio
 import aiohttp
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
 import os
 
-from .models import SiteAnalysis, EnvironmentalFeature, ClimateData
+from .models import SiteAnalysis, EnvironmentalFeature, OSMFeature, ClimateData
+from .climate_cache import ClimateCache, get_climate_cache, CURRENT_WEATHER, NASA_POWER
+from .http_client import AsyncHTTPClient, get_http_client
+from .reuse import AnalysisReuseEngine
+from .bulk_ingest import copy_features, copy_supported
+from .feature_sources import FeatureSource, get_feature_source
+from .geometry_pipeline import GeometryPipeline
+from .measurement import get_measurement_engine
+from .summaries import get_summary, record_features_added, summary_to_dict
+from .vector_tiles import invalidate_analysis_tiles, invalidate_element_tiles_on_commit
 
 logger = logging.getLogger(__name__)
 
+_stage_executor = None
+_stage_executor_lock = threading.Lock()
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Return the bounded executor that runs independent analysis stages"""
+    global _stage_executor
+    if _stage_executor is None:
+        with _stage_executor_lock:
+            if _stage_executor is None:
+                _stage_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'ANALYSIS_STAGE_WORKERS', 4),
+                    thread_name_prefix='analysis-stage',
+                )
+    return _stage_executor
+
 class EnvironmentalAnalysisService:
     """Service class for performing environmental analysis using OSMnx"""
     
+    # Stages reported through analyze_site's progress callback
+    ANALYSIS_STAGES = ['osm', 'climate', 'save']
+    
     # OSM tag filters based on the requirements
     OSM_FILTERS = {
         'landuse': ['forest', 'grass', 'cemetery'],
@@ -32,13 +64,33 @@ class EnvironmentalAnalysisService:
         'leisure': ['park', 'playground'],
     }
     
-    def __init__(self):
+    # Tags requested from OSM for every analysis
+    TAG_FILTERS = {
+        'landuse': True,
+        'natural': True,
+        'leisure': True,
+        'amenity': ['park', 'playground', 'garden'],
+        'highway': ['footway', 'path', 'cycleway'],
+    }
+    
+    # Priority order for feature type determination
+    TYPE_PRIORITIES = ['landuse', 'natural', 'leisure', 'amenity', 'highway']
+    
+    def __init__(self, feature_source: Optional[FeatureSource] = None,
+                 geometry_pipeline: Optional[GeometryPipeline] = None):
         # Configure OSMnx settings for better performance
         ox.settings.log_console = False
         ox.settings.use_cache = True
+        
+        # Backend supplying OSM features (Overpass, tile store or local extract)
+        self.feature_source = feature_source or get_feature_source()
+        
+        # Clips, simplifies and snaps geometries before they are stored
+        self.geometry_pipeline = geometry_pipeline or GeometryPipeline()
     
     def analyze_site(self, latitude: float, longitude: float, 
-                    radius: int = 500, site_name: str = None) -> SiteAnalysis:
+                    radius: int = 500, site_name: str = None,
+                    progress_callback: Optional[Callable[[str, str, Optional[float]], None]] = None) -> SiteAnalysis:
         """
         Perform complete environmental analysis for a site
         
@@ -47,30 +99,65 @@ class EnvironmentalAnalysisService:
             longitude: Site longitude
             radius: Analysis radius in meters
             site_name: Optional name for the site
+            progress_callback: Optional callable invoked as
+                (stage, status, duration) when a stage starts and finishes
             
         Returns:
-            SiteAnalysis object with all extracted features and climate data
-        """
-        # Create or get site analysis record
-        location = Point(longitude, latitude, srid=4326)
-        site_analysis = SiteAnalysis.objects.create(
-            name=site_name or f"Site at {latitude:.4f}, {longitude:.4f}",
-            location=location,
-            analysis_radius=radius
-        )
+            SiteAnalysis object with all extracted features and climate data;
+            per-stage timings in seconds are attached as stage_timings and
+            geometry pipeline reduction stats as geometry_stats
+        """
+        timings = {}
+        
+        def timed(stage, func, *args):
+            if progress_callback:
+                progress_callback(stage, 'running', None)
+            start = time.perf_counter()
+            status = 'failed'
+            try:
+                result = func(*args)
+                status = 'completed'
+                return result
+            finally:
+                timings[stage] = round(time.perf_counter() - start, 3)
+                if progress_callback:
+                    progress_callback(stage, status, timings[stage])
+        
+        def save(features_data, source_analysis, climate_fields):
+            # Join all database writes in a single transaction
+            with transaction.atomic():
+                location = Point(longitude, latitude, srid=4326)
+                site_analysis = SiteAnalysis.objects.create(
+                    name=site_name or f"Site at {latitude:.4f}, {longitude:.4f}",
+                    location=location,
+                    analysis_radius=radius,
+                    source_analysis=source_analysis
+                )
+                site_analysis.geometry_stats = self.save_features_to_db(site_analysis, features_data)
+                climate_service.save_climate_data(site_analysis, climate_fields)
+            return site_analysis
+        
+        climate_service = ClimateDataService()
+        started = time.perf_counter()
         
         try:
-            # Extract features from OSM
-            features_data = self.extract_osm_features(latitude, longitude, radius)
-            
-            # Save features to database
-            self.save_features_to_db(site_analysis, features_data)
+            # OSM extraction and climate fetch are independent, so run them concurrently
+            executor = get_stage_executor()
+            osm_future = executor.submit(
+                timed, 'osm', self._osm_stage, latitude, longitude, radius
+            )
+            climate_future = executor.submit(
+                timed, 'climate', self._fetch_climate_stage, climate_service, latitude, longitude
+            )
+            features_data, source_analysis = osm_future.result()
+            climate_fields = climate_future.result()
             
-            # Initialize climate data service and fetch climate data
-            climate_service = ClimateDataService()
-            climate_data = climate_service.get_climate_data(latitude, longitude, site_analysis)
+            site_analysis = timed('save', save, features_data, source_analysis, climate_fields)
+            timings['total'] = round(time.perf_counter() - started, 3)
             
+            site_analysis.stage_timings = timings
             logger.info(f"Successfully analyzed site {site_analysis.id} with {len(features_data)} features and climate data")
+            logger.info(f"Stage timings for site {site_analysis.id}: {timings}")
             
         except Exception as e:
             logger.error(f"Error analyzing site: {str(e)}")
@@ -78,6 +165,43 @@ class EnvironmentalAnalysisService:
         
         return site_analysis
     
+    def _osm_stage(self, latitude: float, longitude: float,
+                   radius: int) -> Tuple[List[Dict[str, Any]], Optional[SiteAnalysis]]:
+        """
+        Get features from a covering prior analysis, or from OSM on a miss
+        
+        Returns:
+            Tuple of (features data, reused source analysis or None)
+        """
+        reuse_engine = AnalysisReuseEngine()
+        try:
+            try:
+                source_analysis = reuse_engine.find_covering_analysis(latitude, longitude, radius)
+                if source_analysis:
+                    features_data = reuse_engine.derive_features(source_analysis, latitude, longitude, radius)
+                    logger.info(f"Reused {len(features_data)} features from analysis {source_analysis.id}")
+                    return features_data, source_analysis
+            except Exception as e:
+                logger.warning(f"Error reusing prior analysis, querying OSM instead: {str(e)}")
+            
+            # Tile store and extract sources read the database too
+            return self.extract_osm_features(latitude, longitude, radius), None
+        finally:
+            # Stage threads are long-lived; don't keep their connections open
+            close_old_connections()
+    
+    def _fetch_climate_stage(self, climate_service: 'ClimateDataService',
+                             latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        """Fetch climate fields; failures leave the analysis without climate data"""
+        try:
+            return climate_service.fetch_climate_fields(latitude, longitude)
+        except Exception as e:
+            logger.error(f"Error fetching climate data: {e}")
+            return None
+        finally:
+            # A database cache backend opens a connection on this stage thread
+            close_old_connections()
+    
     def extract_osm_features(self, latitude: float, longitude: float, 
                            radius: int) -> List[Dict[str, Any]]:
         """
@@ -94,34 +218,18 @@ class EnvironmentalAnalysisService:
         point = (latitude, longitude)
         all_features = []
         
-        # Define comprehensive tag filters
-        tag_filters = {
-            'landuse': True,
-            'natural': True,
-            'leisure': True,
-            'amenity': ['park', 'playground', 'garden'],
-            'highway': ['footway', 'path', 'cycleway'],
-        }
-        
         try:
             logger.info(f"Extracting features from OSM for point {point} with radius {radius}m")
             
-            # Query OSM data
-            gdf = ox.features_from_point(point, tags=tag_filters, dist=radius)
+            # Query OSM data from the configured feature source
+            gdf = self.feature_source.get_features(latitude, longitude, radius, self.TAG_FILTERS)
             
             if gdf.empty:
                 logger.warning("No features found in the specified area")
                 return []
             
-            # Process each feature
-            for idx, row in gdf.iterrows():
-                try:
-                    feature_data = self.process_osm_feature(row, idx)
-                    if feature_data:
-                        all_features.append(feature_data)
-                except Exception as e:
-                    logger.warning(f"Error processing feature {idx}: {str(e)}")
-                    continue
+            # Process all features column-wise
+            all_features = self.process_osm_features(gdf)
                     
             logger.info(f"Successfully extracted {len(all_features)} features")
             
@@ -131,6 +239,83 @@ class EnvironmentalAnalysisService:
         
         return all_features
     
+    def process_osm_features(self, gdf: gpd.GeoDataFrame) -> List[Dict[str, Any]]:
+        """
+        Process all OSM features of a GeoDataFrame column-wise
+        
+        Produces the same records as calling process_osm_feature for every
+        row, but determines feature types with column masks, serializes the
+        geometries to hex WKB in a single call and collects non-null tags
+        one column at a time. Malformed elements are dropped and counted,
+        as process_osm_feature skips them one at a time.
+        
+        Args:
+            gdf: GeoDataFrame returned by OSMnx, indexed by OSM element
+            
+        Returns:
+            List of feature dictionaries
+        """
+        # Drop missing and empty geometries
+        geometries = gdf['geometry']
+        valid = ~(geometries.isna().to_numpy() | geometries.is_empty.to_numpy())
+        
+        # Drop malformed elements (e.g. ids out of range) instead of failing the whole site
+        elements = []
+        for position, osm_id in enumerate(gdf.index):
+            try:
+                element_type, element_id = self.osm_element(osm_id)
+                elements.append((element_type, element_id, OSMFeature.encode_id(element_type, element_id)))
+            except (TypeError, ValueError, IndexError):
+                elements.append(None)
+                valid[position] = False
+        malformed = elements.count(None)
+        if malformed:
+            logger.warning(f"Dropped {malformed} malformed OSM elements of {len(elements)}")
+        
+        gdf = gdf[valid]
+        elements = [element for element, keep in zip(elements, valid) if keep]
+        if gdf.empty:
+            return []
+        
+        feature_types = self.determine_feature_types(gdf)
+        geometry_wkb = gdf['geometry'].to_wkb(hex=True).tolist()
+        
+        # Extract properties (OSM tags), skipping null cells per column
+        properties = [{} for _ in range(len(gdf))]
+        for col in gdf.columns:
+            if col == 'geometry':
+                continue
+            column = gdf[col]
+            mask = column.notna().to_numpy()
+            if not mask.any():
+                continue
+            for position, value in zip(np.flatnonzero(mask), column[mask].tolist()):
+                # Convert numpy types to Python types for JSON serialization
+                if hasattr(value, 'item'):
+                    value = value.item()
+                properties[position][col] = value
+        
+        # Element versions are only present when the source downloaded metadata
+        if 'version' in gdf.columns:
+            versions = gdf['version'].fillna(0).astype(int).tolist()
+        else:
+            versions = [0] * len(gdf)
+        
+        features = []
+        for (element_type, element_id, osm_id), feature_type, wkb, feature_properties, version in zip(
+            elements, feature_types, geometry_wkb, properties, versions
+        ):
+            features.append({
+                'osm_id': osm_id,
+                'element_type': element_type,
+                'element_id': element_id,
+                'version': version,
+                'feature_type': feature_type,
+                'geometry_wkb': wkb,
+                'properties': feature_properties,
+            })
+        return features
+    
     def process_osm_feature(self, row: gpd.GeoSeries, osm_id: Any) -> Dict[str, Any]:
         """
         Process a single OSM feature from GeoDataFrame row
@@ -166,8 +351,12 @@ class EnvironmentalAnalysisService:
                         value = value.item()
                     properties[col] = value
             
+            element_type, element_id = self.osm_element(osm_id)
             return {
-                'osm_id': int(osm_id) if isinstance(osm_id, (int, float)) else hash(str(osm_id)),
+                'osm_id': self.encode_osm_id(osm_id),
+                'element_type': element_type,
+                'element_id': element_id,
+                'version': int(properties.get('version', 0)),
                 'feature_type': feature_type,
                 'geometry_wkt': geometry_wkt,
                 'properties': properties,
@@ -187,37 +376,245 @@ class EnvironmentalAnalysisService:
         Returns:
             Feature type string or None
         """
-        # Priority order for feature type determination
-        type_priorities = ['landuse', 'natural', 'leisure', 'amenity', 'highway']
-        
-        for feature_type in type_priorities:
+        for feature_type in self.TYPE_PRIORITIES:
             if feature_type in row.index and pd.notna(row[feature_type]):
                 return feature_type
         
         return 'other'
     
+    def determine_feature_types(self, gdf: gpd.GeoDataFrame) -> List[str]:
+        """
+        Determine the primary feature type for every row of a GeoDataFrame
+        
+        Args:
+            gdf: GeoDataFrame containing feature data
+            
+        Returns:
+            List of feature type strings, one per row
+        """
+        columns = [col for col in self.TYPE_PRIORITIES if col in gdf.columns]
+        if not columns:
+            return ['other'] * len(gdf)
+        
+        # np.select picks the first matching mask, preserving priority order
+        masks = [gdf[col].notna().to_numpy() for col in columns]
+        return np.select(masks, columns, default='other').tolist()
+    
+    def osm_element(self, osm_id: Any) -> Tuple[str, int]:
+        """
+        Split an OSMnx index value into element type and element id
+        
+        Args:
+            osm_id: OSMnx index value (element tuple, or a bare integer id)
+            
+        Returns:
+            Tuple of (element type, element id); the type is blank when unknown
+        """
+        if isinstance(osm_id, tuple):
+            return str(osm_id[0]), int(osm_id[1])
+        return '', int(osm_id)
+    
+    def encode_osm_id(self, osm_id: Any) -> int:
+        """
+        Convert an OSMnx index value to the integer stored as osm_id
+        
+        The element type and id are packed together, so the same element gets
+        the same osm_id in every process and nodes, ways and relations sharing
+        a numeric id stay distinct.
+        
+        Args:
+            osm_id: OSMnx index value (integer or element tuple)
+            
+        Returns:
+            Encoded integer OSM ID
+        """
+        return OSMFeature.encode_id(*self.osm_element(osm_id))
+    
     def save_features_to_db(self, site_analysis: SiteAnalysis, 
-                           features_data: List[Dict[str, Any]]) -> None:
+                           features_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Save extracted features to the database
         
         Args:
             site_analysis: SiteAnalysis instance
             features_data: List of feature dictionaries
+            
+        Returns:
+            Vertex and byte reduction stats of the geometry pipeline
+        """
+        features_data, geometry_stats = self.process_feature_geometries(site_analysis, features_data)
+        osm_ids = {feature['osm_id'] for feature in features_data}
+        
+        with transaction.atomic():
+            # Rows that already exist are skipped by the insert and must not be counted twice
+            existing_ids = set(
+                site_analysis.features.filter(osm_id__in=osm_ids).values_list('osm_id', flat=True)
+            ) if osm_ids else set()
+            
+            if features_data:
+                self.ingest_features([(site_analysis, features_data)])
+                logger.info(f"Saved {len(features_data)} features to database")
+            
+            # The summary is maintained in the same transaction as the features
+            record_features_added(
+                site_analysis, site_analysis.features.filter(osm_id__in=osm_ids - existing_ids)
+            )
+        
+        if features_data:
+            # Cached map tiles of this analysis are stale once the features land
+            transaction.on_commit(lambda: invalidate_analysis_tiles(site_analysis.id))
+        
+        return geometry_stats
+    
+    def process_feature_geometries(self, site_analysis: SiteAnalysis,
+                                   features_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run the ingest geometry pipeline over the features of an analysis
+        
+        Args:
+            site_analysis: SiteAnalysis instance
+            features_data: List of feature dictionaries
+            
+        Returns:
+            Tuple of (processed feature dictionaries, geometry pipeline stats)
+        """
+        return self.geometry_pipeline.process_features(
+            features_data,
+            site_analysis.location.y,
+            site_analysis.location.x,
+            site_analysis.analysis_radius,
+        )
+    
+    def ingest_features(self, analysis_features: List[Tuple[SiteAnalysis, List[Dict[str, Any]]]]) -> None:
+        """
+        Store processed features and link them to their analyses
+        
+        Streams the rows with COPY on PostgreSQL; other databases build
+        model instances and use bulk_create. Must run inside a transaction.
+        Features an analysis already has are skipped.
+        
+        Args:
+            analysis_features: (SiteAnalysis, processed feature dictionaries) pairs
+        """
+        if copy_supported():
+            copy_features(
+                (site_analysis.id, feature)
+                for site_analysis, features_data in analysis_features
+                for feature in features_data
+            )
+            return
+        
+        features = []
+        for site_analysis, features_data in analysis_features:
+            features.extend(self.build_feature_objects(site_analysis, features_data))
+        if features:
+            self.save_osm_features(features)
+            EnvironmentalFeature.objects.bulk_create(features, batch_size=5000, ignore_conflicts=True)
+    
+    def save_osm_features(self, features: List[EnvironmentalFeature]) -> None:
+        """
+        Upsert the OSM elements attached to features, storing each one once
+        
+        Elements are keyed by element type and id, so every analysis that
+        includes an element links to a single row. Version, tags and
+        geometry are refreshed from the latest download.
+        """
+        # Keep the highest version of elements downloaded more than once
+        unique_elements = {}
+        for feature in features:
+            element = feature.osm_feature
+            key = (element.element_type, element.element_id)
+            if key not in unique_elements or element.version > unique_elements[key].version:
+                unique_elements[key] = element
+        for feature in features:
+            element = feature.osm_feature
+            feature.osm_feature = unique_elements[(element.element_type, element.element_id)]
+        
+        if unique_elements:
+            retagged = self.retagged_elements(unique_elements)
+            # Updating on conflict returns the ids of rows that already existed
+            OSMFeature.objects.bulk_create(
+                unique_elements.values(),
+                batch_size=5000,
+                update_conflicts=True,
+                unique_fields=['element_type', 'element_id'],
+                update_fields=['version', 'tags', 'geometry', 'updated_at'],
+            )
+            invalidate_element_tiles_on_commit(retagged)
+    
+    def retagged_elements(self, elements: Dict[Tuple[str, int], OSMFeature]) -> List[int]:
+        """
+        Ids of stored elements whose tags differ from the downloaded ones
+        
+        Args:
+            elements: Downloaded elements keyed by (element type, element id)
+        """
+        element_ids = sorted({element_id for _, element_id in elements})
+        retagged = []
+        for start in range(0, len(element_ids), 5000):
+            stored = OSMFeature.objects.filter(element_id__in=element_ids[start:start + 5000]).values_list(
+                'pk', 'element_type', 'element_id', 'tags'
+            )
+            for pk, element_type, element_id, tags in stored:
+                element = elements.get((element_type, element_id))
+                if element is not None and element.tags != tags:
+                    retagged.append(pk)
+        return retagged
+    
+    def delete_unreferenced_osm_features(self, min_age: timedelta = timedelta(days=1)) -> int:
+        """
+        Delete stored OSM elements that no analysis links to any more
+        
+        Elements are protected while features reference them, but stay
+        behind when their analyses are deleted. Only elements untouched for
+        min_age are removed, so rows an ingest has just upserted and is
+        about to link are kept.
+        
+        Returns:
+            Number of elements deleted
+        """
+        cutoff = timezone.now() - min_age
+        deleted, _ = OSMFeature.objects.filter(
+            analysis_features__isnull=True, updated_at__lt=cutoff
+        ).delete()
+        logger.info(f"Deleted {deleted} unreferenced OSM elements")
+        return deleted
+    
+    def build_feature_objects(self, site_analysis: SiteAnalysis,
+                              features_data: List[Dict[str, Any]]) -> List[EnvironmentalFeature]:
+        """
+        Build unsaved EnvironmentalFeature instances from feature dictionaries
+        
+        Args:
+            site_analysis: SiteAnalysis instance
+            features_data: List of feature dictionaries
+            
+        Returns:
+            List of EnvironmentalFeature instances with unsaved OSMFeature
+            elements, skipping invalid features
         """
         features_to_create = []
         
         for feature_data in features_data:
             try:
-                # Convert WKT to Django geometry
-                geometry = GEOSGeometry(feature_data['geometry_wkt'])
+                # Convert hex WKB (or WKT) to Django geometry
+                geometry = GEOSGeometry(
+                    feature_data.get('geometry_wkb') or feature_data['geometry_wkt']
+                )
+                original_wkb = feature_data.get('original_geometry_wkb')
                 
                 feature = EnvironmentalFeature(
                     site_analysis=site_analysis,
                     feature_type=feature_data['feature_type'],
                     osm_id=feature_data['osm_id'],
                     geometry=geometry,
-                    properties=feature_data['properties']
+                    osm_feature=OSMFeature(
+                        element_type=feature_data.get('element_type', ''),
+                        element_id=feature_data.get('element_id', feature_data['osm_id']),
+                        version=feature_data.get('version', 0),
+                        tags=feature_data['properties'],
+                        geometry=GEOSGeometry(original_wkb) if original_wkb else geometry,
+                    ),
                 )
                 features_to_create.append(feature)
                 
@@ -225,54 +622,56 @@ class EnvironmentalAnalysisService:
                 logger.warning(f"Error creating feature {feature_data['osm_id']}: {str(e)}")
                 continue
         
-        # Bulk create features
-        if features_to_create:
-            EnvironmentalFeature.objects.bulk_create(
-                features_to_create, 
-                ignore_conflicts=True  # Skip duplicates
-            )
-            logger.info(f"Saved {len(features_to_create)} features to database")
+        return features_to_create
     
-    def get_analysis_summary(self, site_analysis: SiteAnalysis) -> Dict[str, Any]:
+    def get_analysis_summary(self, site_analysis: SiteAnalysis,
+                             clip_to_site: bool = False) -> Dict[str, Any]:
         """
         Generate summary statistics for a site analysis
         
+        Counts, geodesic areas and the bounding box are read from the
+        persisted AnalysisSummary. Areas clipped to the analysis circle are
+        measured on the features projected to the site's local metric
+        frame, which are cached per analysis, when requested.
+        
         Args:
             site_analysis: SiteAnalysis instance
+            clip_to_site: Also report area clipped to the analysis circle
             
         Returns:
             Summary dictionary
         """
-        features = site_analysis.features.all()
-        
-        # Count features by type
-        feature_counts = {}
-        for feature in features:
-            feature_type = feature.feature_type
-            feature_counts[feature_type] = feature_counts.get(feature_type, 0) + 1
-        
-        # Calculate total area for polygon features
-        total_area = 0
-        for feature in features:
-            if hasattr(feature.geometry, 'area'):
-                # Convert to approximate square meters (rough calculation)
-                total_area += feature.geometry.area * 111000 * 111000
+        summary_record = get_summary(site_analysis)
+        summary = summary_to_dict(summary_record)
+        # Name the area had before summaries were persisted, kept for API clients
+        summary['approximate_total_area_sqm'] = summary['total_area_sqm']
+        summary['analysis_radius'] = site_analysis.analysis_radius
+        summary['center_coordinates'] = {
+            'latitude': site_analysis.location.y,
+            'longitude': site_analysis.location.x,
+        }
         
-        return {
-            'total_features': len(features),
-            'feature_counts': feature_counts,
-            'approximate_total_area_sqm': round(total_area, 2),
-            'analysis_radius': site_analysis.analysis_radius,
-            'center_coordinates': {
-                'latitude': site_analysis.location.y,
-                'longitude': site_analysis.location.x,
+        if clip_to_site:
+            features = get_measurement_engine().get_features(site_analysis, summary_record.updated_at)
+            clipped_area_by_type = {
+                feature_type: round(area, 2) for feature_type, area in features.area_by_type(clip=True).items()
             }
-        }
+            summary['clipped_area_sqm'] = round(sum(clipped_area_by_type.values()), 2)
+            summary['clipped_area_by_type_sqm'] = clipped_area_by_type
+        
+        return summary
 
 class ClimateDataService:
     """Service class for fetching climate data from various APIs"""
     
-    def __init__(self):
+    # Per-source deadlines in seconds
+    SOURCE_TIMEOUTS = {
+        CURRENT_WEATHER: 10,
+        NASA_POWER: 30,
+    }
+    
+    def __init__(self, cache: Optional[ClimateCache] = None,
+                 http_client: Optional[AsyncHTTPClient] = None):
         # API endpoints
         self.openweather_base = "https://api.openweathermap.org/data/2.5"
         self.nasa_power_base = "https://power.larc.nasa.gov/api/temporal/daily/point"
@@ -280,6 +679,13 @@ class ClimateDataService:
         
         # Get API keys from environment or settings
         self.openweather_key = getattr(settings, 'OPENWEATHER_API_KEY', os.getenv('OPENWEATHER_API_KEY'))
+        
+        # Responses are cached per coordinate grid cell across service instances
+        self.cache = cache or get_climate_cache()
+        
+        # Upstream requests share one pooled aiohttp session per process
+        self.http_client = http_client or get_http_client()
+        self.api_timeout = getattr(settings, 'CLIMATE_API_TIMEOUT', 30)
     
     def get_climate_data(self, latitude: float, longitude: float, site_analysis: SiteAnalysis) -> ClimateData:
         """
@@ -293,161 +699,297 @@ class ClimateDataService:
         Returns:
             ClimateData object with aggregated climate information
         """
-        climate_data, created = ClimateData.objects.get_or_create(
-            site_analysis=site_analysis,
-            defaults={
-                'temperature_data': {},
-                'precipitation_data': {},
-                'wind_data': {},
-                'solar_data': {}
-            }
-        )
-        
         try:
-            # Fetch from multiple sources
-            current_weather = self._get_current_weather(latitude, longitude)
-            nasa_data = self._get_nasa_power_data(latitude, longitude)
-            climate_summary = self._get_climate_summary(latitude, longitude)
+            climate_fields = self.fetch_climate_fields(latitude, longitude)
+        except Exception as e:
+            logger.error(f"Error fetching climate data: {e}")
+            climate_fields = None
+        
+        return self.save_climate_data(site_analysis, climate_fields)
+    
+    def fetch_climate_fields(self, latitude: float, longitude: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch and aggregate climate data without touching the database
+        
+        Args:
+            latitude: Location latitude
+            longitude: Location longitude
             
-            # Aggregate all data
-            climate_data.temperature_data = {
+        Returns:
+            Dictionary of ClimateData field values
+        """
+        # Fetch from multiple sources concurrently
+        sources = self.get_climate_sources(latitude, longitude)
+        current_weather = sources[CURRENT_WEATHER]
+        nasa_data = sources[NASA_POWER]
+        climate_summary = self._get_climate_summary(latitude, longitude)
+        
+        # Aggregate all data
+        return {
+            'temperature_data': {
                 'current': current_weather.get('temperature', {}),
                 'historical_avg': nasa_data.get('temperature', {}),
                 'monthly_averages': climate_summary.get('temperature', {})
-            }
-            
-            climate_data.precipitation_data = {
+            },
+            'precipitation_data': {
                 'current': current_weather.get('precipitation', {}),
                 'historical': nasa_data.get('precipitation', {}),
                 'annual_patterns': climate_summary.get('precipitation', {})
-            }
-            
-            climate_data.wind_data = {
+            },
+            'wind_data': {
                 'current': current_weather.get('wind', {}),
                 'patterns': nasa_data.get('wind', {}),
                 'seasonal': climate_summary.get('wind', {})
-            }
-            
-            climate_data.solar_data = {
+            },
+            'solar_data': {
                 'current': current_weather.get('solar', {}),
                 'radiation': nasa_data.get('solar', {}),
                 'yearly_patterns': climate_summary.get('solar', {})
-            }
+            },
+        }
+    
+    def save_climate_data(self, site_analysis: SiteAnalysis,
+                          climate_fields: Optional[Dict[str, Dict[str, Any]]]) -> ClimateData:
+        """
+        Create or update the ClimateData record for a site analysis
+        
+        Args:
+            site_analysis: Associated site analysis object
+            climate_fields: Field values from fetch_climate_fields, or None
+                to only ensure an (empty) record exists
             
+        Returns:
+            ClimateData object
+        """
+        climate_data, created = ClimateData.objects.get_or_create(
+            site_analysis=site_analysis,
+            defaults=climate_fields or {
+                'temperature_data': {},
+                'precipitation_data': {},
+                'wind_data': {},
+                'solar_data': {}
+            }
+        )
+        
+        if climate_fields and not created:
+            for field, value in climate_fields.items():
+                setattr(climate_data, field, value)
             climate_data.save()
+        
+        if climate_fields:
             logger.info(f"Climate data updated for site: {site_analysis.name}")
+        
+        return climate_data
+    
+    def get_climate_sources(self, lat: float, lon: float,
+                            sources: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get data for several climate sources, fetching cache misses concurrently
+        
+        Args:
+            lat: Location latitude
+            lon: Location longitude
+            sources: Source names to fetch (defaults to all sources)
             
-        except Exception as e:
-            logger.error(f"Error fetching climate data: {e}")
+        Returns:
+            Dictionary mapping source name to its data; sources that fail or
+            time out fall back to mock data
+        """
+        sources = sources or list(self.SOURCE_TIMEOUTS)
+        results = {}
+        to_fetch = []
+        
+        for source in sources:
+            if source == CURRENT_WEATHER and not self.openweather_key:
+                logger.warning("OpenWeatherMap API key not configured")
+                results[source] = self._get_mock_data(source, lat, lon)
+                continue
             
-        return climate_data
+            cached = self.cache.get(source, lat, lon)
+            if cached is not None:
+                results[source] = cached
+            else:
+                to_fetch.append(source)
+        
+        fetched = {}
+        if to_fetch:
+            try:
+                fetched = self.http_client.run(
+                    self.fetch_climate_sources_async(lat, lon, to_fetch),
+                    timeout=self.api_timeout + 1,
+                )
+            except Exception as e:
+                logger.error(f"Error fetching climate sources: {e}")
+        
+        for source in to_fetch:
+            data = fetched.get(source)
+            if data is None:
+                results[source] = self._get_mock_data(source, lat, lon)
+            else:
+                self.cache.set(source, lat, lon, data)
+                results[source] = data
+        
+        return results
     
-    def _get_current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
-        """Get current weather data from OpenWeatherMap"""
-        if not self.openweather_key:
-            logger.warning("OpenWeatherMap API key not configured")
-            return self._get_mock_current_weather(lat, lon)
+    async def fetch_climate_sources_async(self, lat: float, lon: float,
+                                          sources: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch climate sources concurrently over the shared aiohttp session
         
-        try:
-            # Current weather
-            current_url = f"{self.openweather_base}/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': self.openweather_key,
-                'units': 'metric'
-            }
+        Each source runs under its own deadline and the whole fetch under
+        CLIMATE_API_TIMEOUT; sources still running at that point are cancelled.
+        Must run on the HTTP client loop.
+        
+        Args:
+            lat: Location latitude
+            lon: Location longitude
+            sources: Source names to fetch
             
-            response = requests.get(current_url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'temperature': {
-                        'current': data['main']['temp'],
-                        'feels_like': data['main']['feels_like'],
-                        'min': data['main']['temp_min'],
-                        'max': data['main']['temp_max'],
-                        'humidity': data['main']['humidity'],
-                        'pressure': data['main']['pressure']
-                    },
-                    'precipitation': {
-                        'description': data['weather'][0]['description'],
-                        'clouds': data['clouds']['all'],
-                        'rain': data.get('rain', {}).get('1h', 0),
-                        'snow': data.get('snow', {}).get('1h', 0)
-                    },
-                    'wind': {
-                        'speed': data['wind']['speed'],
-                        'direction': data['wind'].get('deg', 0),
-                        'gust': data['wind'].get('gust', 0)
-                    },
-                    'solar': {
-                        'visibility': data['visibility'],
-                        'uv_index': None  # Requires separate API call
-                    }
-                }
+        Returns:
+            Dictionary mapping source name to its data, or None if it failed
+        """
+        fetchers = {
+            CURRENT_WEATHER: self._fetch_current_weather,
+            NASA_POWER: self._fetch_nasa_power_data,
+        }
+        session = await self.http_client.get_session()
+        
+        tasks = {
+            source: asyncio.create_task(asyncio.wait_for(
+                fetchers[source](session, lat, lon),
+                timeout=self.SOURCE_TIMEOUTS[source],
+            ))
+            for source in sources
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.api_timeout)
+        for task in pending:
+            task.cancel()
+        
+        results = {}
+        for source, task in tasks.items():
+            if task in pending:
+                logger.warning(f"Climate source {source} cancelled after {self.api_timeout}s")
+                results[source] = None
+            elif task.exception() is not None:
+                error = task.exception()
+                if isinstance(error, asyncio.TimeoutError):
+                    logger.warning(f"Climate source {source} timed out after {self.SOURCE_TIMEOUTS[source]}s")
+                else:
+                    logger.error(f"Error fetching climate source {source}: {error}")
+                results[source] = None
             else:
-                logger.warning(f"OpenWeatherMap API error: {response.status_code}")
-                return self._get_mock_current_weather(lat, lon)
-                
-        except Exception as e:
-            logger.error(f"Error fetching current weather: {e}")
-            return self._get_mock_current_weather(lat, lon)
+                results[source] = task.result()
+        
+        return results
+    
+    def _get_current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Get current weather data from OpenWeatherMap"""
+        return self.get_climate_sources(lat, lon, [CURRENT_WEATHER])[CURRENT_WEATHER]
     
     def _get_nasa_power_data(self, lat: float, lon: float) -> Dict[str, Any]:
         """Get NASA POWER meteorological data"""
-        try:
-            # Get last year's data for historical context
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            
-            params = {
-                'start': start_date.strftime('%Y%m%d'),
-                'end': end_date.strftime('%Y%m%d'),
-                'latitude': lat,
-                'longitude': lon,
-                'community': 'RE',
-                'parameters': 'T2M,PRECTOT,WS2M,ALLSKY_SFC_SW_DWN',
-                'format': 'JSON'
+        return self.get_climate_sources(lat, lon, [NASA_POWER])[NASA_POWER]
+    
+    def _get_mock_data(self, source: str, lat: float, lon: float) -> Dict[str, Any]:
+        """Provide mock data for a climate source"""
+        if source == CURRENT_WEATHER:
+            return self._get_mock_current_weather(lat, lon)
+        return self._get_mock_nasa_data(lat, lon)
+    
+    async def _fetch_current_weather(self, session: aiohttp.ClientSession,
+                                     lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Fetch current weather data from OpenWeatherMap"""
+        # Current weather
+        current_url = f"{self.openweather_base}/weather"
+        params = {
+            'lat': lat,
+            'lon': lon,
+            'appid': self.openweather_key,
+            'units': 'metric'
+        }
+        
+        async with session.get(current_url, params=params) as response:
+            if response.status != 200:
+                logger.warning(f"OpenWeatherMap API error: {response.status}")
+                return None
+            data = await response.json(content_type=None)
+        
+        return {
+            'temperature': {
+                'current': data['main']['temp'],
+                'feels_like': data['main']['feels_like'],
+                'min': data['main']['temp_min'],
+                'max': data['main']['temp_max'],
+                'humidity': data['main']['humidity'],
+                'pressure': data['main']['pressure']
+            },
+            'precipitation': {
+                'description': data['weather'][0]['description'],
+                'clouds': data['clouds']['all'],
+                'rain': data.get('rain', {}).get('1h', 0),
+                'snow': data.get('snow', {}).get('1h', 0)
+            },
+            'wind': {
+                'speed': data['wind']['speed'],
+                'direction': data['wind'].get('deg', 0),
+                'gust': data['wind'].get('gust', 0)
+            },
+            'solar': {
+                'visibility': data['visibility'],
+                'uv_index': None  # Requires separate API call
             }
-            
-            response = requests.get(self.nasa_power_base, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                properties = data['properties']['parameter']
-                
-                # Calculate averages
-                temp_data = list(properties.get('T2M', {}).values())
-                precip_data = list(properties.get('PRECTOT', {}).values())
-                wind_data = list(properties.get('WS2M', {}).values())
-                solar_data = list(properties.get('ALLSKY_SFC_SW_DWN', {}).values())
-                
-                return {
-                    'temperature': {
-                        'annual_avg': sum(temp_data) / len(temp_data) if temp_data else 0,
-                        'annual_max': max(temp_data) if temp_data else 0,
-                        'annual_min': min(temp_data) if temp_data else 0
-                    },
-                    'precipitation': {
-                        'annual_total': sum(precip_data) if precip_data else 0,
-                        'avg_daily': sum(precip_data) / len(precip_data) if precip_data else 0
-                    },
-                    'wind': {
-                        'avg_speed': sum(wind_data) / len(wind_data) if wind_data else 0,
-                        'max_speed': max(wind_data) if wind_data else 0
-                    },
-                    'solar': {
-                        'avg_radiation': sum(solar_data) / len(solar_data) if solar_data else 0,
-                        'peak_radiation': max(solar_data) if solar_data else 0
-                    }
-                }
-            else:
-                logger.warning(f"NASA POWER API error: {response.status_code}")
-                return self._get_mock_nasa_data(lat, lon)
-                
-        except Exception as e:
-            logger.error(f"Error fetching NASA POWER data: {e}")
-            return self._get_mock_nasa_data(lat, lon)
+        }
+    
+    async def _fetch_nasa_power_data(self, session: aiohttp.ClientSession,
+                                     lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Fetch NASA POWER meteorological data"""
+        # Get last year's data for historical context
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=365)
+        
+        params = {
+            'start': start_date.strftime('%Y%m%d'),
+            'end': end_date.strftime('%Y%m%d'),
+            'latitude': lat,
+            'longitude': lon,
+            'community': 'RE',
+            'parameters': 'T2M,PRECTOT,WS2M,ALLSKY_SFC_SW_DWN',
+            'format': 'JSON'
+        }
+        
+        async with session.get(self.nasa_power_base, params=params) as response:
+            if response.status != 200:
+                logger.warning(f"NASA POWER API error: {response.status}")
+                return None
+            data = await response.json(content_type=None)
+        
+        properties = data['properties']['parameter']
+        
+        # Calculate averages
+        temp_data = list(properties.get('T2M', {}).values())
+        precip_data = list(properties.get('PRECTOT', {}).values())
+        wind_data = list(properties.get('WS2M', {}).values())
+        solar_data = list(properties.get('ALLSKY_SFC_SW_DWN', {}).values())
+        
+        return {
+            'temperature': {
+                'annual_avg': sum(temp_data) / len(temp_data) if temp_data else 0,
+                'annual_max': max(temp_data) if temp_data else 0,
+                'annual_min': min(temp_data) if temp_data else 0
+            },
+            'precipitation': {
+                'annual_total': sum(precip_data) if precip_data else 0,
+                'avg_daily': sum(precip_data) / len(precip_data) if precip_data else 0
+            },
+            'wind': {
+                'avg_speed': sum(wind_data) / len(wind_data) if wind_data else 0,
+                'max_speed': max(wind_data) if wind_data else 0
+            },
+            'solar': {
+                'avg_radiation': sum(solar_data) / len(solar_data) if solar_data else 0,
+                'peak_radiation': max(solar_data) if solar_data else 0
+            }
+        }
     
     def _get_climate_summary(self, lat: float, lon: float) -> Dict[str, Any]:
         """Get climate zone and summary information"""
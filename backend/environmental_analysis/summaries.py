@@ -0,0 +1,168 @@
+"""
+Analysis Summaries
+
+Maintains the persisted AnalysisSummary of each analysis: feature counts
+and geodesic areas per feature type plus the feature bounding box.
+Summaries are written in the same transaction as the features, adjusted
+incrementally as features are added or removed, and read by the API
+instead of re-aggregating every feature.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.contrib.gis.db.models import Extent
+from django.db import transaction
+from django.db.models import Count, QuerySet, Sum
+
+from .feature_queries import Geography, GeographyArea
+from .models import AnalysisSummary, EnvironmentalFeature, SiteAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+def feature_totals(features: QuerySet) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate counts and geodesic areas per feature type in one query
+
+    Returns:
+        Mapping of feature type to {'count', 'area'}
+    """
+    rows = (
+        features.order_by()
+        .values('feature_type')
+        .annotate(count=Count('id'), area=Sum(GeographyArea(Geography('geometry'))))
+    )
+    return {row['feature_type']: {'count': row['count'], 'area': row['area'] or 0.0} for row in rows}
+
+
+def feature_bbox(features: QuerySet) -> Optional[List[float]]:
+    """Bounding box of a feature queryset, or None when it is empty"""
+    extent = features.order_by().aggregate(extent=Extent('geometry'))['extent']
+    return list(extent) if extent else None
+
+
+def merge_bbox(first: Optional[List[float]], second: Optional[List[float]]) -> Optional[List[float]]:
+    if first is None or second is None:
+        return first or second
+    return [
+        min(first[0], second[0]), min(first[1], second[1]),
+        max(first[2], second[2]), max(first[3], second[3]),
+    ]
+
+
+def apply_totals(summary: AnalysisSummary, totals: Dict[str, Dict[str, float]], sign: int = 1) -> None:
+    """Add (sign=1) or subtract (sign=-1) per-type totals from a summary"""
+    for feature_type, values in totals.items():
+        count = summary.feature_counts.get(feature_type, 0) + sign * values['count']
+        area = summary.area_by_type_sqm.get(feature_type, 0.0) + sign * values['area']
+        if count > 0:
+            summary.feature_counts[feature_type] = count
+            summary.area_by_type_sqm[feature_type] = max(area, 0.0)
+        else:
+            summary.feature_counts.pop(feature_type, None)
+            summary.area_by_type_sqm.pop(feature_type, None)
+    summary.total_features = sum(summary.feature_counts.values())
+    summary.total_area_sqm = sum(summary.area_by_type_sqm.values())
+
+
+def rebuild_summaries(analyses: Iterable[SiteAnalysis]) -> List[AnalysisSummary]:
+    """
+    Recompute the summaries of several analyses from their features
+
+    Counts, areas and extents of all analyses are aggregated in two
+    grouped queries and written with one upsert.
+    """
+    analyses = list(analyses)
+    if not analyses:
+        return []
+
+    features = EnvironmentalFeature.objects.filter(site_analysis__in=analyses).order_by()
+    summaries = {analysis.id: AnalysisSummary(site_analysis=analysis) for analysis in analyses}
+
+    rows = features.values('site_analysis_id', 'feature_type').annotate(
+        count=Count('id'), area=Sum(GeographyArea(Geography('geometry')))
+    )
+    for row in rows:
+        summary = summaries[row['site_analysis_id']]
+        summary.feature_counts[row['feature_type']] = row['count']
+        summary.area_by_type_sqm[row['feature_type']] = row['area'] or 0.0
+
+    for row in features.values('site_analysis_id').annotate(extent=Extent('geometry')):
+        summaries[row['site_analysis_id']].bbox = list(row['extent']) if row['extent'] else None
+
+    for summary in summaries.values():
+        apply_totals(summary, {})
+
+    return AnalysisSummary.objects.bulk_create(
+        summaries.values(),
+        update_conflicts=True,
+        unique_fields=['site_analysis'],
+        update_fields=['total_features', 'total_area_sqm', 'feature_counts', 'area_by_type_sqm', 'bbox', 'updated_at'],
+    )
+
+
+def rebuild_summary(site_analysis: SiteAnalysis) -> AnalysisSummary:
+    """Recompute the summary of one analysis from its features"""
+    return rebuild_summaries([site_analysis])[0]
+
+
+def record_features_added(site_analysis: SiteAnalysis, added: QuerySet) -> AnalysisSummary:
+    """
+    Fold newly inserted features into the analysis summary
+
+    Args:
+        site_analysis: Analysis the features belong to
+        added: Queryset of exactly the rows that were inserted
+    """
+    with transaction.atomic():
+        summary, _ = AnalysisSummary.objects.select_for_update().get_or_create(site_analysis=site_analysis)
+        apply_totals(summary, feature_totals(added))
+        summary.bbox = merge_bbox(summary.bbox, feature_bbox(added))
+        summary.save()
+    return summary
+
+
+def remove_features(site_analysis: SiteAnalysis, features: QuerySet) -> int:
+    """
+    Delete features of an analysis and subtract them from its summary
+
+    The bounding box can only shrink on removal, so it is recomputed from
+    the remaining features.
+
+    Returns:
+        Number of features deleted
+    """
+    with transaction.atomic():
+        summary = AnalysisSummary.objects.select_for_update().filter(site_analysis=site_analysis).first()
+        features = features.filter(site_analysis=site_analysis)
+        totals = feature_totals(features)
+        deleted, _ = features.delete()
+
+        if summary is None:
+            rebuild_summary(site_analysis)
+        else:
+            apply_totals(summary, totals, sign=-1)
+            summary.bbox = feature_bbox(site_analysis.features.all())
+            summary.save()
+    return deleted
+
+
+def get_summary(site_analysis: SiteAnalysis) -> AnalysisSummary:
+    """Read the persisted summary, building it for analyses that predate it"""
+    summary = AnalysisSummary.objects.filter(site_analysis=site_analysis).first()
+    if summary is None:
+        logger.info(f"Building missing summary for analysis {site_analysis.id}")
+        summary = rebuild_summary(site_analysis)
+    return summary
+
+
+def summary_to_dict(summary: AnalysisSummary) -> Dict[str, Any]:
+    return {
+        'total_features': summary.total_features,
+        'feature_counts': dict(summary.feature_counts),
+        'total_area_sqm': round(summary.total_area_sqm, 2),
+        'area_by_type_sqm': {
+            feature_type: round(area, 2) for feature_type, area in summary.area_by_type_sqm.items()
+        },
+        'bbox': summary.bbox,
+    }
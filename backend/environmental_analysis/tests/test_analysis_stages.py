@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class AnalysisStageTests(SimpleTestCase):
+    """analyze_site with the database writes and upstream sources mocked out"""
+
+    def setUp(self):
+        self.service = EnvironmentalAnalysisService(feature_source=object())
+        self.closed_on = []
+        self.climate_service = mock.Mock()
+        self.climate_service.fetch_climate_fields.side_effect = self.sleep(0.3, {'temperature_data': {}})
+        reuse_engine = mock.Mock()
+        reuse_engine.find_covering_analysis.return_value = None
+
+        patches = [
+            mock.patch('environmental_analysis.services.SiteAnalysis'),
+            mock.patch('environmental_analysis.services.transaction'),
+            mock.patch('environmental_analysis.services.ClimateDataService', return_value=self.climate_service),
+            mock.patch('environmental_analysis.services.AnalysisReuseEngine', return_value=reuse_engine),
+            mock.patch('environmental_analysis.services.close_old_connections',
+                       side_effect=lambda: self.closed_on.append(threading.current_thread().name)),
+            mock.patch.object(self.service, 'extract_osm_features', side_effect=self.sleep(0.3, [])),
+            mock.patch.object(self.service, 'save_features_to_db', return_value={}),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sleep(self, seconds, result):
+        def stage(*args):
+            time.sleep(seconds)
+            return result
+        return stage
+
+    def test_stages_overlap_and_are_timed(self):
+        events = []
+        started = time.perf_counter()
+        site_analysis = self.service.analyze_site(
+            12.97, 77.59, 500, progress_callback=lambda *event: events.append(event[:2])
+        )
+
+        self.assertLess(time.perf_counter() - started, 0.55)
+        timings = site_analysis.stage_timings
+        self.assertEqual(set(timings), {'osm', 'climate', 'save', 'total'})
+        self.assertGreaterEqual(timings['osm'], 0.3)
+        self.assertGreaterEqual(timings['climate'], 0.3)
+        self.assertLess(timings['total'], timings['osm'] + timings['climate'])
+        for stage in EnvironmentalAnalysisService.ANALYSIS_STAGES:
+            self.assertLess(events.index((stage, 'running')), events.index((stage, 'completed')))
+        self.climate_service.save_climate_data.assert_called_once_with(site_analysis, {'temperature_data': {}})
+
+    def test_stage_threads_close_their_connections(self):
+        self.service.analyze_site(12.97, 77.59, 500)
+
+        self.assertEqual(len(self.closed_on), 2)
+        self.assertTrue(all(name.startswith('analysis-stage') for name in self.closed_on))
+
+    def test_connections_are_closed_when_a_stage_fails(self):
+        self.service.extract_osm_features.side_effect = RuntimeError("Overpass down")
+        self.climate_service.fetch_climate_fields.side_effect = RuntimeError("API down")
+
+        with self.assertRaises(RuntimeError):
+            self.service.analyze_site(12.97, 77.59, 500)
+        self.assertEqual(len(self.closed_on), 2)
+
+    def test_climate_failure_keeps_the_analysis(self):
+        self.climate_service.fetch_climate_fields.side_effect = RuntimeError("API down")
+
+        site_analysis = self.service.analyze_site(12.97, 77.59, 500)
+
+        self.climate_service.save_climate_data.assert_called_once_with(site_analysis, None)
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase
+
+from environmental_analysis.models import AnalysisSummary, SiteAnalysis
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+class AnalysisSummaryTests(SimpleTestCase):
+    def setUp(self):
+        self.site_analysis = SiteAnalysis(id=1, name="Site", location=Point(77.59, 12.97, srid=4326),
+                                          analysis_radius=500)
+        self.summary = AnalysisSummary(
+            site_analysis=self.site_analysis, total_features=3, total_area_sqm=1234.567,
+            feature_counts={'landuse': 2, 'natural': 1},
+            area_by_type_sqm={'landuse': 1000.0, 'natural': 234.567},
+            bbox=[77.58, 12.96, 77.6, 12.98], updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        )
+        patcher = mock.patch('environmental_analysis.services.get_summary', return_value=self.summary)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = EnvironmentalAnalysisService(feature_source=object())
+
+    def test_summary_fields(self):
+        summary = self.service.get_analysis_summary(self.site_analysis)
+
+        self.assertEqual(summary['total_features'], 3)
+        self.assertEqual(summary['total_area_sqm'], 1234.57)
+        self.assertEqual(summary['area_by_type_sqm'], {'landuse': 1000.0, 'natural': 234.57})
+        self.assertEqual(summary['analysis_radius'], 500)
+        self.assertEqual(summary['center_coordinates'], {'latitude': 12.97, 'longitude': 77.59})
+        self.assertNotIn('clipped_area_sqm', summary)
+
+    def test_approximate_total_area_is_kept_as_an_alias(self):
+        summary = self.service.get_analysis_summary(self.site_analysis)
+        self.assertEqual(summary['approximate_total_area_sqm'], summary['total_area_sqm'])
+
+    def test_clipped_area_uses_the_summary_version(self):
+        features = mock.Mock()
+        features.area_by_type.return_value = {'landuse': 800.004, 'natural': 200.0}
+        engine = mock.Mock()
+        engine.get_features.return_value = features
+
+        with mock.patch('environmental_analysis.services.get_measurement_engine', return_value=engine):
+            summary = self.service.get_analysis_summary(self.site_analysis, clip_to_site=True)
+
+        engine.get_features.assert_called_once_with(self.site_analysis, self.summary.updated_at)
+        features.area_by_type.assert_called_once_with(clip=True)
+        self.assertEqual(summary['clipped_area_sqm'], 1000.0)
+        self.assertEqual(summary['clipped_area_by_type_sqm'], {'landuse': 800.0, 'natural': 200.0})
@@ -0,0 +1,167 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import geopandas as gpd
+
+from django.test import SimpleTestCase
+
+from environmental_analysis.batch import (
+    MAX_RADIUS, BatchAnalysisService, BatchValidationError, group_sites, haversine_m, parse_sites_csv,
+    validate_sites,
+)
+
+# Degrees of latitude per kilometre
+KM = 1 / 111.32
+
+
+class SiteValidationTests(SimpleTestCase):
+    def test_parse_csv_with_aliases(self):
+        sites = parse_sites_csv("lat,lng,radius,name\n12.97,77.59,1000,HQ\n13.0,77.6,,\n")
+        self.assertEqual(sites[0], {'latitude': '12.97', 'longitude': '77.59', 'radius': '1000', 'name': 'HQ'})
+        self.assertEqual(sites[1]['radius'], 500)
+
+    def test_validate_sites(self):
+        sites = validate_sites([{'latitude': '12.97', 'longitude': '77.59', 'radius': '1000'}])
+        self.assertEqual(sites, [{'latitude': 12.97, 'longitude': 77.59, 'radius': 1000, 'name': None}])
+
+        for invalid in ({'latitude': 95, 'longitude': 0}, {'latitude': 'x', 'longitude': 0},
+                        {'latitude': 0, 'longitude': 0, 'radius': 5000}):
+            with self.assertRaises(BatchValidationError):
+                validate_sites([invalid])
+        with self.assertRaises(BatchValidationError):
+            validate_sites([])
+
+
+class GroupSitesTests(SimpleTestCase):
+    def test_group_circle_covers_every_member(self):
+        sites = validate_sites([
+            {'latitude': 12.9600, 'longitude': 77.5900, 'radius': 500},
+            {'latitude': 12.9610, 'longitude': 77.5920, 'radius': 1000},
+            {'latitude': 13.2000, 'longitude': 77.8000, 'radius': 500},
+        ])
+        groups = group_sites(sites, cell_meters=2000)
+
+        self.assertEqual(sorted(sorted(group['members']) for group in groups), [[0, 1], [2]])
+        for group in groups:
+            for index in group['members']:
+                site = sites[index]
+                distance = haversine_m(group['latitude'], group['longitude'], site['latitude'], site['longitude'])
+                self.assertLessEqual(distance + site['radius'], group['radius'])
+
+    def test_groups_are_no_larger_than_a_single_site_query(self):
+        # All in one 2 km grid cell, but a single circle would need about 2.4 km
+        cell_south = 722 * 2 * KM
+        sites = validate_sites([
+            {'latitude': cell_south + 0.1 * KM, 'longitude': 77.5900, 'radius': 1500},
+            {'latitude': cell_south + 1.9 * KM, 'longitude': 77.5900, 'radius': 1500},
+            {'latitude': cell_south + 1.0 * KM, 'longitude': 77.5900, 'radius': 500},
+        ])
+        groups = group_sites(sites, cell_meters=2000)
+
+        self.assertEqual(sorted(sorted(group['members']) for group in groups), [[0, 2], [1]])
+        for group in groups:
+            self.assertLessEqual(group['radius'], MAX_RADIUS)
+        self.assertEqual(sorted(index for group in groups for index in group['members']), [0, 1, 2])
+
+    def test_single_site_group_keeps_its_radius(self):
+        sites = validate_sites([{'latitude': 12.96, 'longitude': 77.59, 'radius': MAX_RADIUS}])
+        self.assertEqual(group_sites(sites, cell_meters=2000)[0]['radius'], MAX_RADIUS)
+
+
+class ProcessGroupTests(SimpleTestCase):
+    SITES = validate_sites([
+        {'latitude': 12.9600, 'longitude': 77.5900, 'radius': 500},
+        {'latitude': 12.9610, 'longitude': 77.5920, 'radius': 500},
+    ])
+
+    def setUp(self):
+        self.service = BatchAnalysisService(max_workers=1)
+        self.service.analysis_service = mock.Mock(TAG_FILTERS={'landuse': True})
+        self.service.analysis_service.feature_source.get_features.return_value = gpd.GeoDataFrame(
+            geometry=[], crs='EPSG:4326'
+        )
+        self.service.analysis_service.process_osm_features.return_value = []
+        self.group = group_sites(self.SITES, cell_meters=2000)[0]
+        self.source = SimpleNamespace(id=7)
+
+        patcher = mock.patch('environmental_analysis.batch.AnalysisReuseEngine')
+        self.engine = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.engine.derive_features.return_value = [{'osm_id': 'way/1'}]
+
+    def test_covered_group_skips_the_source(self):
+        self.engine.find_covering_analysis.return_value = self.source
+
+        results = self.service._process_group(self.SITES, self.group)
+
+        self.service.analysis_service.feature_source.get_features.assert_not_called()
+        self.assertEqual(results, {0: ([{'osm_id': 'way/1'}], self.source), 1: ([{'osm_id': 'way/1'}], self.source)})
+
+    def test_uncovered_members_share_a_smaller_query(self):
+        self.engine.find_covering_analysis.side_effect = [self.source, None]
+
+        results = self.service._process_group(self.SITES, self.group)
+
+        latitude, longitude, radius, _ = self.service.analysis_service.feature_source.get_features.call_args.args
+        self.assertEqual((latitude, longitude), (self.SITES[1]['latitude'], self.SITES[1]['longitude']))
+        self.assertEqual(radius, 500)
+        self.assertEqual(results[0][1], self.source)
+        self.assertEqual(results[1], ([], None))
+
+    def test_reuse_errors_fall_back_to_the_source(self):
+        self.engine.find_covering_analysis.side_effect = RuntimeError("reuse lookup failed")
+
+        results = self.service._process_group(self.SITES, self.group)
+
+        self.service.analysis_service.feature_source.get_features.assert_called_once()
+        self.assertEqual(results, {0: ([], None), 1: ([], None)})
+
+
+class BatchRunTests(SimpleTestCase):
+    SITES = validate_sites([
+        {'latitude': 12.97, 'longitude': 77.59, 'radius': 500},
+        {'latitude': 28.61, 'longitude': 77.21, 'radius': 500},
+    ])
+
+    def setUp(self):
+        self.service = BatchAnalysisService(max_workers=1)
+        self.service._process_group = lambda sites, group: {
+            index: ([{'osm_id': index}], None) for index in group['members']
+        }
+        self.service._fetch_climate = lambda site: {'temperature_data': {}}
+        self.service.save = mock.Mock(side_effect=lambda sites, features, climate: [
+            (index, SimpleNamespace(id=100 + index)) for index in sorted(features)
+        ])
+
+    def test_each_group_is_saved_when_complete(self):
+        events = list(self.service.run(self.SITES))
+
+        self.assertEqual(self.service.save.call_count, 2)
+        for call in self.service.save.call_args_list:
+            self.assertEqual(len(call.args[1]), 1)
+        saved_sites = [event for event in events if event.get('status') == 'saved']
+        self.assertEqual(sorted(event['analysis_id'] for event in saved_sites), [100, 101])
+        self.assertEqual(events[-1], {
+            'event': 'saved',
+            'analyses': [{'index': 0, 'analysis_id': 100}, {'index': 1, 'analysis_id': 101}],
+            'failed': [],
+        })
+
+    def test_disconnect_keeps_saved_groups(self):
+        events = self.service.run(self.SITES)
+        for event in events:
+            if event.get('status') == 'saved':
+                break
+        events.close()
+
+        self.assertEqual(self.service.save.call_count, 1)
+
+    def test_failed_group_is_reported(self):
+        def fail(sites, group):
+            raise RuntimeError("Overpass unavailable")
+        self.service._process_group = fail
+
+        events = list(self.service.run(self.SITES))
+
+        self.service.save.assert_not_called()
+        self.assertEqual(events[-1]['failed'], [0, 1])
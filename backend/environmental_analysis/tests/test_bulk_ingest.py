@@ -0,0 +1,105 @@
+from unittest import mock, skipUnless
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from environmental_analysis.bulk_ingest import FeatureCopyIngester, copy_supported, copy_value
+from environmental_analysis.models import EnvironmentalFeature, OSMFeature
+from environmental_analysis.services import EnvironmentalAnalysisService
+from environmental_analysis.tests.utils import create_analysis
+
+
+def feature_data(element_type, element_id, feature_type, geometry, version=0, original=None, **tags):
+    return {
+        'osm_id': OSMFeature.encode_id(element_type, element_id),
+        'element_type': element_type,
+        'element_id': element_id,
+        'version': version,
+        'feature_type': feature_type,
+        'geometry_wkb': GEOSGeometry(geometry, srid=4326).hex.decode(),
+        'original_geometry_wkb': GEOSGeometry(original, srid=4326).hex.decode() if original else None,
+        'properties': tags,
+    }
+
+
+class CopyFormatTests(SimpleTestCase):
+    def test_copy_value(self):
+        self.assertEqual(copy_value(None), '\\N')
+        self.assertEqual(copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+        self.assertEqual(copy_value(42), '42')
+
+    def test_rows_are_chunked(self):
+        rows = [(1, feature_data('way', i, 'landuse', 'POINT (77.59 12.97)', name=f'Tab\t{i}')) for i in range(5)]
+        chunks = list(FeatureCopyIngester(chunk_size=2)._chunks(rows))
+
+        self.assertEqual([count for _, count in chunks], [2, 2, 1])
+        lines = ''.join(data for data, _ in chunks).splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(all(len(line.split('\t')) == 9 for line in lines))
+        self.assertIn('Tab\\\\t0', lines[0])
+
+    @override_settings(FEATURE_INGEST_METHOD='orm')
+    def test_orm_method_disables_copy(self):
+        self.assertFalse(copy_supported())
+
+
+@skipUnless(connection.vendor == 'postgresql', "COPY ingest needs PostgreSQL")
+class IngestMethodTests(TestCase):
+    def setUp(self):
+        self.service = EnvironmentalAnalysisService(feature_source=object())
+        self.analyses = [create_analysis(name="First"), create_analysis(name="Second")]
+        square = 'POLYGON ((77.59 12.97, 77.6 12.97, 77.6 12.98, 77.59 12.98, 77.59 12.97))'
+        self.features = [
+            (self.analyses[0], [
+                feature_data('way', 1, 'landuse', square, version=2, original=square, landuse='forest'),
+                feature_data('node', 1, 'natural', 'POINT (77.59 12.97)', natural='tree', name='Tab\there'),
+                # Downloaded twice in one batch; the higher version is kept
+                feature_data('way', 2, 'highway', 'LINESTRING (77.59 12.97, 77.6 12.97)', version=1, highway='path'),
+                feature_data('way', 2, 'highway', 'LINESTRING (77.59 12.97, 77.6 12.97)', version=3, highway='path'),
+            ]),
+            (self.analyses[1], [
+                feature_data('way', 1, 'landuse', 'POINT (77.595 12.975)', version=2, original=square, landuse='forest'),
+            ]),
+        ]
+
+    def ingest(self, method):
+        with override_settings(FEATURE_INGEST_METHOD=method):
+            self.service.ingest_features(self.features)
+        features = sorted(
+            (f.site_analysis_id, f.osm_id, f.feature_type, f.geometry.wkt, f.osm_feature.element_type,
+             f.osm_feature.element_id, f.osm_feature.version, f.osm_feature.tags, f.osm_feature.geometry.wkt)
+            for f in EnvironmentalFeature.objects.select_related('osm_feature')
+        )
+        elements = OSMFeature.objects.count()
+        EnvironmentalFeature.objects.all().delete()
+        OSMFeature.objects.all().delete()
+        return features, elements
+
+    def test_copy_and_orm_store_the_same_rows(self):
+        copied = self.ingest('copy')
+        self.assertEqual(copied, self.ingest('orm'))
+        self.assertEqual(copied[1], 3)
+        self.assertEqual(len(copied[0]), 4)
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_retagging_invalidates_linked_analyses(self, invalidate):
+        with override_settings(FEATURE_INGEST_METHOD='copy'):
+            self.service.ingest_features(self.features)
+            later = create_analysis(name="Later")
+            with self.captureOnCommitCallbacks(execute=True):
+                self.service.ingest_features([(later, [
+                    feature_data('way', 1, 'landuse', 'POINT (77.59 12.97)', version=3, landuse='meadow'),
+                    feature_data('node', 1, 'natural', 'POINT (77.59 12.97)', natural='tree', name='Tab\there'),
+                ])])
+
+        # Only the retagged forest is shared by both earlier analyses
+        self.assertEqual(
+            sorted(call.args[0] for call in invalidate.call_args_list), [self.analyses[0].id, self.analyses[1].id]
+        )
+
+    def test_existing_features_are_skipped(self):
+        with override_settings(FEATURE_INGEST_METHOD='copy'):
+            self.service.ingest_features(self.features)
+            self.service.ingest_features(self.features)
+        self.assertEqual(EnvironmentalFeature.objects.count(), 4)
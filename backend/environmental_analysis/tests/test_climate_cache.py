@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from environmental_analysis.climate_cache import CURRENT_WEATHER, NASA_POWER, ClimateCache, DjangoCacheBackend
+from environmental_analysis.local_cache import LocalLRUBackend
+
+
+class ClimateCacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ClimateCache(LocalLRUBackend(), grid_degrees=0.01)
+
+    def test_nearby_coordinates_share_a_key(self):
+        self.assertEqual(
+            self.cache.make_key(CURRENT_WEATHER, 12.9712, 77.5946),
+            self.cache.make_key(CURRENT_WEATHER, 12.9688, 77.5938),
+        )
+
+    def test_distant_coordinates_and_sources_get_different_keys(self):
+        key = self.cache.make_key(CURRENT_WEATHER, 12.97, 77.59)
+        self.assertNotEqual(key, self.cache.make_key(CURRENT_WEATHER, 12.99, 77.59))
+        self.assertNotEqual(key, self.cache.make_key(NASA_POWER, 12.97, 77.59))
+
+    def test_snapping_handles_negative_coordinates(self):
+        self.assertEqual(self.cache.snap(-33.8671, -151.2069), (-33.87, -151.21))
+
+    def test_hit_within_grid_cell(self):
+        self.cache.set(CURRENT_WEATHER, 12.9712, 77.5946, {'temperature': 24})
+        self.assertEqual(self.cache.get(CURRENT_WEATHER, 12.9688, 77.5938), {'temperature': 24})
+        self.assertIsNone(self.cache.get(NASA_POWER, 12.9712, 77.5946))
+
+        stats = self.cache.stats()['sources']
+        self.assertEqual(stats[CURRENT_WEATHER]['hits'], 1)
+        self.assertEqual(stats[NASA_POWER]['misses'], 1)
+
+
+@mock.patch('environmental_analysis.local_cache.time.monotonic')
+class ClimateCacheExpiryTests(SimpleTestCase):
+    @override_settings(CLIMATE_DATA_CACHE_HOURS=6, CLIMATE_HISTORICAL_CACHE_HOURS=24)
+    def test_entries_expire_after_source_ttl(self, monotonic):
+        cache = ClimateCache(LocalLRUBackend())
+        monotonic.return_value = 1000.0
+        cache.set(CURRENT_WEATHER, 12.97, 77.59, {'temperature': 24})
+        cache.set(NASA_POWER, 12.97, 77.59, {'daily': []})
+
+        monotonic.return_value = 1000.0 + 6 * 3600 - 1
+        self.assertIsNotNone(cache.get(CURRENT_WEATHER, 12.97, 77.59))
+
+        monotonic.return_value = 1000.0 + 6 * 3600
+        self.assertIsNone(cache.get(CURRENT_WEATHER, 12.97, 77.59))
+        self.assertIsNotNone(cache.get(NASA_POWER, 12.97, 77.59))
+        self.assertEqual(cache.backend.evictions, 1)
+
+    @override_settings(CLIMATE_DATA_CACHE_HOURS=0)
+    def test_zero_ttl_disables_caching(self, monotonic):
+        monotonic.return_value = 0.0
+        cache = ClimateCache(LocalLRUBackend())
+        cache.set(CURRENT_WEATHER, 12.97, 77.59, {'temperature': 24})
+        self.assertIsNone(cache.get(CURRENT_WEATHER, 12.97, 77.59))
+        self.assertEqual(cache.backend.entries, 0)
+
+    def test_least_recently_used_entry_is_evicted(self, monotonic):
+        monotonic.return_value = 0.0
+        backend = LocalLRUBackend(max_entries=2)
+        backend.set('a', 1, ttl=60)
+        backend.set('b', 2, ttl=60)
+        backend.get('a')
+        backend.set('c', 3, ttl=60)
+
+        self.assertEqual((backend.get('a'), backend.get('b'), backend.get('c')), (1, None, 3))
+        self.assertEqual(backend.evictions, 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DjangoCacheBackendTests(SimpleTestCase):
+    def test_clear_invalidates_every_entry(self):
+        backend = DjangoCacheBackend('default')
+        backend.set('climate:current_weather:12.970000:77.590000', {'temperature': 24}, ttl=60)
+        self.assertIsNotNone(backend.get('climate:current_weather:12.970000:77.590000'))
+
+        backend.clear()
+        self.assertIsNone(backend.get('climate:current_weather:12.970000:77.590000'))
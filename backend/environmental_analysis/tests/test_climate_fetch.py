@@ -0,0 +1,101 @@
+import asyncio
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from environmental_analysis.climate_cache import CURRENT_WEATHER, NASA_POWER, ClimateCache
+from environmental_analysis.http_client import AsyncHTTPClient
+from environmental_analysis.local_cache import LocalLRUBackend
+from environmental_analysis.services import ClimateDataService
+
+LAT, LON = 12.97, 77.59
+
+
+def fetcher(result, delay=0.0, error=None):
+    """Async source fetcher that answers after a delay"""
+    calls = []
+
+    async def fetch(session, lat, lon):
+        calls.append((lat, lon))
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    fetch.calls = calls
+    return fetch
+
+
+class ClimateFetchTests(SimpleTestCase):
+    def setUp(self):
+        self.client = AsyncHTTPClient()
+        self.addCleanup(self.client.close)
+        self.cache = ClimateCache(LocalLRUBackend(), grid_degrees=0.01)
+        self.service = ClimateDataService(cache=self.cache, http_client=self.client)
+        self.service.openweather_key = 'key'
+        self.service.api_timeout = 5
+        self.service.SOURCE_TIMEOUTS = {CURRENT_WEATHER: 5, NASA_POWER: 5}
+        patcher = mock.patch.object(self.service, '_get_mock_data', side_effect=lambda source, lat, lon: {'mock': source})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use_fetchers(self, current, nasa):
+        self.service._fetch_current_weather = current
+        self.service._fetch_nasa_power_data = nasa
+
+    def test_sources_are_fetched_concurrently(self):
+        self.use_fetchers(fetcher({'temperature': 24}, delay=0.3), fetcher({'solar': 5}, delay=0.3))
+
+        started = time.perf_counter()
+        results = self.service.get_climate_sources(LAT, LON)
+
+        self.assertLess(time.perf_counter() - started, 0.55)
+        self.assertEqual(results, {CURRENT_WEATHER: {'temperature': 24}, NASA_POWER: {'solar': 5}})
+
+    def test_results_are_cached(self):
+        current, nasa = fetcher({'temperature': 24}), fetcher({'solar': 5})
+        self.use_fetchers(current, nasa)
+
+        self.service.get_climate_sources(LAT, LON)
+        self.service.get_climate_sources(LAT + 0.001, LON)
+
+        self.assertEqual((len(current.calls), len(nasa.calls)), (1, 1))
+
+    def test_slow_source_falls_back_to_mock_data(self):
+        self.service.SOURCE_TIMEOUTS = {CURRENT_WEATHER: 0.05, NASA_POWER: 5}
+        self.use_fetchers(fetcher({'temperature': 24}, delay=1), fetcher({'solar': 5}))
+
+        results = self.service.get_climate_sources(LAT, LON)
+
+        self.assertEqual(results, {CURRENT_WEATHER: {'mock': CURRENT_WEATHER}, NASA_POWER: {'solar': 5}})
+        # Fallbacks are not cached, so the next request tries the source again
+        self.assertIsNone(self.cache.get(CURRENT_WEATHER, LAT, LON))
+        self.assertEqual(self.cache.get(NASA_POWER, LAT, LON), {'solar': 5})
+
+    def test_overall_deadline_cancels_pending_sources(self):
+        self.service.api_timeout = 0.1
+        self.use_fetchers(fetcher({'temperature': 24}), fetcher({'solar': 5}, delay=2))
+
+        started = time.perf_counter()
+        results = self.service.get_climate_sources(LAT, LON)
+
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(results, {CURRENT_WEATHER: {'temperature': 24}, NASA_POWER: {'mock': NASA_POWER}})
+
+    def test_failed_source_falls_back_to_mock_data(self):
+        self.use_fetchers(fetcher(None, error=RuntimeError("boom")), fetcher(None))
+
+        results = self.service.get_climate_sources(LAT, LON)
+
+        self.assertEqual(results, {CURRENT_WEATHER: {'mock': CURRENT_WEATHER}, NASA_POWER: {'mock': NASA_POWER}})
+
+    def test_missing_api_key_skips_current_weather(self):
+        self.service.openweather_key = None
+        current = fetcher({'temperature': 24})
+        self.use_fetchers(current, fetcher({'solar': 5}))
+
+        results = self.service.get_climate_sources(LAT, LON)
+
+        self.assertEqual(results[CURRENT_WEATHER], {'mock': CURRENT_WEATHER})
+        self.assertEqual(current.calls, [])
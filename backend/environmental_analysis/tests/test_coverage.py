@@ -0,0 +1,196 @@
+import io
+import math
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+import shapely
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, override_settings
+
+from environmental_analysis.coverage import (
+    CLASS_CODES, CoverageEngine, Grid, burn_polygons, coverage_class, distance_transform, encode_png,
+)
+from environmental_analysis.models import SiteAnalysis
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'coverage-tests'}}
+
+
+def decode_png(data):
+    """Width, height and RGBA pixels of a PNG written by encode_png"""
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks, position = {}, 8
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack('>I', data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body), kind
+        chunks[kind] = body
+        position += 12 + length
+    width, height, depth, color_type = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    assert (depth, color_type) == (8, 6)
+    scanlines = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, width * 4 + 1)
+    assert not scanlines[:, 0].any()
+    return width, height, scanlines[:, 1:].reshape(height, width, 4)
+
+
+def brute_force_mask(polygons, grid):
+    centers = grid.centers()
+    x, y = np.meshgrid(centers, centers[::-1])
+    union = shapely.union_all(polygons)
+    return shapely.contains_xy(union, x, y)
+
+
+class CoverageClassTests(SimpleTestCase):
+    def test_classes(self):
+        self.assertEqual(coverage_class({'leisure': 'park'}), 'green')
+        self.assertEqual(coverage_class({'highway': 'footway'}), 'paved')
+        self.assertEqual(coverage_class({'waterway': 'stream'}), 'water')
+        self.assertIsNone(coverage_class({'highway': 'motorway'}))
+        self.assertIsNone(coverage_class({}))
+
+    def test_last_burned_class_wins(self):
+        self.assertEqual(coverage_class({'leisure': 'park', 'natural': 'water'}), 'water')
+
+
+class BurnPolygonsTests(SimpleTestCase):
+    def setUp(self):
+        self.grid = Grid(50, 1.0)
+
+    def test_matches_point_in_polygon(self):
+        rng = np.random.default_rng(7)
+        polygons = np.array([
+            shapely.Polygon(rng.uniform(-60, 60, size=(8, 2))).convex_hull,
+            shapely.Point(10, -5).buffer(17.3),
+            shapely.box(-45.2, 20.7, -10.1, 48.9),
+        ], dtype=object)
+        mask = burn_polygons(polygons, self.grid)
+        np.testing.assert_array_equal(mask, brute_force_mask(polygons, self.grid))
+
+    def test_holes_stay_empty(self):
+        donut = shapely.Point(0, 0).buffer(30).difference(shapely.Point(0, 0).buffer(10))
+        mask = burn_polygons(np.array([donut], dtype=object), self.grid)
+
+        np.testing.assert_array_equal(mask, brute_force_mask([donut], self.grid))
+        self.assertFalse(mask[self.grid.size // 2, self.grid.size // 2])
+        self.assertAlmostEqual(mask.sum(), math.pi * (30 ** 2 - 10 ** 2), delta=60)
+
+    def test_multipolygons_and_empty_input(self):
+        multi = shapely.MultiPolygon([shapely.box(-40, -40, -20, -20), shapely.box(20, 20, 40, 40)])
+        mask = burn_polygons(np.array([multi], dtype=object), self.grid)
+        self.assertEqual(mask.sum(), 2 * 20 * 20)
+        self.assertFalse(burn_polygons(np.array([], dtype=object), self.grid).any())
+
+
+class DistanceTransformTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        mask = np.random.default_rng(3).random((23, 31)) > 0.97
+        targets = np.argwhere(mask)
+        cells = np.indices(mask.shape).reshape(2, -1).T
+        expected = np.sqrt(((cells[:, None, :] - targets[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+        np.testing.assert_allclose(distance_transform(mask), expected.reshape(mask.shape))
+
+    def test_empty_mask_is_infinitely_far(self):
+        self.assertTrue(np.isinf(distance_transform(np.zeros((4, 4), dtype=bool))).all())
+
+
+class PNGTests(SimpleTestCase):
+    def test_encode_png(self):
+        rgba = np.random.default_rng(1).integers(0, 256, size=(5, 7, 4), dtype=np.uint8)
+        width, height, pixels = decode_png(encode_png(rgba))
+        self.assertEqual((width, height), (7, 5))
+        np.testing.assert_array_equal(pixels, rgba)
+
+
+class CoverageEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = CoverageEngine(cache_seconds=0)
+        self.tags = [{'leisure': 'park'}, {'highway': 'footway'}, {'natural': 'water'}, {'building': 'yes'}]
+        self.geometries = np.array([
+            shapely.box(-10, -10, 10, 10),
+            shapely.LineString([(-100, 50), (100, 50)]),
+            shapely.box(5, 5, 15, 15),
+            shapely.box(-90, -90, 90, 90),
+        ], dtype=object)
+
+    def test_metrics(self):
+        result = self.engine.compute(100, self.tags, self.geometries, 1.0)
+        metrics = result.metrics
+        site_area = metrics['site_area_sqm']
+
+        self.assertAlmostEqual(site_area, math.pi * 100 ** 2, delta=100)
+        # The pond takes the 5 x 5 m corner it shares with the park
+        self.assertEqual(metrics['classes']['green']['area_sqm'], 400 - 25)
+        self.assertEqual(metrics['classes']['water']['area_sqm'], 100)
+        self.assertAlmostEqual(metrics['classes']['paved']['area_sqm'], 2 * math.sqrt(100 ** 2 - 50 ** 2) * 3, delta=10)
+        self.assertAlmostEqual(metrics['covered_fraction'], sum(
+            value['area_sqm'] for value in metrics['classes'].values()) / site_area, places=3)
+        self.assertEqual(metrics['distance_to_green']['cell_size_m'], 1.0)
+        # Farthest site cell from the park is on the circle, along an axis
+        self.assertAlmostEqual(metrics['distance_to_green']['max_m'], 100 - 10, delta=1)
+
+    def test_distance_grid_is_reduced(self):
+        engine = CoverageEngine(distance_max_cells=50, cache_seconds=0)
+        result = engine.compute(100, self.tags, self.geometries, 1.0)
+        self.assertEqual(result.distance.shape, (50, 50))
+        self.assertEqual(result.metrics['distance_to_green']['cell_size_m'], 4.0)
+
+    def test_without_green_space(self):
+        result = self.engine.compute(100, [{'highway': 'path'}], self.geometries[1:2], 5.0)
+        self.assertIsNone(result.metrics['distance_to_green'])
+        self.assertEqual(decode_png(result.png('distance'))[:2], (40, 40))
+
+    def test_layers(self):
+        result = self.engine.compute(100, self.tags, self.geometries, 2.0)
+
+        classes = np.load(io.BytesIO(result.npy('classes')))
+        self.assertEqual(classes.dtype, np.uint8)
+        self.assertEqual(classes[50, 50], CLASS_CODES['green'])
+        self.assertEqual(classes[0, 0], 0)
+        distance = np.load(io.BytesIO(result.npy('distance')))
+        self.assertEqual(distance[50, 50], 0)
+        self.assertTrue(np.isnan(distance[0, 0]))
+
+        width, height, pixels = decode_png(result.png('classes'))
+        self.assertEqual((width, height), (100, 100))
+        self.assertEqual(tuple(pixels[50, 50]), (76, 175, 80, 255))
+        self.assertEqual(pixels[0, 0, 3], 0)
+        with self.assertRaises(ValueError):
+            result.layer('elevation')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CoverageCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.site_analysis = SiteAnalysis(id=1, location=Point(77.59, 12.97, srid=4326), analysis_radius=100)
+        self.summary = mock.Mock(updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        features = mock.Mock(tags=[{'leisure': 'park'}], geometries=np.array([shapely.box(-5, -5, 5, 5)], dtype=object))
+        self.measurement = mock.Mock()
+        self.measurement.get_features.return_value = features
+        for target, value in (('get_summary', self.summary), ('get_measurement_engine', self.measurement)):
+            patcher = mock.patch(f'environmental_analysis.coverage.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.engine = CoverageEngine(cache_alias='default', cache_seconds=60)
+        self.addCleanup(self.engine.cache.clear)
+
+    def test_results_are_cached_until_features_change(self):
+        first = self.engine.get_coverage(self.site_analysis, 5.0)
+        self.assertEqual(self.engine.get_coverage(self.site_analysis, 5.0).metrics, first.metrics)
+        self.assertEqual(self.measurement.get_features.call_count, 1)
+
+        self.engine.get_coverage(self.site_analysis, 10.0)
+        self.assertEqual(self.measurement.get_features.call_count, 2)
+
+        self.summary.updated_at += timedelta(seconds=1)
+        self.engine.get_coverage(self.site_analysis, 5.0)
+        self.assertEqual(self.measurement.get_features.call_count, 3)
+
+    @override_settings(COVERAGE_MAX_GRID_CELLS=100)
+    def test_cell_size_limits(self):
+        for cell_size in (0.1, 1.0, 200):
+            with self.assertRaises(ValueError, msg=cell_size):
+                self.engine.get_coverage(self.site_analysis, cell_size)
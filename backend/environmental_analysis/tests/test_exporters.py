@@ -0,0 +1,153 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+import geopandas as gpd
+import shapely
+from django.test import SimpleTestCase, TestCase
+
+from environmental_analysis.exporters import (
+    export_response, features_frame, stream_geojson, stream_geojson_gzip, write_flatgeobuf, write_geoparquet,
+)
+
+from .utils import create_analysis, create_feature
+
+
+def export_url(site_analysis, format):
+    return f'/api/environmental/analysis/{site_analysis.id}/export?format={format}'
+
+
+class GeoJSONGzipTests(SimpleTestCase):
+    def test_gzip_stream_decompresses_to_the_document(self):
+        pieces = ['{"type": "FeatureCollection", "features": [', '{"id": 1}' * 2000, ']}']
+        with mock.patch('environmental_analysis.exporters.stream_geojson', return_value=iter(pieces)):
+            chunks = list(stream_geojson_gzip(SimpleNamespace(id=1)))
+
+        self.assertEqual(gzip.decompress(b''.join(chunks)).decode(), ''.join(pieces))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_response(SimpleNamespace(id=1), 'shapefile')
+
+
+def analysis_with_rows(rows):
+    """Stand-in analysis whose feature query returns rows of (osm_id, feature_type, tags, WKB)"""
+    features = mock.Mock()
+    features.annotate.return_value.values_list.return_value.iterator.return_value = iter(rows)
+    return SimpleNamespace(id=1, features=features)
+
+
+class FeaturesFrameTests(SimpleTestCase):
+    ROWS = [
+        (1, 'landuse', {'landuse': 'forest', 'levels': 3, 'heritage': True}, shapely.to_wkb(shapely.box(0, 0, 1, 1))),
+        (2, 'highway', {'highway': 'footway', 'ref': ['A', 'B'], 'survey': {'date': '2024'}},
+         shapely.to_wkb(shapely.LineString([(0, 0), (1, 1)]))),
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_values_that_are_not_strings_are_written_as_json(self):
+        frame = features_frame(analysis_with_rows(self.ROWS))
+
+        self.assertEqual(frame.loc[0, 'levels'], '3')
+        self.assertEqual(frame.loc[0, 'heritage'], 'true')
+        self.assertEqual(json.loads(frame.loc[1, 'ref']), ['A', 'B'])
+        self.assertEqual(json.loads(frame.loc[1, 'survey']), {'date': '2024'})
+        self.assertTrue(frame['ref'].isna()[0])
+        self.assertEqual(str(frame['ref'].dtype), 'string')
+
+    def test_empty_analysis(self):
+        frame = features_frame(analysis_with_rows([]))
+        self.assertEqual(list(frame.columns), ['osm_id', 'feature_type', 'geometry'])
+        self.assertTrue(frame.empty)
+
+    def assert_round_trip(self, exported):
+        self.assertEqual(list(exported['osm_id']), [1, 2])
+        self.assertEqual(list(exported['feature_type']), ['landuse', 'highway'])
+        self.assertEqual(list(exported['landuse'].fillna('')), ['forest', ''])
+        self.assertEqual(exported['levels'][0], '3')
+        self.assertEqual(json.loads(exported['ref'][1]), ['A', 'B'])
+        self.assertEqual(json.loads(exported['survey'][1]), {'date': '2024'})
+        self.assertTrue(exported.geometry[0].equals(shapely.box(0, 0, 1, 1)))
+        self.assertEqual(exported.geometry[1].geom_type, 'LineString')
+
+    def test_flatgeobuf_round_trip(self):
+        path = os.path.join(self.directory, 'analysis.fgb')
+        write_flatgeobuf(analysis_with_rows(self.ROWS), path)
+
+        exported = gpd.read_file(path, engine='pyogrio')
+        self.assertEqual(exported.crs.to_epsg(), 4326)
+        # The packed spatial index reorders features
+        self.assert_round_trip(exported.sort_values('osm_id').reset_index(drop=True))
+
+    def test_geoparquet_round_trip(self):
+        path = os.path.join(self.directory, 'analysis.parquet')
+        write_geoparquet(analysis_with_rows(self.ROWS), path)
+
+        exported = gpd.read_parquet(path)
+        self.assertEqual(exported.crs.to_epsg(), 4326)
+        self.assert_round_trip(exported)
+
+
+class GeoJSONExportTests(TestCase):
+    def setUp(self):
+        self.site_analysis = create_analysis()
+        self.forest = create_feature(
+            self.site_analysis, 'POLYGON((77.59 12.97, 77.591 12.97, 77.591 12.971, 77.59 12.97))',
+            tags={'landuse': 'forest', 'name': 'Cubbon "Park"'},
+        )
+        self.path = create_feature(
+            self.site_analysis, 'LINESTRING(77.592 12.972, 77.593 12.973)',
+            feature_type='highway', tags={'highway': 'footway'},
+        )
+
+    def test_document_is_streamed_in_chunks(self):
+        pieces = list(stream_geojson(self.site_analysis, chunk_size=1))
+        self.assertGreater(len(pieces), 3)
+
+        document = json.loads(''.join(pieces))
+        self.assertEqual(document['type'], 'FeatureCollection')
+        features = {feature['id']: feature for feature in document['features']}
+        self.assertEqual(set(features), {self.forest.osm_id, self.path.osm_id})
+
+        forest = features[self.forest.osm_id]
+        self.assertEqual(forest['geometry']['type'], 'Polygon')
+        self.assertEqual(forest['properties'], {
+            'landuse': 'forest', 'name': 'Cubbon "Park"',
+            'feature_type': 'landuse', 'analysis_id': self.site_analysis.id,
+        })
+        self.assertEqual(features[self.path.osm_id]['geometry']['coordinates'], [[77.592, 12.972], [77.593, 12.973]])
+
+    def test_empty_analysis_is_a_valid_document(self):
+        document = json.loads(''.join(stream_geojson(create_analysis(name="Empty"))))
+        self.assertEqual(document, {'type': 'FeatureCollection', 'features': []})
+
+    def test_geojson_response_streams(self):
+        response = self.client.get(export_url(self.site_analysis, 'geojson'))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        document = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(document['features']), 2)
+
+    def test_gzipped_response_matches_plain_geojson(self):
+        plain = b''.join(self.client.get(export_url(self.site_analysis, 'geojson')).streaming_content)
+        response = self.client.get(export_url(self.site_analysis, 'geojson-gz'))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn(f'analysis_{self.site_analysis.id}.geojson.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    def test_binary_export_is_an_attachment(self):
+        response = self.client.get(export_url(self.site_analysis, 'geoparquet'))
+
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        self.assertIn(f'analysis_{self.site_analysis.id}.parquet', response['Content-Disposition'])
+        self.assertEqual(b''.join(response.streaming_content)[:4], b'PAR1')
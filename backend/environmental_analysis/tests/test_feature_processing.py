@@ -0,0 +1,69 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from django.test import SimpleTestCase
+
+from environmental_analysis.services import EnvironmentalAnalysisService
+
+
+def osmnx_gdf(rows):
+    """GeoDataFrame shaped like OSMnx output from (element, id, tags, geometry) rows"""
+    index = pd.MultiIndex.from_tuples([(element, element_id) for element, element_id, _, _ in rows],
+                                      names=['element', 'id'])
+    data = pd.DataFrame([tags for _, _, tags, _ in rows], index=index)
+    return gpd.GeoDataFrame(data, geometry=[geometry for _, _, _, geometry in rows], crs='EPSG:4326')
+
+
+class ProcessOSMFeaturesTests(SimpleTestCase):
+    def setUp(self):
+        self.service = EnvironmentalAnalysisService(feature_source=object())
+        self.gdf = osmnx_gdf([
+            ('way', 10, {'landuse': 'forest', 'natural': 'wood', 'name': 'Old Wood'}, shapely.box(77.59, 12.97, 77.6, 12.98)),
+            ('node', 10, {'natural': 'tree', 'height': np.int64(12)}, shapely.Point(77.59, 12.97)),
+            ('way', 11, {'highway': 'footway'}, shapely.LineString([(77.59, 12.97), (77.6, 12.97)])),
+            ('relation', 12, {'leisure': 'park', 'amenity': 'park'}, shapely.box(77.58, 12.96, 77.59, 12.97)),
+            ('way', 13, {'name': 'Untyped'}, shapely.box(77.57, 12.96, 77.58, 12.97)),
+            ('way', 14, {'landuse': 'grass'}, None),
+            ('way', 15, {'landuse': 'grass'}, shapely.Polygon()),
+        ])
+
+    def test_matches_per_row_processing(self):
+        per_row = [
+            feature for feature in (
+                self.service.process_osm_feature(row, osm_id) for osm_id, row in self.gdf.iterrows()
+            ) if feature is not None
+        ]
+        vectorized = self.service.process_osm_features(self.gdf)
+
+        self.assertEqual(len(vectorized), len(per_row))
+        self.assertEqual(len(vectorized), 5)
+        for fast, slow in zip(vectorized, per_row):
+            for key in ('osm_id', 'element_type', 'element_id', 'feature_type', 'properties'):
+                self.assertEqual(fast[key], slow[key], key)
+            self.assertTrue(shapely.equals(shapely.from_wkb(fast['geometry_wkb']), shapely.from_wkt(slow['geometry_wkt'])))
+
+    def test_feature_types_follow_priority(self):
+        features = self.service.process_osm_features(self.gdf)
+        self.assertEqual(
+            [feature['feature_type'] for feature in features],
+            ['landuse', 'natural', 'highway', 'leisure', 'other'],
+        )
+
+    def test_node_and_way_with_same_id_stay_distinct(self):
+        features = self.service.process_osm_features(self.gdf)
+        self.assertNotEqual(features[0]['osm_id'], features[1]['osm_id'])
+
+    def test_malformed_elements_are_dropped(self):
+        gdf = osmnx_gdf([
+            ('way', 1 << 61, {'landuse': 'forest'}, shapely.box(0, 0, 1, 1)),
+            ('way', 20, {'landuse': 'grass'}, shapely.box(1, 1, 2, 2)),
+        ])
+        with self.assertLogs('environmental_analysis.services', level='WARNING') as logs:
+            features = self.service.process_osm_features(gdf)
+
+        self.assertEqual([feature['element_id'] for feature in features], [20])
+        self.assertIn('Dropped 1 malformed', logs.output[0])
+
+    def test_empty_input(self):
+        self.assertEqual(self.service.process_osm_features(self.gdf.iloc[5:]), [])
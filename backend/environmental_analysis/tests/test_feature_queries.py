@@ -0,0 +1,134 @@
+import json
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+
+from environmental_analysis.feature_queries import (
+    features_page, parse_bbox, parse_fields, parse_tag_filter, render_page, search_features,
+)
+from environmental_analysis.models import EnvironmentalFeature
+from environmental_analysis.tests.utils import create_analysis, create_feature
+
+TAGS = 'osm_feature__tags'
+
+
+class ParseTests(SimpleTestCase):
+    def test_fields_always_include_the_cursor(self):
+        self.assertEqual(parse_fields('geometry,feature_type'), ['id', 'feature_type', 'geometry'])
+        self.assertEqual(parse_fields(None), ['id', 'feature_type', 'osm_id', 'properties', 'geometry'])
+        with self.assertRaises(ValueError):
+            parse_fields('id,color')
+
+    def test_bbox(self):
+        self.assertEqual(parse_bbox('77.5,12.9,77.6,13.0').extent, (77.5, 12.9, 77.6, 13.0))
+        for invalid in ('77.5,12.9,77.6', '77.6,12.9,77.5,13.0', 'a,b,c,d'):
+            with self.assertRaises(ValueError):
+                parse_bbox(invalid)
+
+    def test_render_page_validates_parameters(self):
+        features = EnvironmentalFeature.objects.none()
+        for limit, precision, simplify in ((-1, None, None), (10 ** 6, None, None), (10, 16, None), (10, None, -1)):
+            with self.assertRaises(ValueError):
+                render_page(features, {}, limit, None, simplify, precision)
+
+
+class TagFilterTests(SimpleTestCase):
+    def test_key_and_values(self):
+        self.assertEqual(
+            parse_tag_filter('leisure=park; name ;access=yes'),
+            Q(**{f'{TAGS}__has_key': 'name'}) & Q(**{f'{TAGS}__contains': {'leisure': 'park', 'access': 'yes'}}),
+        )
+
+    def test_any_of_values(self):
+        self.assertEqual(
+            parse_tag_filter('natural=[water, wetland]'),
+            Q(**{f'{TAGS}__contains': {'natural': 'water'}}) | Q(**{f'{TAGS}__contains': {'natural': 'wetland'}}),
+        )
+
+    def test_custom_field(self):
+        self.assertEqual(parse_tag_filter('name', field='tags'), Q(tags__has_key='name'))
+
+    def test_malformed_filters(self):
+        for invalid in ('', ';', '=park', 'leisure=', 'natural=[]', 'leisure=park;leisure=garden'):
+            with self.assertRaises(ValueError, msg=invalid):
+                parse_tag_filter(invalid)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.site_analysis = create_analysis()
+        self.features = [
+            create_feature(self.site_analysis, f'POINT ({77.59 + i * 0.001} 12.97)',
+                           feature_type='natural' if i % 2 else 'landuse')
+            for i in range(5)
+        ]
+
+    def page(self, **kwargs):
+        return json.loads(features_page(self.site_analysis, **kwargs))
+
+    def test_pages_cover_every_feature_once(self):
+        ids, after = [], None
+        while True:
+            page = self.page(after=after, limit=2, fields='id')
+            ids.extend(feature['id'] for feature in page['features'])
+            after = page['next_cursor']
+            if after is None:
+                break
+        self.assertEqual(ids, [feature.id for feature in self.features])
+
+    def test_last_full_page_has_no_cursor(self):
+        page = self.page(limit=5, fields='id')
+        self.assertEqual(page['count'], 5)
+        self.assertIsNone(page['next_cursor'])
+
+    def test_feature_type_filter_and_projection(self):
+        page = self.page(feature_type='natural', fields='feature_type,geometry')
+        self.assertEqual([feature['feature_type'] for feature in page['features']], ['natural', 'natural'])
+        self.assertEqual(set(page['features'][0]), {'id', 'feature_type', 'geometry'})
+        self.assertEqual(page['features'][0]['geometry']['type'], 'Point')
+
+    def test_other_analyses_are_not_listed(self):
+        create_feature(create_analysis(name="Other"), 'POINT (77.59 12.97)')
+        self.assertEqual(self.page(limit=100)['count'], 5)
+
+
+@skipUnless(connection.vendor == 'postgresql', "JSONB tag filters and ST_Scale need PostGIS")
+class TagQueryTests(TestCase):
+    def setUp(self):
+        self.site_analysis = create_analysis()
+        create_feature(self.site_analysis, 'POINT (77.59 12.97)', 'leisure', {'leisure': 'park', 'name': 'North Park'})
+        create_feature(self.site_analysis, 'POINT (77.60 12.97)', 'natural', {'natural': 'water'})
+        create_feature(self.site_analysis, 'POINT (77.61 12.97)', 'natural', {'natural': 'wetland', 'name': 'Marsh'})
+        create_feature(self.site_analysis, 'POINT (77.62 12.97)', 'natural', {'natural': 'scrub'})
+
+    def names(self, tags):
+        page = json.loads(features_page(self.site_analysis, tags=tags, fields='properties'))
+        return sorted(feature['properties'].get('name', feature['properties'].get('natural'))
+                      for feature in page['features'])
+
+    def test_tag_filters(self):
+        self.assertEqual(self.names('leisure=park'), ['North Park'])
+        self.assertEqual(self.names('natural=[water,wetland]'), ['Marsh', 'water'])
+        self.assertEqual(self.names('name'), ['Marsh', 'North Park'])
+        self.assertEqual(self.names('name;natural=wetland'), ['Marsh'])
+
+    def test_search_across_analyses(self):
+        other = create_analysis(name="Other")
+        create_feature(other, 'POINT (77.59 12.97)', 'leisure', {'leisure': 'park'})
+
+        page = json.loads(search_features('leisure=park', analysis_ids=[self.site_analysis.id, other.id],
+                                          fields='id'))
+        self.assertEqual(sorted(feature['analysis_id'] for feature in page['features']),
+                         sorted([self.site_analysis.id, other.id]))
+
+    def test_simplify_tolerance_is_metric_at_high_latitude(self):
+        site_analysis = create_analysis(latitude=60.0, longitude=10.0)
+        # Zigzag of 3 m east-west along a 1 km north-south line
+        offset = 3 / (111_320 * 0.5)
+        coordinates = ', '.join(f'{10.0 + (offset if i % 2 else 0)} {60.0 + i * 0.001}' for i in range(10))
+        create_feature(site_analysis, f'LINESTRING ({coordinates})', 'highway', {'highway': 'path'})
+
+        page = json.loads(features_page(site_analysis, fields='geometry', simplify=5))
+        self.assertEqual(len(page['features'][0]['geometry']['coordinates']), 2)
@@ -0,0 +1,57 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from environmental_analysis.tests.utils import create_analysis, create_feature
+
+SEARCH_URL = '/api/environmental/features/search'
+
+
+@override_settings(FEATURES_SEARCH_MAX_ANALYSES=3)
+class SearchValidationTests(SimpleTestCase):
+    def assertError(self, params, message):
+        response = self.client.get(SEARCH_URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(message, response.json()['error'])
+
+    def test_invalid_parameters(self):
+        self.assertError({'tags': 'leisure=park', 'analysis_ids': '1,x'}, "comma-separated list of integers")
+        self.assertError({'tags': 'leisure=park', 'analysis_ids': '1,2,3,4'}, "At most 3 analyses")
+        self.assertError({'tags': 'leisure=park', 'last': 4}, "last must be between 1 and 3")
+        self.assertError({'tags': 'leisure=park;leisure=garden', 'analysis_ids': '1'}, "leisure")
+        self.assertError({'tags': 'natural=[]', 'analysis_ids': '1'}, "natural")
+
+    def test_tags_are_required(self):
+        self.assertEqual(self.client.get(SEARCH_URL).status_code, 422)
+
+
+@skipUnless(connection.vendor == 'postgresql', "JSONB tag filters need PostgreSQL")
+class SearchTests(TestCase):
+    def setUp(self):
+        self.analyses = [create_analysis(name=f"Site {i}") for i in range(3)]
+        for site_analysis in self.analyses:
+            create_feature(site_analysis, 'POINT (77.59 12.97)', 'leisure', {'leisure': 'park'})
+            create_feature(site_analysis, 'POINT (77.60 12.97)', 'natural', {'natural': 'water'})
+
+    def search(self, **params):
+        return self.client.get(SEARCH_URL, {'fields': 'id', **params}).json()
+
+    def test_searches_the_most_recent_analyses(self):
+        page = self.search(tags='leisure=park', last=2)
+        recent = {site_analysis.id for site_analysis in self.analyses[1:]}
+        self.assertEqual(set(page['analysis_ids']), recent)
+        self.assertEqual({feature['analysis_id'] for feature in page['features']}, recent)
+
+    def test_search_pages(self):
+        ids = ','.join(str(site_analysis.id) for site_analysis in self.analyses)
+        first = self.search(tags='leisure', analysis_ids=ids, limit=2)
+        second = self.search(tags='leisure', analysis_ids=ids, limit=2, after=first['next_cursor'])
+        self.assertEqual(first['count'] + second['count'], 3)
+        self.assertIsNone(second['next_cursor'])
+
+    def test_analysis_features_tag_filter(self):
+        site_analysis = self.analyses[0]
+        page = self.client.get(f'/api/environmental/analysis/{site_analysis.id}/features',
+                               {'tags': 'natural=[water,wetland]', 'fields': 'feature_type'}).json()
+        self.assertEqual([feature['feature_type'] for feature in page['features']], ['natural'])
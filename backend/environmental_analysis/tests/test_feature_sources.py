@@ -0,0 +1,49 @@
+from unittest import mock
+
+import shapely
+from django.test import SimpleTestCase
+
+from environmental_analysis.feature_sources import (
+    ExtractFeatureSource, FeatureSource, OverpassFeatureSource, get_feature_source,
+)
+
+
+def row(element_id, tags):
+    return 'way', element_id, shapely.to_wkb(shapely.box(element_id, 0, element_id + 1, 1)), tags
+
+
+class FeatureSourceTests(SimpleTestCase):
+    def test_sources_must_implement_get_features(self):
+        class Incomplete(FeatureSource):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_source_by_name(self):
+        self.assertIsInstance(get_feature_source('overpass'), OverpassFeatureSource)
+        with self.settings(OSM_FEATURE_SOURCE='extract'):
+            self.assertIsInstance(get_feature_source(), ExtractFeatureSource)
+        with self.assertRaises(ValueError):
+            get_feature_source('shapefile')
+
+
+class ExtractFeatureSourceTests(SimpleTestCase):
+    def get_features(self, rows, tags):
+        with mock.patch('environmental_analysis.feature_sources.connection') as connection:
+            connection.cursor.return_value.__enter__.return_value.fetchall.return_value = rows
+            return ExtractFeatureSource().get_features(12.97, 77.59, 500, tags)
+
+    def test_rows_are_filtered_by_the_requested_tags(self):
+        rows = [
+            row(1, {'landuse': 'forest'}),
+            row(2, {'highway': 'footway'}),
+            row(3, {'highway': 'primary'}),
+            row(4, {'building': 'yes'}),
+        ]
+        gdf = self.get_features(rows, {'landuse': True, 'highway': ['footway', 'path']})
+        self.assertEqual(list(gdf.index), [('way', 1), ('way', 2)])
+
+    def test_no_matching_rows(self):
+        gdf = self.get_features([row(1, {'building': 'yes'})], {'landuse': True})
+        self.assertTrue(gdf.empty)
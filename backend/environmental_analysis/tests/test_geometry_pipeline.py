@@ -0,0 +1,157 @@
+import math
+
+import numpy as np
+import shapely
+from django.test import SimpleTestCase
+from pyproj import Geod
+
+from environmental_analysis.geometry_pipeline import GeometryPipeline, feature_geometries
+
+LATITUDE, LONGITUDE = 12.97, 77.59
+
+
+def offset(east_m, north_m):
+    """Coordinate a given number of meters east and north of the site center"""
+    return (
+        LONGITUDE + east_m / (111_320 * math.cos(math.radians(LATITUDE))),
+        LATITUDE + north_m / 111_320,
+    )
+
+
+def feature(geometry, osm_id=1):
+    return {
+        'osm_id': osm_id, 'feature_type': 'highway', 'properties': {},
+        'geometry_wkb': shapely.to_wkb(geometry, hex=True),
+    }
+
+
+class GeometryPipelineTests(SimpleTestCase):
+    def process(self, geometries, radius=500, **options):
+        pipeline = GeometryPipeline(**options)
+        return pipeline.process_features(
+            [feature(geometry, osm_id) for osm_id, geometry in enumerate(geometries)], LATITUDE, LONGITUDE, radius
+        )
+
+    def test_simplify_drops_vertices_within_the_tolerance(self):
+        # A path wobbling 10 cm either side of a straight line
+        wobbly = shapely.LineString([offset(x, 0.1 * (-1) ** x) for x in range(-200, 201)])
+
+        features, stats = self.process([wobbly], clip=False, simplify_tolerance_m=1.0, grid_size_degrees=0)
+
+        simplified = shapely.from_wkb(features[0]['geometry_wkb'])
+        self.assertEqual(shapely.get_num_coordinates(simplified), 2)
+        self.assertEqual((stats['vertices_before'], stats['vertices_after']), (401, 2))
+        self.assertGreater(stats['vertex_reduction'], 0.99)
+        self.assertLess(stats['bytes_after'], stats['bytes_before'])
+        self.assertEqual(stats['features_dropped'], 0)
+
+    def test_coordinates_are_snapped_to_the_grid(self):
+        line = shapely.LineString([offset(-10.123, 3.456), offset(10.789, -4.321)])
+
+        features, _ = self.process([line], clip=False, simplify_tolerance_m=0, grid_size_degrees=1e-6)
+
+        coordinates = shapely.get_coordinates(shapely.from_wkb(features[0]['geometry_wkb']))
+        np.testing.assert_allclose(coordinates, np.round(coordinates, 6), rtol=0, atol=1e-9)
+        np.testing.assert_allclose(coordinates, shapely.get_coordinates(line), rtol=0, atol=1e-6)
+
+    def test_clip_keeps_only_the_site(self):
+        inside = shapely.Point(offset(100, 100))
+        crossing = shapely.LineString([offset(-1000, 0), offset(1000, 0)])
+        outside = shapely.Point(offset(800, 800))
+
+        features, stats = self.process([inside, crossing, outside], simplify_tolerance_m=0, grid_size_degrees=0)
+
+        self.assertEqual([feature['osm_id'] for feature in features], [0, 1])
+        self.assertEqual(stats['features_dropped'], 1)
+        clipped = shapely.from_wkb(features[1]['geometry_wkb'])
+        west, _, east, _ = clipped.bounds
+        self.assertAlmostEqual(west, offset(-500, 0)[0], places=5)
+        self.assertAlmostEqual(east, offset(500, 0)[0], places=5)
+        # The stored original is the unclipped line
+        self.assertTrue(shapely.from_wkb(features[1]['original_geometry_wkb']).equals(crossing))
+
+    def test_invalid_polygons_are_repaired_before_clipping(self):
+        bowtie = shapely.Polygon([offset(-50, -50), offset(50, 50), offset(50, -50), offset(-50, 50)])
+
+        features, _ = self.process([bowtie], simplify_tolerance_m=0, grid_size_degrees=0)
+
+        self.assertTrue(shapely.is_valid(shapely.from_wkb(features[0]['geometry_wkb'])))
+
+    def test_disabled_pipeline_keeps_geometries(self):
+        line = shapely.LineString([offset(-1000, 0), offset(1000, 0)])
+
+        features, stats = self.process([line], clip=False, simplify_tolerance_m=0, grid_size_degrees=0)
+
+        self.assertTrue(shapely.from_wkb(features[0]['geometry_wkb']).equals(line))
+        self.assertEqual(stats['vertex_reduction'], 0.0)
+        self.assertEqual(stats['bytes_before'], stats['bytes_after'])
+
+    def test_no_features(self):
+        features, stats = self.process([])
+        self.assertEqual(features, [])
+        self.assertEqual(stats['vertices_before'], 0)
+        self.assertEqual(stats['vertex_reduction'], 0.0)
+
+    def test_settings_configure_the_pipeline(self):
+        with self.settings(GEOMETRY_CLIP_TO_SITE=False, GEOMETRY_SIMPLIFY_TOLERANCE_M=2.5,
+                           GEOMETRY_GRID_SIZE_DEGREES=1e-7):
+            pipeline = GeometryPipeline()
+        self.assertEqual((pipeline.clip, pipeline.simplify_tolerance_m, pipeline.grid_size_degrees),
+                         (False, 2.5, 1e-7))
+
+
+class GeodesicClipTests(SimpleTestCase):
+    GEOD = Geod(ellps='WGS84')
+
+    def clip(self, geometry, latitude, longitude, radius):
+        pipeline = GeometryPipeline(clip=True, simplify_tolerance_m=0, grid_size_degrees=0)
+        return pipeline.run(np.array([geometry], dtype=object), latitude, longitude, radius)[0]
+
+    def test_clipped_ends_lie_on_the_geodesic_circle(self):
+        # At 60 degrees a circle drawn in degrees would be twice as wide as tall
+        for latitude, longitude in ((12.97, 77.59), (60.17, 24.94)):
+            for azimuth in (0, 45, 90):
+                east, north, _ = self.GEOD.fwd(longitude, latitude, azimuth, 1500)
+                west, south, _ = self.GEOD.fwd(longitude, latitude, azimuth + 180, 1500)
+                line = shapely.LineString([(west, south), (east, north)])
+
+                clipped = self.clip(line, latitude, longitude, 1000)
+
+                for end_longitude, end_latitude in shapely.get_coordinates(clipped):
+                    _, _, distance = self.GEOD.inv(longitude, latitude, end_longitude, end_latitude)
+                    # The circle is a 64-gon, within 1.3 m of the true circle at this radius
+                    self.assertAlmostEqual(distance, 1000, delta=1.5)
+
+    def test_polygon_area_matches_the_geodesic_circle(self):
+        latitude, longitude = 60.17, 24.94
+        square = shapely.box(longitude - 0.1, latitude - 0.1, longitude + 0.1, latitude + 0.1)
+
+        clipped = self.clip(square, latitude, longitude, 1000)
+
+        area, _ = self.GEOD.geometry_area_perimeter(clipped)
+        self.assertAlmostEqual(abs(area) / (math.pi * 1000 ** 2), 1, delta=0.005)
+
+
+class SharedOriginalTests(SimpleTestCase):
+    def test_reused_features_are_processed_from_their_original(self):
+        original = shapely.LineString([offset(-1000, 0), offset(1000, 0)])
+        # Stored for a source site 400 m east with a 600 m radius
+        stored = shapely.LineString([offset(-200, 0), offset(1000, 0)])
+        reused = {
+            **feature(stored), 'original_geometry_wkb': shapely.to_wkb(original, hex=True),
+        }
+
+        pipeline = GeometryPipeline(simplify_tolerance_m=0, grid_size_degrees=0)
+        features, stats = pipeline.process_features([reused], LATITUDE, LONGITUDE, 500)
+
+        west, _, east, _ = shapely.from_wkb(features[0]['geometry_wkb']).bounds
+        self.assertAlmostEqual(west, offset(-500, 0)[0], places=5)
+        self.assertAlmostEqual(east, offset(500, 0)[0], places=5)
+        self.assertEqual(features[0]['original_geometry_wkb'], reused['original_geometry_wkb'])
+        self.assertEqual(stats['bytes_before'], len(shapely.to_wkb(original)))
+
+    def test_fresh_features_keep_their_own_geometry_as_original(self):
+        line = shapely.LineString([offset(-100, 0), offset(100, 0)])
+        geometries = feature_geometries([feature(line), {'geometry_wkt': line.wkt}])
+
+        self.assertTrue(all(geometry.equals(line) for geometry in geometries))
@@ -0,0 +1,191 @@
+import contextlib
+import gc
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from environmental_analysis.jobs import AnalysisJobQueue, JobQueueFull, make_request_key
+from environmental_analysis.models import AnalysisJob
+
+
+class RequestKeyTests(SimpleTestCase):
+    def test_same_parameters_share_a_key(self):
+        self.assertEqual(make_request_key(12.97, 77.59, 500), make_request_key(12.9700001, 77.59, 500, ''))
+
+    def test_any_parameter_changes_the_key(self):
+        key = make_request_key(12.97, 77.59, 500, 'Site')
+        self.assertNotEqual(key, make_request_key(12.97, 77.59, 1000, 'Site'))
+        self.assertNotEqual(key, make_request_key(12.98, 77.59, 500, 'Site'))
+        self.assertNotEqual(key, make_request_key(12.97, 77.59, 500, 'Other'))
+
+
+class AnalysisJobQueueTests(TestCase):
+    def setUp(self):
+        self.queue = AnalysisJobQueue(max_workers=1, max_pending=2)
+        # Jobs are handed to the pool but never run
+        self.queue.executor = mock.Mock()
+
+    def test_identical_requests_share_one_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first, created = self.queue.submit(12.97, 77.59, 500)
+        self.assertTrue(created)
+
+        second, created = self.queue.submit(12.97, 77.59, 500)
+        self.assertFalse(created)
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+        self.queue.executor.submit.assert_called_once_with(self.queue._run, first.pk)
+
+    def test_finished_jobs_are_not_reused(self):
+        first, _ = self.queue.submit(12.97, 77.59, 500)
+        AnalysisJob.objects.filter(pk=first.pk).update(status=AnalysisJob.STATUS_COMPLETED)
+
+        second, created = self.queue.submit(12.97, 77.59, 500)
+        self.assertTrue(created)
+        self.assertNotEqual(second.pk, first.pk)
+
+    def test_queue_full(self):
+        for radius in (500, 1000):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.queue.submit(12.97, 77.59, radius)
+
+        with self.assertRaises(JobQueueFull):
+            self.queue.submit(12.97, 77.59, 1500)
+        # A duplicate of an in-flight job needs no slot
+        _, created = self.queue.submit(12.97, 77.59, 500)
+        self.assertFalse(created)
+
+    def test_rolled_back_job_takes_no_slot(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                self.queue.submit(12.97, 77.59, 500)
+                transaction.set_rollback(True)
+
+        self.assertEqual(callbacks, [])
+        gc.collect()
+        self.assertEqual(self.queue._outstanding, 0)
+        self.assertFalse(AnalysisJob.objects.exists())
+        self.queue.executor.submit.assert_not_called()
+
+    def test_finished_run_releases_its_slot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job, _ = self.queue.submit(12.97, 77.59, 500)
+        self.assertEqual(self.queue._outstanding, 1)
+
+        with mock.patch('environmental_analysis.jobs.EnvironmentalAnalysisService') as service, \
+                mock.patch('environmental_analysis.jobs.close_old_connections'):
+            service.return_value.analyze_site.side_effect = RuntimeError("Overpass unavailable")
+            self.queue._run(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.error, "Overpass unavailable")
+        self.assertEqual(self.queue._outstanding, 0)
+
+
+def submit_concurrently(queue, count):
+    """Submit count distinct jobs from threads started together"""
+    barrier = threading.Barrier(count)
+    outcomes = []
+
+    def submit(radius):
+        try:
+            barrier.wait()
+            outcomes.append(queue.submit(12.97, 77.59, radius)[1])
+        except JobQueueFull:
+            outcomes.append('full')
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=submit, args=(100 + i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+class QueueSlotTests(SimpleTestCase):
+    """Slot accounting with the job table and transactions mocked out"""
+
+    def setUp(self):
+        self.queue = AnalysisJobQueue(max_workers=1, max_pending=3)
+        self.queue.executor = mock.Mock()
+        self.pending_callbacks = []
+        self.on_commit = lambda callback: callback()
+
+        def create(**fields):
+            # Widen the window between the capacity check and the commit
+            time.sleep(0.05)
+            return AnalysisJob(pk=fields['radius'], **fields)
+
+        # Not a Mock: its call history would keep discarded callbacks alive
+        fake_transaction = SimpleNamespace(
+            atomic=contextlib.nullcontext,
+            on_commit=lambda callback: self.on_commit(callback),
+        )
+        patches = [
+            mock.patch('environmental_analysis.jobs.transaction', fake_transaction),
+            mock.patch.object(AnalysisJob.objects, 'create', side_effect=create),
+            mock.patch.object(self.queue, '_active_job', return_value=None),
+            mock.patch.object(self.queue, 'expire_stale_jobs'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_concurrent_submits_respect_max_pending(self):
+        outcomes = submit_concurrently(self.queue, self.queue.max_pending + 1)
+
+        self.assertEqual(sorted(outcomes, key=str), [True, True, True, 'full'])
+        self.assertEqual(self.queue._outstanding, 3)
+        self.assertEqual(self.queue.executor.submit.call_count, 3)
+
+    def test_rolled_back_job_releases_its_slot(self):
+        self.on_commit = self.pending_callbacks.append
+        self.queue.submit(12.97, 77.59, 500)
+        self.assertEqual(self.queue._outstanding, 1)
+
+        # A rollback discards the pending callbacks
+        self.pending_callbacks.clear()
+        gc.collect()
+        self.assertEqual(self.queue._outstanding, 0)
+        self.queue.executor.submit.assert_not_called()
+
+    def test_committed_job_keeps_its_slot_until_it_finishes(self):
+        self.on_commit = self.pending_callbacks.append
+        self.queue.submit(12.97, 77.59, 500)
+        self.pending_callbacks.pop()()
+        gc.collect()
+
+        self.assertEqual(self.queue._outstanding, 1)
+        self.queue.executor.submit.assert_called_once_with(self.queue._run, 500)
+
+    def test_failed_insert_releases_its_slot(self):
+        AnalysisJob.objects.create.side_effect = RuntimeError("database unavailable")
+        with self.assertRaises(RuntimeError):
+            self.queue.submit(12.97, 77.59, 500)
+        self.assertEqual(self.queue._outstanding, 0)
+
+    def test_failed_hand_off_releases_its_slot(self):
+        self.queue.executor.submit.side_effect = RuntimeError("executor shut down")
+        with self.assertRaises(RuntimeError):
+            self.queue.submit(12.97, 77.59, 500)
+        gc.collect()
+        self.assertEqual(self.queue._outstanding, 0)
+
+
+class ConcurrentSubmitTests(TransactionTestCase):
+    def test_concurrent_submits_respect_max_pending(self):
+        queue = AnalysisJobQueue(max_workers=1, max_pending=3)
+        queue.executor = mock.Mock()
+
+        outcomes = submit_concurrently(queue, queue.max_pending + 1)
+
+        self.assertEqual(outcomes.count('full'), 1)
+        self.assertEqual(AnalysisJob.objects.count(), 3)
+        self.assertEqual(queue.executor.submit.call_count, 3)
@@ -0,0 +1,134 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+import shapely
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase
+from pyproj import Geod
+
+from environmental_analysis.measurement import (
+    MeasurementEngine, ProjectedFeatures, get_measurement_engine, local_transformer, project, site_circle,
+)
+from environmental_analysis.models import SiteAnalysis
+
+GEOD = Geod(ellps='WGS84')
+
+
+class LocalFrameTests(SimpleTestCase):
+    def test_distances_from_the_center_are_geodesic(self):
+        latitude, longitude = 60.0, 10.0
+        transformer = local_transformer(latitude, longitude)
+        for azimuth in (0, 45, 90, 200):
+            lon, lat, _ = GEOD.fwd(longitude, latitude, azimuth, 1500)
+            projected = project(np.array([shapely.Point(lon, lat)]), transformer)[0]
+            self.assertAlmostEqual(math.hypot(projected.x, projected.y), 1500, delta=0.01)
+
+    def test_inverse_round_trip(self):
+        transformer = local_transformer(12.97, 77.59)
+        geometries = np.array([shapely.box(77.58, 12.96, 77.6, 12.98), shapely.Point(77.59, 12.97)])
+        back = project(project(geometries, transformer), transformer, inverse=True)
+        self.assertTrue(shapely.equals_exact(back, geometries, tolerance=1e-9).all())
+
+    def test_transformers_are_cached_per_center(self):
+        self.assertIs(local_transformer(1.0, 2.0), local_transformer(1.0, 2.0))
+
+    def test_site_circle(self):
+        self.assertAlmostEqual(site_circle(1000).area, math.pi * 1000 ** 2, delta=0.001 * math.pi * 1000 ** 2)
+
+
+class ProjectedFeaturesTests(SimpleTestCase):
+    def test_area_by_type(self):
+        features = ProjectedFeatures(
+            1, None, 100, np.array([1, 2, 3]), np.array(['landuse', 'landuse', 'natural'], dtype=object),
+            [{}, {}, {}],
+            np.array([shapely.box(0, 0, 10, 10), shapely.box(150, 0, 170, 10), shapely.box(90, -10, 110, 10)]),
+        )
+
+        self.assertEqual(features.area_by_type(), {'landuse': 300.0, 'natural': 400.0})
+        clipped = features.area_by_type(clip=True)
+        self.assertEqual(clipped['landuse'], 100.0)
+        # Half of the natural square lies inside the 100 m circle
+        self.assertAlmostEqual(clipped['natural'], 200.0, delta=5)
+        self.assertIs(features.clipped(), features.clipped())
+
+
+class MeasurementEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.site_analysis = SiteAnalysis(id=1, location=Point(77.59, 12.97, srid=4326), analysis_radius=500)
+        self.version = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def engine(self, **kwargs):
+        engine = MeasurementEngine(max_analyses=4, **kwargs)
+        load = mock.patch.object(engine, 'load', side_effect=lambda site_analysis, version: mock.Mock(version=version))
+        self.load = load.start()
+        self.addCleanup(load.stop)
+        return engine
+
+    def test_features_are_reused_until_the_version_changes(self):
+        engine = self.engine(cache_seconds=60)
+
+        first = engine.get_features(self.site_analysis, self.version)
+        self.assertIs(engine.get_features(self.site_analysis, self.version), first)
+        self.assertEqual(self.load.call_count, 1)
+
+        changed = engine.get_features(self.site_analysis, self.version + timedelta(seconds=1))
+        self.assertIsNot(changed, first)
+        self.assertEqual(self.load.call_count, 2)
+        self.assertIs(engine.get_features(self.site_analysis, self.version + timedelta(seconds=1)), changed)
+
+    def test_version_defaults_to_the_summary(self):
+        engine = self.engine(cache_seconds=60)
+        summary = mock.Mock(updated_at=self.version)
+        with mock.patch('environmental_analysis.measurement.get_summary', return_value=summary) as get_summary:
+            engine.get_features(self.site_analysis)
+            summary.updated_at += timedelta(seconds=1)
+            engine.get_features(self.site_analysis)
+
+        self.assertEqual(get_summary.call_count, 2)
+        self.assertEqual([call.args[1] for call in self.load.call_args_list],
+                         [self.version, self.version + timedelta(seconds=1)])
+
+    def test_entries_expire(self):
+        engine = self.engine(cache_seconds=60)
+        with mock.patch('environmental_analysis.local_cache.time.monotonic', return_value=1000.0) as monotonic:
+            engine.get_features(self.site_analysis, self.version)
+            monotonic.return_value = 1061.0
+            engine.get_features(self.site_analysis, self.version)
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_caching_can_be_disabled(self):
+        engine = self.engine(cache_seconds=0)
+        engine.get_features(self.site_analysis, self.version)
+        engine.get_features(self.site_analysis, self.version)
+        self.assertEqual(self.load.call_count, 2)
+
+
+class MeasurementEngineSingletonTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_engine(self):
+        barrier = threading.Barrier(8)
+        engines = []
+
+        def get():
+            barrier.wait()
+            engines.append(get_measurement_engine())
+
+        def slow_engine():
+            # Widen the window between the check and the assignment
+            time.sleep(0.01)
+            return object()
+
+        with mock.patch('environmental_analysis.measurement._measurement_engine', None), \
+                mock.patch('environmental_analysis.measurement.MeasurementEngine',
+                           side_effect=slow_engine) as engine_class:
+            threads = [threading.Thread(target=get) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(engine_class.call_count, 1)
+        self.assertEqual(len({id(engine) for engine in engines}), 1)
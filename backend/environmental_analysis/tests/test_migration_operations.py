@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.db import migrations, models
+from django.db.migrations.state import ModelState, ProjectState
+from django.test import SimpleTestCase
+
+from environmental_analysis.migration_operations import PostgreSQLOnly
+
+
+class PostgreSQLOnlyTests(SimpleTestCase):
+    def setUp(self):
+        self.inner = migrations.AddIndex('place', models.Index(fields=['name'], name='place_name_idx'))
+        self.operation = PostgreSQLOnly(self.inner)
+        self.state = ProjectState()
+        self.state.add_model(ModelState('app', 'Place', [
+            ('id', models.AutoField(primary_key=True)),
+            ('name', models.CharField(max_length=10)),
+        ]))
+
+    def schema_editor(self, vendor):
+        return mock.Mock(connection=mock.Mock(vendor=vendor))
+
+    def test_state_is_updated_on_every_database(self):
+        self.operation.state_forwards('app', self.state)
+        self.assertEqual(self.state.models['app', 'place'].options['indexes'][0].name, 'place_name_idx')
+
+    def test_database_changes_run_on_postgresql_only(self):
+        with mock.patch.object(self.inner, 'database_forwards') as forwards, \
+                mock.patch.object(self.inner, 'database_backwards') as backwards:
+            for vendor in ('sqlite', 'postgresql'):
+                self.operation.database_forwards('app', self.schema_editor(vendor), self.state, self.state)
+                self.operation.database_backwards('app', self.schema_editor(vendor), self.state, self.state)
+
+        self.assertEqual(forwards.call_count, 1)
+        self.assertEqual(backwards.call_count, 1)
+        self.assertEqual(forwards.call_args.args[1].connection.vendor, 'postgresql')
+
+    def test_wrapped_operation_properties(self):
+        run_sql = PostgreSQLOnly(migrations.RunSQL('SELECT 1'))
+        self.assertFalse(run_sql.reversible)
+        self.assertTrue(self.operation.reversible)
+        self.assertIn('PostgreSQL only', self.operation.describe())
+        self.assertEqual(self.operation.migration_name_fragment, self.inner.migration_name_fragment)
@@ -0,0 +1,169 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from environmental_analysis.models import EnvironmentalFeature, OSMFeature
+from environmental_analysis.services import EnvironmentalAnalysisService
+from environmental_analysis.tests.utils import create_analysis, create_feature
+
+
+class EncodedIdTests(SimpleTestCase):
+    def test_round_trip(self):
+        for element_type in ('node', 'way', 'relation'):
+            for element_id in (0, 1, 123456789, (1 << OSMFeature.ELEMENT_ID_BITS) - 1):
+                osm_id = OSMFeature.encode_id(element_type, element_id)
+                self.assertEqual(OSMFeature.decode_id(osm_id), (element_type, element_id))
+
+    def test_same_id_of_different_types_is_distinct(self):
+        ids = {OSMFeature.encode_id(element_type, 42) for element_type in ('node', 'way', 'relation')}
+        self.assertEqual(len(ids), 3)
+
+    def test_encoded_ids_fit_a_bigint(self):
+        self.assertLess(OSMFeature.encode_id('relation', (1 << OSMFeature.ELEMENT_ID_BITS) - 1), 1 << 63)
+
+    def test_untyped_ids_encode_to_themselves(self):
+        self.assertEqual(OSMFeature.encode_id('', 42), 42)
+        self.assertEqual(OSMFeature.decode_id(42), ('', 42))
+        self.assertEqual(OSMFeature.decode_id(-42), ('', -42))
+
+    def test_out_of_range_ids(self):
+        for element_id in (-1, 1 << OSMFeature.ELEMENT_ID_BITS):
+            with self.assertRaises(ValueError):
+                OSMFeature.encode_id('way', element_id)
+
+    def test_osm_id_property(self):
+        self.assertEqual(OSMFeature(element_type='way', element_id=7).osm_id, OSMFeature.encode_id('way', 7))
+
+
+class SaveOSMFeaturesTests(SimpleTestCase):
+    def feature(self, element_type, element_id, version):
+        geometry = GEOSGeometry('POINT (77.59 12.97)', srid=4326)
+        return EnvironmentalFeature(
+            feature_type='natural', osm_id=OSMFeature.encode_id(element_type, element_id), geometry=geometry,
+            osm_feature=OSMFeature(element_type=element_type, element_id=element_id, version=version,
+                                   tags={'version': version}, geometry=geometry),
+        )
+
+    def test_elements_are_stored_once_at_their_highest_version(self):
+        features = [self.feature('way', 1, 2), self.feature('way', 1, 3), self.feature('node', 1, 1)]
+
+        service = EnvironmentalAnalysisService(feature_source=object())
+        with mock.patch.object(OSMFeature.objects, 'bulk_create') as bulk_create, \
+                mock.patch.object(service, 'retagged_elements', return_value=[]):
+            service.save_osm_features(features)
+
+        elements = list(bulk_create.call_args.args[0])
+        self.assertEqual(sorted((e.element_type, e.version) for e in elements), [('node', 1), ('way', 3)])
+        self.assertIs(features[0].osm_feature, features[1].osm_feature)
+        self.assertEqual(features[0].osm_feature.version, 3)
+        self.assertEqual(bulk_create.call_args.kwargs['unique_fields'], ['element_type', 'element_id'])
+        self.assertIn('version', bulk_create.call_args.kwargs['update_fields'])
+
+
+class OSMElementStorageTests(TestCase):
+    def setUp(self):
+        self.service = EnvironmentalAnalysisService(feature_source=object())
+        self.site_analysis = create_analysis()
+
+    def test_new_version_replaces_the_stored_element(self):
+        feature = create_feature(self.site_analysis, 'POINT (77.59 12.97)', tags={'natural': 'tree'})
+        element = feature.osm_feature
+        geometry = GEOSGeometry('POINT (77.6 12.97)', srid=4326)
+        update = EnvironmentalFeature(
+            site_analysis=create_analysis(name="Other"), feature_type='natural', osm_id=element.osm_id,
+            geometry=geometry,
+            osm_feature=OSMFeature(element_type=element.element_type, element_id=element.element_id,
+                                   version=5, tags={'natural': 'wood'}, geometry=geometry),
+        )
+
+        self.service.save_osm_features([update])
+
+        self.assertEqual(OSMFeature.objects.count(), 1)
+        element.refresh_from_db()
+        self.assertEqual((element.version, element.tags), (5, {'natural': 'wood'}))
+        self.assertEqual(update.osm_feature.pk, element.pk)
+
+    def update_for(self, element, tags, version=5):
+        geometry = GEOSGeometry('POINT (77.59 12.97)', srid=4326)
+        return EnvironmentalFeature(
+            site_analysis=create_analysis(name="Update"), feature_type='natural', osm_id=element.osm_id,
+            geometry=geometry,
+            osm_feature=OSMFeature(element_type=element.element_type, element_id=element.element_id,
+                                   version=version, tags=tags, geometry=geometry),
+        )
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_retagged_elements_invalidate_every_linked_analysis(self, invalidate):
+        feature = create_feature(self.site_analysis, 'POINT (77.59 12.97)', tags={'natural': 'tree'})
+        element = feature.osm_feature
+        other = create_analysis(name="Sharing")
+        EnvironmentalFeature.objects.create(
+            site_analysis=other, osm_feature=element, feature_type='natural',
+            osm_id=element.osm_id, geometry=element.geometry,
+        )
+        unchanged = create_feature(create_analysis(name="Unchanged"), 'POINT (77.6 12.97)', tags={'natural': 'rock'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save_osm_features([
+                self.update_for(element, {'natural': 'tree', 'name': 'Old oak'}),
+                self.update_for(unchanged.osm_feature, {'natural': 'rock'}),
+            ])
+
+        self.assertEqual(
+            sorted(call.args[0] for call in invalidate.call_args_list), sorted([self.site_analysis.id, other.id])
+        )
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_same_tags_keep_tiles(self, invalidate):
+        element = create_feature(self.site_analysis, 'POINT (77.59 12.97)', tags={'natural': 'tree'}).osm_feature
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save_osm_features([self.update_for(element, {'natural': 'tree'}, version=6)])
+
+        invalidate.assert_not_called()
+
+    def test_prune_deletes_only_old_unreferenced_elements(self):
+        kept = create_feature(self.site_analysis, 'POINT (77.59 12.97)').osm_feature
+        old = create_feature(self.site_analysis, 'POINT (77.60 12.97)').osm_feature
+        recent = create_feature(self.site_analysis, 'POINT (77.61 12.97)').osm_feature
+        EnvironmentalFeature.objects.filter(osm_feature__in=[old, recent]).delete()
+        OSMFeature.objects.filter(pk__in=[kept.pk, old.pk]).update(updated_at=old.updated_at - timedelta(days=2))
+
+        self.assertEqual(self.service.delete_unreferenced_osm_features(), 1)
+        self.assertEqual(set(OSMFeature.objects.values_list('pk', flat=True)), {kept.pk, recent.pk})
+
+        out = StringIO()
+        call_command('prune_osm_features', '--min-age-hours', '0', stdout=out)
+        self.assertEqual(list(OSMFeature.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertIn("Deleted 1 unreferenced OSM elements", out.getvalue())
+
+
+class LegacyElementMigrationTests(TestCase):
+    def test_untyped_elements_get_negative_sentinels(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        migration = import_module('environmental_analysis.migrations.0014_legacy_element_sentinels')
+        site_analysis = create_analysis()
+        typed = create_feature(site_analysis, 'POINT (77.59 12.97)')
+        legacy = [create_feature(site_analysis, 'POINT (77.60 12.97)', element_type='') for _ in range(2)]
+        for feature, legacy_hash in zip(legacy, (8_123_456_789_012_345_678, -42)):
+            OSMFeature.objects.filter(pk=feature.osm_feature_id).update(element_id=legacy_hash)
+            EnvironmentalFeature.objects.filter(pk=feature.pk).update(osm_id=legacy_hash)
+
+        migration.mark_legacy_elements(apps, None)
+
+        for feature in legacy:
+            feature.refresh_from_db()
+            feature.osm_feature.refresh_from_db()
+            self.assertEqual(feature.osm_feature.element_id, -feature.osm_feature_id)
+            self.assertEqual(feature.osm_id, feature.osm_feature.osm_id)
+            self.assertEqual(OSMFeature.decode_id(feature.osm_id), ('', -feature.osm_feature_id))
+        osm_id = typed.osm_id
+        typed.refresh_from_db()
+        self.assertEqual(typed.osm_id, osm_id)
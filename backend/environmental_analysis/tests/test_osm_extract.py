@@ -0,0 +1,75 @@
+from unittest import mock
+
+import shapely
+from django.test import SimpleTestCase, TestCase
+
+from environmental_analysis.models import OSMExtractFeature
+from environmental_analysis.osm_extract import OSMExtractLoader, is_area, matches_tags
+
+TAG_FILTERS = {'landuse': True, 'highway': ['footway', 'path']}
+
+
+def fake_reader(*batches, error=None):
+    """Stand-in for read_osm_extract that emits the given batches"""
+    def read(path, tag_filters, on_batch, batch_size):
+        for batch in batches:
+            on_batch(batch)
+        if error:
+            raise error
+        return sum(len(batch) for batch in batches)
+    return read
+
+
+def row(element_id, tags, element_type='way'):
+    return element_type, element_id, shapely.to_wkb(shapely.box(element_id, 0, element_id + 1, 1)), tags
+
+
+class TagMatchingTests(SimpleTestCase):
+    def test_matches_tags(self):
+        self.assertTrue(matches_tags({'landuse': 'forest'}, TAG_FILTERS))
+        self.assertTrue(matches_tags({'highway': 'path'}, TAG_FILTERS))
+        self.assertFalse(matches_tags({'highway': 'primary'}, TAG_FILTERS))
+        self.assertFalse(matches_tags({'building': 'yes'}, TAG_FILTERS))
+
+    def test_is_area(self):
+        self.assertTrue(is_area({'landuse': 'forest'}))
+        self.assertFalse(is_area({'highway': 'footway'}))
+        self.assertTrue(is_area({'highway': 'pedestrian', 'area': 'yes'}))
+        self.assertFalse(is_area({'natural': 'tree_row'}))
+
+
+class OSMExtractLoaderTests(TestCase):
+    def setUp(self):
+        self.loader = OSMExtractLoader(TAG_FILTERS)
+
+    def load(self, name, *batches, error=None, replace=True):
+        with mock.patch('environmental_analysis.osm_extract.read_osm_extract', fake_reader(*batches, error=error)):
+            return self.loader.load(f'/data/{name}.osm.pbf', replace=replace)
+
+    def test_reload_replaces_rows_of_the_extract(self):
+        self.load('city', [row(1, {'landuse': 'forest'}), row(2, {'landuse': 'grass'})])
+        self.load('city', [row(2, {'landuse': 'meadow'})])
+
+        rows = OSMExtractFeature.objects.all()
+        self.assertEqual([(feature.element_id, feature.tags) for feature in rows], [(2, {'landuse': 'meadow'})])
+        self.assertEqual(rows[0].extract_name, 'city.osm.pbf')
+
+    def test_shared_elements_take_the_newest_extract(self):
+        self.load('region', [row(1, {'landuse': 'forest'}), row(2, {'landuse': 'grass'})])
+        self.load('city', [row(2, {'landuse': 'meadow'})])
+
+        shared = OSMExtractFeature.objects.get(element_type='way', element_id=2)
+        self.assertEqual(shared.extract_name, 'city.osm.pbf')
+        self.assertEqual(shared.tags, {'landuse': 'meadow'})
+        self.assertEqual(OSMExtractFeature.objects.count(), 2)
+
+    def test_failed_load_keeps_previous_rows(self):
+        self.load('city', [row(1, {'landuse': 'forest'})])
+        with self.assertRaises(RuntimeError):
+            self.load('city', [row(2, {'landuse': 'grass'})], error=RuntimeError("Truncated extract"))
+
+        self.assertEqual(list(OSMExtractFeature.objects.values_list('element_id', flat=True)), [1])
+
+    def test_duplicates_within_a_batch_keep_the_last(self):
+        self.load('city', [row(1, {'landuse': 'forest'}), row(1, {'landuse': 'grass'})])
+        self.assertEqual(OSMExtractFeature.objects.get().tags, {'landuse': 'grass'})
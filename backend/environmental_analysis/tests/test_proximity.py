@@ -0,0 +1,107 @@
+import math
+from unittest import skipUnless
+
+import pandas as pd
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from pyproj import Geod
+
+from environmental_analysis.models import EnvironmentalFeature, SiteAnalysis
+from environmental_analysis.proximity import analysis_proximity, degree_radius, parse_bands
+from environmental_analysis.services import EnvironmentalAnalysisService
+from environmental_analysis.tests.utils import create_analysis, create_feature
+
+GEOD = Geod(ellps='WGS84')
+
+
+def offset(latitude, longitude, azimuth, meters):
+    """Point a geodesic distance away, as WKT"""
+    lon, lat, _ = GEOD.fwd(longitude, latitude, azimuth, meters)
+    return f'POINT ({lon} {lat})'
+
+
+class ParseBandsTests(SimpleTestCase):
+    def test_bands(self):
+        self.assertEqual(parse_bands('100, 250,1000'), [100.0, 250.0, 1000.0])
+        with override_settings(PROXIMITY_DISTANCE_BANDS=[50, 150]):
+            self.assertEqual(parse_bands(None), [50, 150])
+        for invalid in ('0,100', '100,100', '250,100', 'a,b', ','):
+            with self.assertRaises(ValueError, msg=invalid):
+                parse_bands(invalid)
+
+
+class DegreeRadiusTests(SimpleTestCase):
+    def test_radius_contains_the_geodesic_circle(self):
+        for latitude in (0.0, 45.0, -60.0, 80.0):
+            site = Point(10.0, latitude, srid=4326)
+            radius = degree_radius(site, 2000)
+            for azimuth in range(0, 360, 15):
+                lon, lat, _ = GEOD.fwd(site.x, site.y, azimuth, 2000)
+                self.assertLessEqual(math.hypot(lon - site.x, lat - site.y), radius, msg=(latitude, azimuth))
+
+
+class ProximityValidationTests(SimpleTestCase):
+    def setUp(self):
+        self.site_analysis = SiteAnalysis(id=1, location=Point(77.59, 12.97, srid=4326), analysis_radius=500)
+
+    @override_settings(PROXIMITY_MAX_K=10)
+    def test_k_is_capped(self):
+        with self.assertRaisesMessage(ValueError, "k must be between 1 and 10"):
+            analysis_proximity(self.site_analysis, k=11)
+
+    def test_unknown_feature_types(self):
+        with self.assertRaisesMessage(ValueError, "Unknown feature types: volcano"):
+            analysis_proximity(self.site_analysis, feature_types=['other', 'volcano'])
+
+    def test_every_stored_type_is_valid(self):
+        service = EnvironmentalAnalysisService(feature_source=object())
+        stored = {service.determine_feature_type(pd.Series({'name': 'Untyped'}))}
+        stored.update(service.TYPE_PRIORITIES)
+        self.assertLessEqual(stored, {choice[0] for choice in EnvironmentalFeature.FEATURE_TYPES})
+
+
+@skipUnless(connection.vendor == 'postgresql', "Geodesic distances need PostGIS")
+class ProximityTests(TestCase):
+    def setUp(self):
+        self.site_analysis = create_analysis(latitude=60.0, longitude=10.0, radius=2000)
+        site = (60.0, 10.0)
+        # At 60 degrees the east feature is nearer in meters but farther in planar degrees
+        create_feature(self.site_analysis, offset(*site, 0, 400), 'leisure', {'leisure': 'park', 'name': 'North'})
+        create_feature(self.site_analysis, offset(*site, 90, 250), 'leisure', {'leisure': 'park', 'name': 'East'})
+        create_feature(self.site_analysis, offset(*site, 180, 1500), 'leisure', {'leisure': 'garden'})
+        create_feature(self.site_analysis, offset(*site, 270, 50), 'natural', {'natural': 'water'})
+        create_feature(self.site_analysis, offset(*site, 45, 120), 'other', {'name': 'Untyped'})
+
+    def group(self, result, feature_type):
+        return next(group for group in result['groups'] if group['feature_type'] == feature_type)
+
+    def test_nearest_are_ordered_by_geodesic_distance(self):
+        nearest = self.group(analysis_proximity(self.site_analysis, k=2, feature_types=['leisure']), 'leisure')['nearest']
+
+        self.assertEqual([feature['name'] for feature in nearest], ['East', 'North'])
+        self.assertAlmostEqual(nearest[0]['distance_m'], 250, delta=1)
+        self.assertAlmostEqual(nearest[1]['distance_m'], 400, delta=1)
+
+    def test_planar_nearest_is_reranked(self):
+        result = analysis_proximity(self.site_analysis, k=1, feature_types=['leisure'])
+        self.assertEqual([feature['name'] for feature in self.group(result, 'leisure')['nearest']], ['East'])
+
+    def test_distance_bands(self):
+        result = analysis_proximity(self.site_analysis, bands='100,500,1000')
+        self.assertEqual([group['feature_type'] for group in result['groups']], ['leisure', 'natural', 'other'])
+        bands = self.group(result, 'leisure')['distance_bands']
+
+        self.assertEqual([(band['min_m'], band['max_m']) for band in bands],
+                         [(0.0, 100.0), (100.0, 500.0), (500.0, 1000.0), (1000.0, None)])
+        self.assertEqual([band['count'] for band in bands], [0, 2, 0, 1])
+        self.assertEqual([band['count'] for band in self.group(result, 'natural')['distance_bands']], [1, 0, 0, 0])
+
+    def test_tag_filter_and_empty_groups(self):
+        result = analysis_proximity(self.site_analysis, feature_types=['leisure', 'amenity'], tags='name')
+
+        self.assertEqual([feature['name'] for feature in self.group(result, 'leisure')['nearest']], ['East', 'North'])
+        amenity = self.group(result, 'amenity')
+        self.assertEqual(amenity['nearest'], [])
+        self.assertEqual({band['count'] for band in amenity['distance_bands']}, {0})
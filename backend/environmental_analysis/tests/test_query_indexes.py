@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from environmental_analysis.management.commands.benchmark_queries import QUERY_INDEXES, Command
+from environmental_analysis.models import SiteAnalysis
+
+
+def declared_indexes():
+    """Index names declared on the app's models"""
+    return {
+        index.name
+        for model in apps.get_app_config('environmental_analysis').get_models()
+        for index in model._meta.indexes
+    }
+
+
+class QueryIndexSetTests(SimpleTestCase):
+    def test_benchmarked_indexes_are_declared_on_the_models(self):
+        self.assertLessEqual(set(QUERY_INDEXES), declared_indexes())
+
+    def test_index_columns(self):
+        indexes = {
+            index.name: index
+            for model in apps.get_app_config('environmental_analysis').get_models()
+            for index in model._meta.indexes
+        }
+        self.assertEqual(indexes['feature_analysis_type_idx'].fields, ['site_analysis', 'feature_type', 'id'])
+        self.assertEqual(indexes['osm_feature_tags_gin_idx'].fields, ['tags'])
+        self.assertEqual(indexes['feature_analysis_knn_idx'].fields, ['site_analysis', 'feature_type', 'geometry'])
+        self.assertIn('::geography', indexes['site_location_geography_idx'].expressions[0].extra['template'])
+
+    def test_synthetic_features_are_shaped_like_osmnx_output(self):
+        gdf = Command().build_gdf(50, 12.97, 77.59, 1000, np.random.default_rng(0))
+
+        self.assertEqual(len(gdf), 50)
+        self.assertEqual(gdf.index.names, ['element', 'id'])
+        self.assertEqual(gdf.index[0], ('way', 1001))
+        self.assertEqual(set(gdf.columns) - {'geometry'}, set(Command.TAG_VALUES))
+        self.assertEqual(gdf.crs.to_epsg(), 4326)
+
+    def test_needs_postgresql(self):
+        with mock.patch('environmental_analysis.management.commands.benchmark_queries.connection') as fake:
+            fake.vendor = 'sqlite'
+            with self.assertRaises(CommandError):
+                call_command('benchmark_queries', stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'postgresql', "The query benchmark needs PostgreSQL")
+class BenchmarkQueriesCommandTests(TransactionTestCase):
+    def database_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", [QUERY_INDEXES])
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_indexes_exist_after_migrating(self):
+        self.assertEqual(self.database_indexes(), set(QUERY_INDEXES))
+
+    def test_reports_every_query_and_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_queries', analyses=3, features=50, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Seeded 3 analyses x 50 features", output)
+        for label in ("with query indexes", "without query indexes"):
+            self.assertIn(label, output)
+        for name in ('features page by type', 'summary by type', 'export scan', 'tag containment',
+                     'nearest by type', 'tag key across analyses', 'covering analysis'):
+            self.assertEqual(output.count(f"-- {name}"), 2)
+        self.assertIn("speedup", output)
+
+        self.assertFalse(SiteAnalysis.objects.exists())
+        self.assertEqual(self.database_indexes(), set(QUERY_INDEXES))
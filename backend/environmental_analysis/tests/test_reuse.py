@@ -0,0 +1,70 @@
+import math
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from environmental_analysis.models import SiteAnalysis
+from environmental_analysis.reuse import EARTH_RADIUS_M, AnalysisReuseEngine, bbox_from_point
+
+# Degrees of latitude per meter on the OSMnx sphere
+DEGREES_PER_METER = math.degrees(1 / EARTH_RADIUS_M)
+
+
+class BboxFromPointTests(SimpleTestCase):
+    def test_box_spans_the_radius_on_each_side(self):
+        bbox = bbox_from_point(12.97, 77.59, 1000)
+        min_lon, min_lat, max_lon, max_lat = bbox.extent
+
+        self.assertAlmostEqual(max_lat - 12.97, 1000 * DEGREES_PER_METER)
+        self.assertAlmostEqual(12.97 - min_lat, 1000 * DEGREES_PER_METER)
+        self.assertAlmostEqual(max_lon - 77.59, 1000 * DEGREES_PER_METER / math.cos(math.radians(12.97)))
+        self.assertEqual(bbox.srid, 4326)
+
+    def test_reuse_disabled_without_max_age(self):
+        self.assertFalse(AnalysisReuseEngine(max_age_hours=0).enabled)
+
+
+@skipUnless(getattr(connection.ops, 'postgis', False), "Covering analysis lookup needs PostGIS")
+class CoveringAnalysisTests(TestCase):
+    CENTER = (12.97, 77.59)
+
+    def setUp(self):
+        self.engine = AnalysisReuseEngine(max_age_hours=24)
+
+    def create_analysis(self, radius):
+        return SiteAnalysis.objects.create(
+            name=f"Analysis {radius} m",
+            location=Point(self.CENTER[1], self.CENTER[0], srid=4326),
+            analysis_radius=radius,
+        )
+
+    def north_of_center(self, meters):
+        return self.CENTER[0] + meters * DEGREES_PER_METER, self.CENTER[1]
+
+    def test_request_inside_a_larger_buffer_is_covered(self):
+        source = self.create_analysis(2000)
+        latitude, longitude = self.north_of_center(1000)
+        self.assertEqual(self.engine.find_covering_analysis(latitude, longitude, 500), source)
+
+    def test_request_crossing_the_buffer_edge_is_not_covered(self):
+        self.create_analysis(2000)
+        latitude, longitude = self.north_of_center(1600)
+        self.assertIsNone(self.engine.find_covering_analysis(latitude, longitude, 500))
+
+    def test_smaller_radius_is_never_covered(self):
+        self.create_analysis(500)
+        self.assertIsNone(self.engine.find_covering_analysis(*self.CENTER, 1000))
+
+    def test_smallest_covering_analysis_wins(self):
+        self.create_analysis(2000)
+        smaller = self.create_analysis(1000)
+        self.assertEqual(self.engine.find_covering_analysis(*self.CENTER, 500), smaller)
+
+    def test_stale_analyses_are_ignored(self):
+        source = self.create_analysis(2000)
+        SiteAnalysis.objects.filter(pk=source.pk).update(created_at=timezone.now() - timedelta(hours=25))
+        self.assertIsNone(self.engine.find_covering_analysis(*self.CENTER, 500))
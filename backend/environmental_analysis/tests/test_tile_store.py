@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from shapely.geometry import box
+
+from environmental_analysis.models import OSMTile, OSMTileFeature
+from environmental_analysis.tile_store import (
+    OSMTileStore, circle_from_point, rows_to_gdf, tile_bounds, tile_for, tiles_covering,
+)
+
+ZOOM = 14
+TAGS = {'landuse': True}
+
+
+def features_gdf(*features):
+    """OSMnx-style GeoDataFrame from (element_id, shapely geometry, tags)"""
+    return rows_to_gdf(
+        ('way', element_id, shapely.to_wkb(geometry), tags) for element_id, geometry, tags in features
+    )
+
+
+def tile_center(x, y):
+    west, south, east, north = tile_bounds(ZOOM, x, y)
+    return (south + north) / 2, (west + east) / 2
+
+
+class TileMathTests(SimpleTestCase):
+    def test_tile_bounds_contain_the_coordinate(self):
+        x, y = tile_for(12.97, 77.59, ZOOM)
+        west, south, east, north = tile_bounds(ZOOM, x, y)
+        self.assertTrue(west <= 77.59 < east)
+        self.assertTrue(south <= 12.97 < north)
+
+    def test_tiles_covering_a_circle(self):
+        x, y = tile_for(12.97, 77.59, ZOOM)
+        latitude, longitude = tile_center(x, y)
+
+        self.assertEqual(tiles_covering(circle_from_point(latitude, longitude, 100).bounds, ZOOM), [(x, y)])
+        # Zoom 14 tiles are about 2.4 km wide, so a 2 km radius reaches the neighbours
+        tiles = tiles_covering(circle_from_point(latitude, longitude, 2000).bounds, ZOOM)
+        self.assertEqual(len(tiles), 9)
+        self.assertIn((x - 1, y - 1), tiles)
+        self.assertIn((x + 1, y + 1), tiles)
+
+    def test_rows_to_gdf_keeps_the_first_copy_of_an_element(self):
+        gdf = rows_to_gdf([
+            ('way', 1, shapely.to_wkb(box(0, 0, 1, 1)), {'landuse': 'forest'}),
+            ('way', 1, shapely.to_wkb(box(0, 0, 1, 1)), {'landuse': 'forest'}),
+            ('node', 1, shapely.to_wkb(shapely.Point(0, 0)), {'natural': 'tree'}),
+        ])
+        self.assertEqual(list(gdf.index), [('way', 1), ('node', 1)])
+        self.assertEqual(gdf.loc[('node', 1), 'natural'], 'tree')
+        self.assertTrue(pd.isna(gdf.loc[('node', 1), 'landuse']))
+
+    def test_ttl_from_settings(self):
+        with self.settings(OSM_TILE_TTL_HOURS=6):
+            self.assertEqual(OSMTileStore(TAGS).ttl, timedelta(hours=6))
+        with self.settings(OSM_TILE_TTL_HOURS=0):
+            self.assertIsNone(OSMTileStore(TAGS).ttl)
+
+
+class OSMTileStoreTests(TestCase):
+    def setUp(self):
+        self.store = OSMTileStore(TAGS, zoom=ZOOM, ttl_hours=24)
+        self.x, self.y = tile_for(12.97, 77.59, ZOOM)
+
+    def test_store_tile_sets_expiry(self):
+        tile = self.store.store_tile(self.x, self.y, features_gdf(), ttl=timedelta(hours=24))
+        self.assertEqual(tile.expires_at - tile.fetched_at, timedelta(hours=24))
+
+        tile = self.store.store_tile(self.x, self.y, features_gdf(), ttl=None)
+        self.assertIsNone(tile.expires_at)
+        self.assertEqual(OSMTile.objects.count(), 1)
+
+    def test_fresh_tiles_skip_expired_ones(self):
+        self.store.store_tile(self.x, self.y, features_gdf(), ttl=None)
+        self.store.store_tile(self.x + 1, self.y, features_gdf(), ttl=timedelta(hours=1))
+        self.store.store_tile(self.x + 2, self.y, features_gdf(), ttl=timedelta(hours=1))
+        OSMTile.objects.filter(x=self.x + 2).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        tiles = [(self.x, self.y), (self.x + 1, self.y), (self.x + 2, self.y), (self.x + 3, self.y)]
+        self.assertEqual(self.store.fresh_tiles(tiles), {(self.x, self.y), (self.x + 1, self.y)})
+
+    def test_only_missing_and_expired_tiles_are_fetched(self):
+        latitude, longitude = tile_center(self.x, self.y)
+        self.store.store_tile(self.x, self.y, features_gdf(), ttl=None)
+        self.store.store_tile(self.x + 1, self.y, features_gdf(), ttl=timedelta(hours=1))
+        OSMTile.objects.filter(x=self.x + 1).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        with mock.patch.object(self.store, 'fetch_tile') as fetch_tile:
+            self.store.get_features(latitude, longitude, 2000)
+
+        fetched = {call.args for call in fetch_tile.call_args_list}
+        self.assertEqual(len(fetched), 8)
+        self.assertNotIn((self.x, self.y), fetched)
+        self.assertIn((self.x + 1, self.y), fetched)
+
+    def test_fetch_stores_the_tile_with_the_store_ttl(self):
+        gdf = features_gdf((1, box(*tile_bounds(ZOOM, self.x, self.y)).centroid.buffer(0.001), {'landuse': 'grass'}))
+        with mock.patch('environmental_analysis.tile_store.ox.features_from_polygon', return_value=gdf) as query:
+            tile = self.store.fetch_tile(self.x, self.y)
+
+        self.assertEqual(query.call_args.kwargs['tags'], TAGS)
+        self.assertEqual(tile.expires_at - tile.fetched_at, timedelta(hours=24))
+        self.assertEqual(tile.feature_count, 1)
+
+    def test_storing_a_tile_again_replaces_its_features(self):
+        first = features_gdf((1, box(0, 0, 1, 1), {'landuse': 'forest'}), (2, box(1, 0, 2, 1), {'landuse': 'grass'}))
+        self.store.store_tile(self.x, self.y, first)
+        self.store.store_tile(self.x, self.y, features_gdf((2, box(1, 0, 2, 1), {'landuse': 'meadow'})))
+
+        feature = OSMTileFeature.objects.get()
+        self.assertEqual((feature.element_id, feature.tags), (2, {'landuse': 'meadow'}))
+        self.assertEqual(OSMTile.objects.get().feature_count, 1)
+
+    def test_seeding_splits_features_by_tile(self):
+        left = box(*tile_bounds(ZOOM, self.x, self.y)).centroid.buffer(0.001)
+        right = box(*tile_bounds(ZOOM, self.x + 1, self.y)).centroid.buffer(0.001)
+        # Straddles the shared tile edge
+        west, south, east, north = tile_bounds(ZOOM, self.x, self.y)
+        road = shapely.LineString([(east - 0.001, (south + north) / 2), (east + 0.001, (south + north) / 2)])
+        gdf = features_gdf((1, left, {'landuse': 'forest'}), (2, right, {'landuse': 'grass'}), (3, road, {'landuse': 'road'}))
+
+        self.assertEqual(self.store.seed_from_gdf(gdf), 2)
+
+        stored = {
+            x: set(OSMTileFeature.objects.filter(tile__x=x).values_list('element_id', flat=True))
+            for x in (self.x, self.x + 1)
+        }
+        self.assertEqual(stored, {self.x: {1, 3}, self.x + 1: {2, 3}})
+        self.assertFalse(OSMTile.objects.filter(expires_at__isnull=False).exists())
+
+    def test_seeded_features_are_served_once_without_fetching(self):
+        west, south, east, north = tile_bounds(ZOOM, self.x, self.y)
+        road = shapely.LineString([(east - 0.001, (south + north) / 2), (east + 0.001, (south + north) / 2)])
+        self.store.seed_from_gdf(features_gdf((3, road, {'highway': 'path'})))
+
+        with mock.patch.object(self.store, 'fetch_tile') as fetch_tile:
+            gdf = self.store.get_features((south + north) / 2, east, 100)
+
+        fetch_tile.assert_not_called()
+        self.assertEqual(list(gdf.index), [('way', 3)])
+        self.assertIsInstance(gdf, gpd.GeoDataFrame)
+
+
+class SeedOSMTilesCommandTests(TestCase):
+    def test_seeds_tiles_from_an_extract(self):
+        x, y = tile_for(12.97, 77.59, ZOOM)
+        forest = box(*tile_bounds(ZOOM, x, y)).centroid.buffer(0.001)
+
+        def read(path, tags, on_batch):
+            on_batch([('way', 1, shapely.to_wkb(forest), {'landuse': 'forest'})])
+
+        out = StringIO()
+        with mock.patch('environmental_analysis.management.commands.seed_osm_tiles.read_osm_extract', read):
+            call_command('seed_osm_tiles', '/data/city.osm', zoom=ZOOM, ttl_hours=12, stdout=out)
+
+        tile = OSMTile.objects.get()
+        self.assertEqual((tile.x, tile.y, tile.feature_count), (x, y, 1))
+        self.assertEqual(tile.expires_at - tile.fetched_at, timedelta(hours=12))
+        self.assertIn("Seeded 1 tiles", out.getvalue())
@@ -0,0 +1,157 @@
+from unittest import mock
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from environmental_analysis.admin import EnvironmentalFeatureAdmin, OSMFeatureAdmin
+from environmental_analysis.checks import check_shared_caches
+from environmental_analysis.models import EnvironmentalFeature, OSMFeature, SiteAnalysis
+from environmental_analysis.vector_tiles import (
+    MVT_CONTENT_TYPE, TileOutOfRange, VectorTileRenderer, simplify_tolerance,
+)
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiles'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VectorTileCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.renderer = VectorTileRenderer(cache_seconds=60)
+        self.renderer.cache.clear()
+        self.renderer.render = mock.Mock(return_value=b'tile-v1')
+
+    def test_tiles_are_cached_with_a_stable_etag(self):
+        tile, etag = self.renderer.get_tile(1, 14, 11700, 7600)
+        self.assertEqual(self.renderer.get_tile(1, 14, 11700, 7600), (tile, etag))
+        self.assertEqual(self.renderer.render.call_count, 1)
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+    def test_feature_type_order_does_not_split_the_cache(self):
+        self.renderer.get_tile(1, 14, 11700, 7600, ['natural', 'landuse'])
+        self.renderer.get_tile(1, 14, 11700, 7600, ['landuse', 'natural'])
+        self.assertEqual(self.renderer.render.call_count, 1)
+
+    def test_invalidate_drops_only_that_analysis(self):
+        _, old_etag = self.renderer.get_tile(1, 14, 11700, 7600)
+        self.renderer.get_tile(2, 14, 11700, 7600)
+
+        self.renderer.render.return_value = b'tile-v2'
+        self.renderer.invalidate(1)
+
+        _, new_etag = self.renderer.get_tile(1, 14, 11700, 7600)
+        self.assertNotEqual(new_etag, old_etag)
+        self.renderer.get_tile(2, 14, 11700, 7600)
+        self.assertEqual(self.renderer.render.call_count, 3)
+
+    def test_out_of_range_tiles(self):
+        for z, x, y in ((23, 0, 0), (2, 4, 0), (2, 0, -1)):
+            with self.assertRaises(TileOutOfRange):
+                self.renderer.get_tile(1, z, x, y)
+
+    def test_simplify_tolerance_halves_per_zoom(self):
+        self.assertAlmostEqual(simplify_tolerance(15), simplify_tolerance(14) / 2)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_process_local_cache_warns(self):
+        self.assertEqual(
+            {warning.id for warning in check_shared_caches(None)}, {'environmental_analysis.W001'}
+        )
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'site_analysis_cache'},
+    })
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_caches(None), [])
+
+    def test_project_settings_pass(self):
+        self.assertEqual(check_shared_caches(None), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VectorTileEndpointTests(TestCase):
+    def setUp(self):
+        self.site_analysis = SiteAnalysis.objects.create(
+            name="Tile site", location=Point(77.59, 12.97, srid=4326), analysis_radius=500
+        )
+        self.url = f'/api/environmental/analysis/{self.site_analysis.id}/tiles/14/11700/7600.mvt'
+        patcher = mock.patch.object(VectorTileRenderer, 'render', return_value=b'tile')
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tile_carries_an_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], MVT_CONTENT_TYPE)
+        self.assertEqual(response.content, b'tile')
+        self.assertIn('ETag', response)
+
+    def test_matching_etag_revalidates_with_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_out_of_range_tile_is_404(self):
+        url = f'/api/environmental/analysis/{self.site_analysis.id}/tiles/1/5/0.mvt'
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class AdminTileInvalidationTests(TestCase):
+    def setUp(self):
+        self.site_analysis = SiteAnalysis.objects.create(
+            name="Admin site", location=Point(77.59, 12.97, srid=4326), analysis_radius=500
+        )
+        element = OSMFeature.objects.create(
+            element_type='way', element_id=1, tags={'landuse': 'grass'},
+            geometry=Point(77.59, 12.97, srid=4326),
+        )
+        self.feature = EnvironmentalFeature.objects.create(
+            site_analysis=self.site_analysis, osm_feature=element, feature_type='landuse',
+            osm_id=element.osm_id, geometry=Point(77.59, 12.97, srid=4326),
+        )
+        self.admin = EnvironmentalFeatureAdmin(EnvironmentalFeature, AdminSite())
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_delete_model_invalidates_tiles(self, invalidate):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.delete_model(None, self.feature)
+        invalidate.assert_called_once_with(self.site_analysis.id)
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_delete_queryset_invalidates_tiles(self, invalidate):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.delete_queryset(None, EnvironmentalFeature.objects.all())
+        invalidate.assert_called_once_with(self.site_analysis.id)
+        self.assertFalse(EnvironmentalFeature.objects.exists())
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_retagging_an_element_invalidates_every_linked_analysis(self, invalidate):
+        element = self.feature.osm_feature
+        other = SiteAnalysis.objects.create(
+            name="Sharing site", location=Point(77.59, 12.97, srid=4326), analysis_radius=500
+        )
+        EnvironmentalFeature.objects.create(
+            site_analysis=other, osm_feature=element, feature_type='landuse',
+            osm_id=element.osm_id, geometry=element.geometry,
+        )
+        element_admin = OSMFeatureAdmin(OSMFeature, AdminSite())
+        element.tags = {'landuse': 'grass', 'name': 'Village green'}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            element_admin.save_model(None, element, mock.Mock(changed_data=['tags']), change=True)
+
+        self.assertEqual(sorted(call.args[0] for call in invalidate.call_args_list), [self.site_analysis.id, other.id])
+
+    @mock.patch('environmental_analysis.vector_tiles.invalidate_analysis_tiles')
+    def test_element_edits_without_tag_changes_keep_tiles(self, invalidate):
+        element_admin = OSMFeatureAdmin(OSMFeature, AdminSite())
+        with self.captureOnCommitCallbacks(execute=True):
+            element_admin.save_model(None, self.feature.osm_feature, mock.Mock(changed_data=['version']), change=True)
+        invalidate.assert_not_called()
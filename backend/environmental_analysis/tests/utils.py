@@ -0,0 +1,26 @@
+from itertools import count
+
+from django.contrib.gis.geos import GEOSGeometry, Point
+
+from environmental_analysis.models import EnvironmentalFeature, OSMFeature, SiteAnalysis
+
+_element_ids = count(1)
+
+
+def create_analysis(latitude=12.97, longitude=77.59, radius=1000, name="Test site"):
+    return SiteAnalysis.objects.create(
+        name=name, location=Point(longitude, latitude, srid=4326), analysis_radius=radius
+    )
+
+
+def create_feature(site_analysis, geometry, feature_type='landuse', tags=None, element_type='way'):
+    """Store a feature and its shared OSM element; geometry is WKT in EPSG:4326"""
+    geometry = GEOSGeometry(geometry, srid=4326)
+    element = OSMFeature.objects.create(
+        element_type=element_type, element_id=next(_element_ids),
+        tags=tags or {feature_type: 'yes'}, geometry=geometry,
+    )
+    return EnvironmentalFeature.objects.create(
+        site_analysis=site_analysis, osm_feature=element, feature_type=feature_type,
+        osm_id=element.osm_id, geometry=geometry,
+    )
@@ -0,0 +1,240 @@
+"""
+OSM Tile Store
+
+Persistent store of tag-filtered OSM features split into slippy-map tiles
+at a fixed zoom. Requests are answered from the tiles covering the analysis
+circle; missing or expired tiles are downloaded lazily, so overlapping
+analyses share downloads instead of each querying Overpass.
+"""
+import logging
+import math
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import osmnx as ox
+import pandas as pd
+import shapely
+from shapely import affinity
+from shapely.geometry import Point as ShapelyPoint, box
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsWKB
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OSMTile, OSMTileFeature
+from .reuse import EARTH_RADIUS_M
+
+logger = logging.getLogger(__name__)
+
+
+def tile_for(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    """Slippy-map tile (x, y) containing a coordinate"""
+    n = 2 ** zoom
+    lat_rad = math.radians(max(min(latitude, 85.0511), -85.0511))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Bounds (west, south, east, north) of a slippy-map tile in degrees"""
+    n = 2 ** zoom
+
+    def lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tiles_covering(bounds: Tuple[float, float, float, float], zoom: int) -> List[Tuple[int, int]]:
+    """All tiles (x, y) intersecting bounds (west, south, east, north)"""
+    west, south, east, north = bounds
+    min_x, min_y = tile_for(north, west, zoom)
+    max_x, max_y = tile_for(south, east, zoom)
+    return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+
+def rows_to_gdf(rows) -> gpd.GeoDataFrame:
+    """
+    Build an OSMnx-style GeoDataFrame from stored feature rows
+
+    Args:
+        rows: Iterable of (element_type, element_id, geometry WKB, tags)
+
+    Returns:
+        GeoDataFrame indexed by (element, id), one row per OSM element
+    """
+    seen = set()
+    index, geometries, records = [], [], []
+    for element_type, element_id, wkb, tags in rows:
+        if (element_type, element_id) in seen:
+            continue
+        seen.add((element_type, element_id))
+        index.append((element_type, element_id))
+        geometries.append(bytes(wkb))
+        records.append(tags)
+
+    if not index:
+        return gpd.GeoDataFrame(geometry=[], crs='EPSG:4326')
+
+    return gpd.GeoDataFrame(
+        pd.DataFrame.from_records(records),
+        geometry=shapely.from_wkb(geometries),
+        crs='EPSG:4326',
+    ).set_index(pd.MultiIndex.from_tuples(index, names=['element', 'id']))
+
+
+def circle_from_point(latitude: float, longitude: float, radius: int):
+    """
+    Approximate the geodesic circle around a point as a shapely polygon
+
+    Uses the same degree deltas as OSMnx's bounding box, which is accurate
+    to well under a metre at site analysis radii.
+    """
+    delta_lat = math.degrees(radius / EARTH_RADIUS_M)
+    delta_lon = delta_lat / math.cos(math.radians(latitude))
+    return affinity.scale(
+        ShapelyPoint(longitude, latitude).buffer(1, quad_segs=32),
+        xfact=delta_lon, yfact=delta_lat,
+    )
+
+
+class OSMTileStore:
+    """Tiled, persistent OSM feature store with lazy per-tile downloads"""
+
+    def __init__(self, tags: Dict[str, Any], zoom: Optional[int] = None,
+                 ttl_hours: Optional[float] = None):
+        self.tags = tags
+        self.zoom = zoom or getattr(settings, 'OSM_TILE_ZOOM', 14)
+        if ttl_hours is None:
+            ttl_hours = getattr(settings, 'OSM_TILE_TTL_HOURS', 24 * 7)
+        self.ttl = timedelta(hours=ttl_hours) if ttl_hours else None
+
+    def get_features(self, latitude: float, longitude: float, radius: int) -> gpd.GeoDataFrame:
+        """
+        Get the stored features intersecting an analysis circle
+
+        Downloads any covering tile that is missing or expired first.
+
+        Args:
+            latitude: Center point latitude
+            longitude: Center point longitude
+            radius: Search radius in meters
+
+        Returns:
+            GeoDataFrame shaped like OSMnx output, indexed by (element, id)
+        """
+        circle = circle_from_point(latitude, longitude, radius)
+        tiles = tiles_covering(circle.bounds, self.zoom)
+
+        fresh = self.fresh_tiles(tiles)
+        for x, y in tiles:
+            if (x, y) not in fresh:
+                self.fetch_tile(x, y)
+
+        rows = (
+            OSMTileFeature.objects
+            .filter(self._tiles_filter(tiles))
+            .filter(geometry__intersects=GEOSGeometry(circle.wkb, srid=4326))
+            .annotate(wkb=AsWKB('geometry'))
+            .values_list('element_type', 'element_id', 'wkb', 'tags')
+        )
+        return rows_to_gdf(rows)
+
+    def fresh_tiles(self, tiles: List[Tuple[int, int]]) -> set:
+        """Subset of tiles that are stored and not expired"""
+        now = timezone.now()
+        stored = (
+            OSMTile.objects
+            .filter(self._tiles_filter(tiles, prefix=''))
+            .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+            .values_list('x', 'y')
+        )
+        return set(stored)
+
+    def fetch_tile(self, x: int, y: int) -> OSMTile:
+        """Download the features of one tile from Overpass and store them"""
+        west, south, east, north = tile_bounds(self.zoom, x, y)
+        logger.info(f"Fetching OSM tile {self.zoom}/{x}/{y}")
+        try:
+            gdf = ox.features_from_polygon(box(west, south, east, north), tags=self.tags)
+        except ox._errors.InsufficientResponseError:
+            gdf = gpd.GeoDataFrame(geometry=[], crs='EPSG:4326')
+        return self.store_tile(x, y, gdf, ttl=self.ttl)
+
+    def store_tile(self, x: int, y: int, gdf: gpd.GeoDataFrame,
+                   ttl: Optional[timedelta] = None) -> OSMTile:
+        """
+        Replace the stored features of a tile
+
+        Args:
+            x: Tile column
+            y: Tile row
+            gdf: OSMnx-style GeoDataFrame indexed by (element, id)
+            ttl: Time until the tile expires, or None to keep it indefinitely
+
+        Returns:
+            Stored OSMTile
+        """
+        now = timezone.now()
+        features = []
+        if not gdf.empty:
+            tag_columns = [col for col in gdf.columns if col != 'geometry']
+            tags = gdf[tag_columns].astype(object).where(gdf[tag_columns].notna(), None)
+            for (element_type, element_id), geometry_wkb, record in zip(
+                gdf.index, gdf['geometry'].to_wkb(), tags.to_dict('records')
+            ):
+                features.append(OSMTileFeature(
+                    element_type=element_type,
+                    element_id=int(element_id),
+                    geometry=GEOSGeometry(memoryview(geometry_wkb), srid=4326),
+                    tags={key: value for key, value in record.items() if value is not None},
+                ))
+
+        with transaction.atomic():
+            tile, _ = OSMTile.objects.update_or_create(
+                zoom=self.zoom, x=x, y=y,
+                defaults={
+                    'fetched_at': now,
+                    'expires_at': now + ttl if ttl else None,
+                    'feature_count': len(features),
+                },
+            )
+            tile.features.all().delete()
+            for feature in features:
+                feature.tile = tile
+            OSMTileFeature.objects.bulk_create(features, batch_size=1000)
+
+        return tile
+
+    def seed_from_gdf(self, gdf: gpd.GeoDataFrame, ttl: Optional[timedelta] = None) -> int:
+        """
+        Seed every tile covering a GeoDataFrame, e.g. parsed from a local extract
+
+        Args:
+            gdf: OSMnx-style GeoDataFrame indexed by (element, id)
+            ttl: Time until the seeded tiles expire, or None to keep them
+
+        Returns:
+            Number of tiles stored
+        """
+        if gdf.empty:
+            return 0
+
+        tiles = tiles_covering(tuple(gdf.total_bounds), self.zoom)
+        for x, y in tiles:
+            tile_polygon = box(*tile_bounds(self.zoom, x, y))
+            positions = gdf.sindex.query(tile_polygon, predicate='intersects')
+            self.store_tile(x, y, gdf.iloc[positions], ttl=ttl)
+
+        logger.info(f"Seeded {len(tiles)} OSM tiles at zoom {self.zoom}")
+        return len(tiles)
+
+    def _tiles_filter(self, tiles: List[Tuple[int, int]], prefix: str = 'tile__') -> Q:
+        condition = Q()
+        for x, y in tiles:
+            condition |= Q(**{f'{prefix}x': x, f'{prefix}y': y})
+        return Q(**{f'{prefix}zoom': self.zoom}) & condition
@@ -0,0 +1,193 @@
+"""
+Vector Tiles
+
+Renders the features of an analysis as Mapbox Vector Tiles with PostGIS
+ST_AsMVT, so the map only downloads the geometry in view, simplified to
+the resolution of the requested zoom. Rendered tiles are cached with
+their ETag under a per-analysis generation that is bumped whenever the
+analysis' features change.
+"""
+import hashlib
+import logging
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from .models import EnvironmentalFeature
+
+logger = logging.getLogger(__name__)
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+MVT_LAYER = 'features'
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+MAX_ZOOM = 22
+
+# Width of the Web Mercator world in meters
+WEB_MERCATOR_WORLD_M = 2 * 20037508.342789244
+
+
+class TileOutOfRange(ValueError):
+    """Raised for tile coordinates outside the tile pyramid"""
+
+
+def simplify_tolerance(z: int) -> float:
+    """Simplification tolerance for a zoom: one tile extent unit in meters"""
+    return WEB_MERCATOR_WORLD_M / (2 ** z) / MVT_EXTENT
+
+
+class VectorTileRenderer:
+    """Renders and caches per-analysis feature tiles"""
+
+    # Features are selected with the bounding box index, simplified below
+    # the tile grid resolution and clipped to the tile plus its buffer
+    TILE_SQL = """
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS tile,
+                   ST_TileEnvelope(%(z)s, %(x)s, %(y)s, margin => %(margin)s) AS query
+        ),
+        tile_features AS (
+            SELECT f.osm_id,
+                   f.feature_type,
+                   o.tags ->> 'name' AS name,
+                   ST_AsMVTGeom(
+                       ST_SimplifyPreserveTopology(ST_Transform(f.geometry, 3857), %(tolerance)s),
+                       bounds.tile, %(extent)s, %(buffer)s, true
+                   ) AS geom
+            FROM environmental_analysis_environmentalfeature f
+            JOIN environmental_analysis_osmfeature o ON o.id = f.osm_feature_id
+            CROSS JOIN bounds
+            WHERE f.site_analysis_id = %(analysis_id)s
+              AND f.geometry && ST_Transform(bounds.query, 4326)
+              {type_filter}
+        )
+        SELECT ST_AsMVT(tile_features, %(layer)s, %(extent)s, 'geom')
+        FROM tile_features
+        WHERE geom IS NOT NULL
+    """
+
+    def __init__(self, cache_alias: str = None, cache_seconds: int = None):
+        self.cache_alias = cache_alias or getattr(settings, 'MVT_TILE_CACHE_ALIAS', 'default')
+        if cache_seconds is None:
+            cache_seconds = getattr(settings, 'MVT_TILE_CACHE_SECONDS', 3600)
+        self.cache_seconds = cache_seconds
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _generation_key(self, analysis_id: int) -> str:
+        return f"mvt:generation:{analysis_id}"
+
+    def _generation(self, analysis_id: int) -> int:
+        return self.cache.get_or_set(self._generation_key(analysis_id), 1, timeout=None)
+
+    def invalidate(self, analysis_id: int) -> None:
+        """Drop every cached tile of an analysis"""
+        try:
+            self.cache.incr(self._generation_key(analysis_id))
+        except ValueError:
+            self.cache.set(self._generation_key(analysis_id), 2, timeout=None)
+
+    def get_tile(self, analysis_id: int, z: int, x: int, y: int,
+                 feature_types: Optional[Iterable[str]] = None) -> Tuple[bytes, str]:
+        """
+        Get a rendered tile and its ETag, from the cache when possible
+
+        Args:
+            analysis_id: SiteAnalysis id
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+            feature_types: Only include these feature types (all when empty)
+
+        Returns:
+            (tile bytes, ETag) tuple
+
+        Raises:
+            TileOutOfRange: If the tile coordinates are invalid
+        """
+        if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise TileOutOfRange(f"Tile {z}/{x}/{y} is outside the tile pyramid")
+
+        feature_types = sorted(set(feature_types or []))
+        key = (
+            f"mvt:{analysis_id}:{self._generation(analysis_id)}:{z}:{x}:{y}:"
+            f"{','.join(feature_types)}"
+        )
+        cached = self.cache.get(key) if self.cache_seconds > 0 else None
+        if cached is not None:
+            return cached
+
+        tile = self.render(analysis_id, z, x, y, feature_types)
+        etag = f'"{hashlib.md5(tile).hexdigest()}"'
+        if self.cache_seconds > 0:
+            self.cache.set(key, (tile, etag), timeout=self.cache_seconds)
+        return tile, etag
+
+    def render(self, analysis_id: int, z: int, x: int, y: int,
+               feature_types: Iterable[str] = ()) -> bytes:
+        """Render a tile in PostGIS"""
+        params = {
+            'analysis_id': analysis_id,
+            'z': z,
+            'x': x,
+            'y': y,
+            'margin': MVT_BUFFER / MVT_EXTENT,
+            'tolerance': simplify_tolerance(z),
+            'extent': MVT_EXTENT,
+            'buffer': MVT_BUFFER,
+            'layer': MVT_LAYER,
+        }
+        type_filter = ''
+        if feature_types:
+            type_filter = 'AND f.feature_type = ANY(%(feature_types)s)'
+            params['feature_types'] = list(feature_types)
+
+        with connection.cursor() as cursor:
+            cursor.execute(self.TILE_SQL.format(type_filter=type_filter), params)
+            row = cursor.fetchone()
+
+        return bytes(row[0]) if row and row[0] is not None else b''
+
+
+_tile_renderer = None
+
+
+def get_tile_renderer() -> VectorTileRenderer:
+    """Return the process-wide vector tile renderer configured from settings"""
+    global _tile_renderer
+    if _tile_renderer is None:
+        _tile_renderer = VectorTileRenderer()
+    return _tile_renderer
+
+
+def invalidate_analysis_tiles(analysis_id: int) -> None:
+    """Invalidate cached tiles after an analysis' features change"""
+    get_tile_renderer().invalidate(analysis_id)
+
+
+def invalidate_tiles_on_commit(analysis_ids: Iterable[int]) -> None:
+    """Invalidate the cached tiles of analyses once the current transaction commits"""
+    for analysis_id in set(analysis_ids):
+        transaction.on_commit(lambda analysis_id=analysis_id: invalidate_analysis_tiles(analysis_id))
+
+
+def invalidate_element_tiles_on_commit(osm_feature_ids: Iterable[int]) -> None:
+    """
+    Invalidate the cached tiles of every analysis linking OSM elements
+
+    Tiles carry element tags, so retagging a shared element changes the
+    tiles of all analyses that include it.
+    """
+    osm_feature_ids = list(osm_feature_ids)
+    if not osm_feature_ids:
+        return
+    invalidate_tiles_on_commit(
+        EnvironmentalFeature.objects
+        .filter(osm_feature_id__in=osm_feature_ids)
+        .values_list('site_analysis_id', flat=True)
+        .distinct()
+    )
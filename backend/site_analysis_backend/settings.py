@@ -29,7 +29,57 @@ GEOS_LIBRARY_PATH = '/opt/homebrew/lib/libgeos_c.dylib'
 # Climate Data API Configuration
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 CLIMATE_DATA_CACHE_HOURS = int(os.getenv('CLIMATE_DATA_CACHE_HOURS', 6))
+CLIMATE_HISTORICAL_CACHE_HOURS = int(os.getenv('CLIMATE_HISTORICAL_CACHE_HOURS', 24))
+CLIMATE_CACHE_BACKEND = os.getenv('CLIMATE_CACHE_BACKEND', 'local')  # 'local' or 'django'
+CLIMATE_CACHE_MAX_ENTRIES = int(os.getenv('CLIMATE_CACHE_MAX_ENTRIES', 1024))
+CLIMATE_CACHE_GRID_DEGREES = float(os.getenv('CLIMATE_CACHE_GRID_DEGREES', 0.01))  # ~1 km
 CLIMATE_API_TIMEOUT = int(os.getenv('CLIMATE_API_TIMEOUT', 30))
+HTTP_CLIENT_POOL_SIZE = int(os.getenv('HTTP_CLIENT_POOL_SIZE', 20))
+HTTP_CLIENT_POOL_SIZE_PER_HOST = int(os.getenv('HTTP_CLIENT_POOL_SIZE_PER_HOST', 10))
+
+
+# Analysis Pipeline Configuration
+ANALYSIS_STAGE_WORKERS = int(os.getenv('ANALYSIS_STAGE_WORKERS', 4))
+ANALYSIS_JOB_WORKERS = int(os.getenv('ANALYSIS_JOB_WORKERS', 2))
+ANALYSIS_JOB_MAX_PENDING = int(os.getenv('ANALYSIS_JOB_MAX_PENDING', 50))
+ANALYSIS_JOB_STALE_MINUTES = int(os.getenv('ANALYSIS_JOB_STALE_MINUTES', 30))
+ANALYSIS_REUSE_MAX_AGE_HOURS = float(os.getenv('ANALYSIS_REUSE_MAX_AGE_HOURS', 24))  # 0 disables reuse
+BATCH_ANALYSIS_WORKERS = int(os.getenv('BATCH_ANALYSIS_WORKERS', 4))
+BATCH_ANALYSIS_MAX_SITES = int(os.getenv('BATCH_ANALYSIS_MAX_SITES', 1000))
+BATCH_GROUP_CELL_METERS = float(os.getenv('BATCH_GROUP_CELL_METERS', 2000))
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+FEATURES_PAGE_SIZE = int(os.getenv('FEATURES_PAGE_SIZE', 500))
+FEATURES_MAX_PAGE_SIZE = int(os.getenv('FEATURES_MAX_PAGE_SIZE', 5000))
+FEATURES_SEARCH_MAX_ANALYSES = int(os.getenv('FEATURES_SEARCH_MAX_ANALYSES', 100))
+PROXIMITY_DEFAULT_K = int(os.getenv('PROXIMITY_DEFAULT_K', 5))
+PROXIMITY_MAX_K = int(os.getenv('PROXIMITY_MAX_K', 100))
+COVERAGE_CELL_SIZE_M = float(os.getenv('COVERAGE_CELL_SIZE_M', 5.0))
+COVERAGE_MAX_GRID_CELLS = int(os.getenv('COVERAGE_MAX_GRID_CELLS', 2000))  # per side
+COVERAGE_PATH_WIDTH_M = float(os.getenv('COVERAGE_PATH_WIDTH_M', 3.0))
+COVERAGE_POINT_RADIUS_M = float(os.getenv('COVERAGE_POINT_RADIUS_M', 3.0))  # e.g. tree crowns
+COVERAGE_DISTANCE_MAX_CELLS = int(os.getenv('COVERAGE_DISTANCE_MAX_CELLS', 200))  # per side
+COVERAGE_GREEN_ACCESS_M = float(os.getenv('COVERAGE_GREEN_ACCESS_M', 300))
+COVERAGE_CACHE_ALIAS = os.getenv('COVERAGE_CACHE_ALIAS', 'shared')
+COVERAGE_CACHE_SECONDS = int(os.getenv('COVERAGE_CACHE_SECONDS', 24 * 3600))  # 0 disables caching
+MEASUREMENT_CACHE_MAX_ANALYSES = int(os.getenv('MEASUREMENT_CACHE_MAX_ANALYSES', 32))  # projected feature sets kept in memory
+MEASUREMENT_CACHE_SECONDS = int(os.getenv('MEASUREMENT_CACHE_SECONDS', 3600))  # 0 disables caching
+PROXIMITY_DISTANCE_BANDS = [float(edge) for edge in os.getenv('PROXIMITY_DISTANCE_BANDS', '100,250,500,1000,2000').split(',')]
+MVT_TILE_CACHE_ALIAS = os.getenv('MVT_TILE_CACHE_ALIAS', 'shared')
+MVT_TILE_CACHE_SECONDS = int(os.getenv('MVT_TILE_CACHE_SECONDS', 3600))  # 0 disables tile caching
+
+
+# Ingest Geometry Pipeline Configuration
+GEOMETRY_CLIP_TO_SITE = os.getenv('GEOMETRY_CLIP_TO_SITE', 'True').lower() == 'true'
+GEOMETRY_SIMPLIFY_TOLERANCE_M = float(os.getenv('GEOMETRY_SIMPLIFY_TOLERANCE_M', 1.0))  # 0 disables simplification
+GEOMETRY_GRID_SIZE_DEGREES = float(os.getenv('GEOMETRY_GRID_SIZE_DEGREES', 1e-6))  # ~0.1 m; 0 disables snapping
+FEATURE_INGEST_METHOD = os.getenv('FEATURE_INGEST_METHOD', 'copy')  # 'copy' (PostgreSQL only) or 'orm'
+FEATURE_INGEST_CHUNK_SIZE = int(os.getenv('FEATURE_INGEST_CHUNK_SIZE', 10000))
+
+
+# OSM Feature Source Configuration
+OSM_FEATURE_SOURCE = os.getenv('OSM_FEATURE_SOURCE', 'overpass')  # 'overpass', 'tiles' or 'extract'
+OSM_TILE_ZOOM = int(os.getenv('OSM_TILE_ZOOM', 14))
+OSM_TILE_TTL_HOURS = float(os.getenv('OSM_TILE_TTL_HOURS', 24 * 7))  # 0 keeps tiles indefinitely
 
 
 # Quick-start development settings - unsuitable for production
@@ -112,6 +162,26 @@ DATABASES = {
 # }
 
 
+# Cache
+# The default cache stays process-local. Tile generations and coverage
+# rasters are invalidated from any worker process, so they use the 'shared'
+# cache: Redis when REDIS_URL is set, otherwise a database table
+# (python manage.py createcachetable)
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'site_analysis_cache',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 